@@ -0,0 +1,61 @@
+"""
+cumulative import time (python -X importtime) of the nerblackbox package and its heavy dependencies
+
+usage:
+    python dev/benchmark_import_time.py
+"""
+import argparse
+import subprocess
+import sys
+
+MODULES = [
+    "nerblackbox",
+    "nerblackbox.api.model",
+    "torch",
+    "transformers",
+    "mlflow",
+    "pytorch_lightning",
+    "pandas",
+    "seqeval",
+    "sklearn",
+]
+
+
+def main(args):
+    for statement in args.statements:
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", statement],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        import_times = dict()
+        for line in result.stderr.splitlines():
+            if line.startswith("import time:") and "|" in line:
+                _, cumulative, module = line.split("|")
+                if cumulative.strip().isdigit():
+                    import_times[module.strip()] = int(cumulative.strip())
+
+        total = sum(
+            cumulative
+            for module, cumulative in import_times.items()
+            if "." not in module
+        )
+        print(f"> {statement}: {total / 1000:8.1f} ms")
+        for module in MODULES:
+            if module in import_times:
+                print(f"  {module:25s} {import_times[module] / 1000:8.1f} ms")
+            else:
+                print(f"  {module:25s}   not imported")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--statements",
+        nargs="+",
+        default=["from nerblackbox import Model", "from nerblackbox import Store"],
+    )
+    _args = parser.parse_args()
+
+    main(_args)
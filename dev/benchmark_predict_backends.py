@@ -0,0 +1,59 @@
+"""
+throughput (documents per second) of Model.predict() for different backends (and quantization)
+
+usage:
+    python dev/benchmark_predict_backends.py --checkpoint <checkpoint_directory> --backends pytorch onnx
+    python dev/benchmark_predict_backends.py --checkpoint <checkpoint_directory> --quantization dynamic_int8
+"""
+import argparse
+import time
+
+from nerblackbox import Model
+
+
+def main(args):
+    input_texts = [args.text] * args.documents
+    print(
+        f"> {args.documents} documents, batch_size = {args.batch_size}, dynamic_padding = {args.dynamic_padding}"
+    )
+    settings = [(backend, None) for backend in args.backends]
+    if args.quantization is not None:
+        settings.append(("pytorch", args.quantization))
+
+    for backend, quantization in settings:
+        model = Model.from_checkpoint(
+            args.checkpoint,
+            batch_size=args.batch_size,
+            dynamic_padding=args.dynamic_padding,
+            backend=backend,
+            quantization=quantization,
+        )
+        assert model is not None, f"ERROR! could not load model from {args.checkpoint}"
+        model.predict(input_texts[: args.batch_size])  # warm-up
+
+        start = time.perf_counter()
+        model.predict(input_texts)
+        seconds = time.perf_counter() - start
+
+        print(
+            f"backend = {backend:8s} | quantization = {str(quantization):12s} | "
+            f"{args.documents / seconds:9.1f} documents/sec"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--checkpoint", type=str, required=True)
+    parser.add_argument("--backends", type=str, nargs="+", default=["pytorch", "onnx"])
+    parser.add_argument("--quantization", type=str, default=None)
+    parser.add_argument("--batch_size", type=int, default=16)
+    parser.add_argument("--dynamic_padding", action="store_true", default=False)
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument(
+        "--text",
+        type=str,
+        default="anna karlsson is in göteborg, this is an example of the example of the example.",
+    )
+    _args = parser.parse_args()
+
+    main(_args)
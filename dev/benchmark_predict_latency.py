@@ -0,0 +1,86 @@
+"""
+per-call latency of Model.predict() for single-text requests
+
+compares the preprocessing setup that was previously created on every call
+(DataPreprocessor + InputExamplesToTensors + DataLoader)
+with the persistent pipeline owned by the Model instance.
+
+usage:
+    python dev/benchmark_predict_latency.py --checkpoint <checkpoint_directory>
+"""
+import argparse
+import time
+from statistics import mean, median
+from typing import Callable, List
+
+from nerblackbox import Model
+from nerblackbox.modules.ner_training.data_preprocessing.data_preprocessor import (
+    DataPreprocessor,
+)
+from nerblackbox.tests.utils import PseudoDefaultLogger
+
+
+def measure(function: Callable[[], None], repetitions: int) -> List[float]:
+    function()  # warm-up
+    times = list()
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        function()
+        times.append(1000 * (time.perf_counter() - start))
+    return times
+
+
+def report(name: str, times: List[float]) -> None:
+    print(
+        f"{name.ljust(30)} mean = {mean(times):7.3f} ms | median = {median(times):7.3f} ms"
+    )
+
+
+def main(args):
+    model = Model.from_checkpoint(args.checkpoint, dynamic_padding=args.dynamic_padding)
+    assert model is not None, f"ERROR! could not load model from {args.checkpoint}"
+    input_texts = [args.text]
+
+    def setup_per_call():
+        data_preprocessor = DataPreprocessor(
+            tokenizer=model.tokenizer,
+            do_lower_case=model.tokenizer.do_lower_case,
+            max_seq_length=model.max_seq_length,
+            default_logger=PseudoDefaultLogger(),
+        )
+        input_examples, _, _ = data_preprocessor.get_input_examples_predict(
+            input_texts, is_pretokenized=False
+        )
+        dataloader, _ = data_preprocessor.to_dataloader(
+            input_examples, model.annotation_classes, batch_size=model.batch_size
+        )
+        _ = [sample for sample in dataloader["predict"]]
+
+    def setup_persistent():
+        input_examples, _, _ = model.data_preprocessor.get_input_examples_predict(
+            input_texts, is_pretokenized=False
+        )
+        _ = model.input_examples_to_tensors(input_examples["predict"], predict=True)
+
+    def predict():
+        model.predict(input_texts)
+
+    print(
+        f"> {args.repetitions} repetitions, text = '{args.text}', dynamic_padding = {args.dynamic_padding}"
+    )
+    report("setup (per call, before)", measure(setup_per_call, args.repetitions))
+    report("setup (persistent, after)", measure(setup_persistent, args.repetitions))
+    report("predict (total)", measure(predict, args.repetitions))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--checkpoint", type=str, required=True)
+    parser.add_argument("--repetitions", type=int, default=100)
+    parser.add_argument(
+        "--text", type=str, default="arbetsförmedlingen finns i stockholm"
+    )
+    parser.add_argument("--dynamic_padding", action="store_true", default=False)
+    _args = parser.parse_args()
+
+    main(_args)
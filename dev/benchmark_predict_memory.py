@@ -0,0 +1,59 @@
+"""
+startup time and resident memory per process of Model with worker processes, with and without mmap
+
+rss counts shared pages fully in every process, pss divides them by the number of processes that share them.
+hence, the sum of pss over all processes is the actual memory footprint on the host.
+
+usage:
+    python dev/benchmark_predict_memory.py --checkpoint <checkpoint_directory> --num_workers 4
+"""
+import argparse
+import time
+
+from nerblackbox import Model
+
+MB = 1024**2
+
+
+def main(args):
+    input_texts = [args.text] * args.documents
+    print(f"> num_workers = {args.num_workers}, {args.documents} documents")
+    for mmap in [False, True]:
+        start = time.perf_counter()
+        model = Model.from_checkpoint(
+            args.checkpoint,
+            num_workers=args.num_workers,
+            mmap=mmap,
+        )
+        assert model is not None, f"ERROR! could not load model from {args.checkpoint}"
+        model.predict(input_texts)  # starts workers, touches all weights
+        seconds = time.perf_counter() - start
+        memory_usage = model.memory_usage()
+        model.close()
+
+        print(f"mmap = {mmap!s:5} | startup & predict: {seconds:5.1f}s")
+        for process, usage in enumerate(memory_usage):
+            name = "main" if process == 0 else f"worker {process}"
+            print(
+                f"    {name:9} | rss = {usage['rss'] / MB:7.1f} MB | pss = {usage['pss'] / MB:7.1f} MB "
+                f"| shared = {usage['shared'] / MB:7.1f} MB"
+            )
+        print(
+            f"    {'total':9} | rss = {sum(u['rss'] for u in memory_usage) / MB:7.1f} MB "
+            f"| pss = {sum(u['pss'] for u in memory_usage) / MB:7.1f} MB"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--checkpoint", type=str, required=True)
+    parser.add_argument("--num_workers", type=int, default=4)
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument(
+        "--text",
+        type=str,
+        default="anna karlsson is in göteborg, this is an example of the example of the example.",
+    )
+    _args = parser.parse_args()
+
+    main(_args)
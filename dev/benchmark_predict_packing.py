@@ -0,0 +1,61 @@
+"""
+throughput (documents per second) of Model.predict() on short input texts, with and without packing
+
+usage:
+    python dev/benchmark_predict_packing.py --checkpoint <checkpoint_directory>
+"""
+import argparse
+import time
+
+from nerblackbox import Model
+from nerblackbox.api.model import pack_model_inputs
+
+
+def main(args):
+    input_texts = [args.text] * args.documents
+    print(
+        f"> {args.documents} documents, text = '{args.text}', batch_size = {args.batch_size}"
+    )
+    for dynamic_padding, packing in [(False, False), (True, False), (False, True)]:
+        model = Model.from_checkpoint(
+            args.checkpoint,
+            batch_size=args.batch_size,
+            dynamic_padding=dynamic_padding,
+            packing=packing,
+        )
+        assert model is not None, f"ERROR! could not load model from {args.checkpoint}"
+
+        # number of sequences that go through the model
+        input_examples, _, _ = model.data_preprocessor.get_input_examples_predict(
+            input_texts, is_pretokenized=False
+        )
+        encodings, _ = model.input_examples_to_tensors(
+            input_examples["predict"], predict=True
+        )
+        number_of_sequences = len(encodings["input_ids"])
+        if packing:
+            packed_model_inputs, _ = pack_model_inputs(
+                {"attention_mask": encodings["attention_mask"]}, model.max_seq_length
+            )
+            number_of_sequences = len(packed_model_inputs["attention_mask"])
+
+        model.predict(input_texts[: args.batch_size])  # warm-up
+        start = time.perf_counter()
+        model.predict(input_texts)
+        seconds = time.perf_counter() - start
+
+        print(
+            f"dynamic_padding = {str(dynamic_padding):5s} | packing = {str(packing):5s} | "
+            f"sequences = {number_of_sequences:6d} | {args.documents / seconds:9.1f} documents/sec"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--checkpoint", type=str, required=True)
+    parser.add_argument("--batch_size", type=int, default=16)
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--text", type=str, default="anna karlsson, stockholm")
+    _args = parser.parse_args()
+
+    main(_args)
@@ -0,0 +1,97 @@
+"""
+throughput (documents per second) of Model.predict() on cpu for each combination of
+intra-op threads (num_threads), inter-op threads (num_interop_threads), inference_mode and torch_compile
+
+each combination is run in a separate process, as the number of inter-op threads can only be set once per process.
+the warm-up call is not measured (it includes the compilation if torch_compile = True).
+
+usage:
+    python dev/benchmark_predict_threads.py --checkpoint <checkpoint_directory> --num_threads 1 2 4 --num_interop_threads 1
+"""
+import argparse
+import itertools
+import multiprocessing
+import os
+import time
+from typing import Dict, Any
+
+
+def measure(kwargs_model: Dict[str, Any], args) -> float:
+    r"""
+    executed in a separate process
+
+    Returns:
+        documents_per_second
+    """
+    os.environ["CUDA_VISIBLE_DEVICES"] = ""  # cpu only
+    from nerblackbox import Model
+
+    input_texts = [args.text] * args.documents
+    model = Model.from_checkpoint(
+        args.checkpoint, batch_size=args.batch_size, **kwargs_model
+    )
+    assert model is not None, f"ERROR! could not load model from {args.checkpoint}"
+    model.predict(input_texts)  # warm-up (& compilation)
+
+    start = time.perf_counter()
+    model.predict(input_texts)
+    return args.documents / (time.perf_counter() - start)
+
+
+def main(args):
+    print(
+        f"> {args.documents} documents, batch_size = {args.batch_size}, cpus = {multiprocessing.cpu_count()}"
+    )
+    print(
+        "| num_threads | num_interop_threads | inference_mode | torch_compile | documents/sec |"
+    )
+    print(
+        "|------------:|--------------------:|:---------------|:--------------|--------------:|"
+    )
+    context = multiprocessing.get_context("spawn")
+    for (
+        num_threads,
+        num_interop_threads,
+        inference_mode,
+        torch_compile,
+    ) in itertools.product(
+        args.num_threads,
+        args.num_interop_threads,
+        [False, True],
+        [False, True] if args.torch_compile else [False],
+    ):
+        kwargs_model = dict(
+            num_threads=num_threads,
+            num_interop_threads=num_interop_threads,
+            inference_mode=inference_mode,
+            torch_compile=torch_compile,
+        )
+        with context.Pool(1) as pool:
+            documents_per_second = pool.apply(measure, (kwargs_model, args))
+        print(
+            f"| {num_threads:11d} | {num_interop_threads:19d} | {str(inference_mode):14s} "
+            f"| {str(torch_compile):13s} | {documents_per_second:13.1f} |"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--checkpoint", type=str, required=True)
+    parser.add_argument("--num_threads", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--num_interop_threads", type=int, nargs="+", default=[1])
+    parser.add_argument(
+        "--torch_compile",
+        action="store_true",
+        default=False,
+        help="also run each combination with torch_compile = True (slow warm-up)",
+    )
+    parser.add_argument("--batch_size", type=int, default=16)
+    parser.add_argument("--documents", type=int, default=500)
+    parser.add_argument(
+        "--text",
+        type=str,
+        default="anna karlsson is in göteborg, this is an example of the example of the example.",
+    )
+    _args = parser.parse_args()
+
+    main(_args)
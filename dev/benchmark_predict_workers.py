@@ -0,0 +1,55 @@
+"""
+throughput (documents per second) of Model.predict() against the number of worker processes
+
+num_workers = 0 corresponds to a single process that uses all available torch threads.
+
+usage:
+    python dev/benchmark_predict_workers.py --checkpoint <checkpoint_directory> --num_workers 0 1 2 4
+"""
+import argparse
+import time
+
+from nerblackbox import Model
+
+
+def main(args):
+    input_texts = [args.text] * args.documents
+    print(
+        f"> {args.documents} documents, batch_size = {args.batch_size}, "
+        f"threads_per_worker = {args.threads_per_worker}"
+    )
+    for num_workers in args.num_workers:
+        model = Model.from_checkpoint(
+            args.checkpoint,
+            batch_size=args.batch_size,
+            num_workers=num_workers,
+            threads_per_worker=args.threads_per_worker,
+        )
+        assert model is not None, f"ERROR! could not load model from {args.checkpoint}"
+        model.predict(input_texts[: 2 * args.batch_size])  # warm-up (starts workers)
+
+        start = time.perf_counter()
+        model.predict(input_texts)
+        seconds = time.perf_counter() - start
+        model.close()
+
+        print(
+            f"num_workers = {num_workers:2d} | {args.documents / seconds:9.1f} documents/sec"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--checkpoint", type=str, required=True)
+    parser.add_argument("--num_workers", type=int, nargs="+", default=[0, 1, 2, 4])
+    parser.add_argument("--threads_per_worker", type=int, default=1)
+    parser.add_argument("--batch_size", type=int, default=16)
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument(
+        "--text",
+        type=str,
+        default="anna karlsson is in göteborg, this is an example of the example of the example.",
+    )
+    _args = parser.parse_args()
+
+    main(_args)
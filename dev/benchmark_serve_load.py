@@ -0,0 +1,58 @@
+"""
+load test of a local inference server started with
+
+    nerblackbox serve --checkpoint <checkpoint_directory> [--workers 4]
+
+sends single-text requests from concurrent clients and reports throughput and latency percentiles.
+
+usage:
+    python dev/benchmark_serve_load.py --url http://127.0.0.1:8000 --clients 16 --requests 2000
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from statistics import quantiles
+from urllib.request import Request, urlopen
+
+
+def send(url: str, text: str) -> float:
+    start = time.perf_counter()
+    body = json.dumps({"text": text}).encode("utf-8")
+    with urlopen(Request(f"{url}/predict", data=body), timeout=60) as response:
+        response.read()
+    return 1000 * (time.perf_counter() - start)
+
+
+def main(args):
+    with urlopen(f"{args.url}/health", timeout=10) as response:
+        assert response.status == 200, f"ERROR! server at {args.url} is not healthy"
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as executor:
+        latencies = list(
+            executor.map(lambda _: send(args.url, args.text), range(args.requests))
+        )
+    seconds = time.perf_counter() - start
+
+    percentiles = quantiles(latencies, n=100)
+    print(f"> {args.requests} requests, {args.clients} clients")
+    print(f"throughput = {args.requests / seconds:9.1f} requests/sec")
+    print(
+        f"latency    = p50 {percentiles[49]:7.2f} ms | p90 {percentiles[89]:7.2f} ms | p99 {percentiles[98]:7.2f} ms"
+    )
+    with urlopen(f"{args.url}/metrics", timeout=10) as response:
+        print(f"batching   = {json.loads(response.read())['batching']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", type=str, default="http://127.0.0.1:8000")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument(
+        "--text", type=str, default="arbetsförmedlingen finns i stockholm"
+    )
+    _args = parser.parse_args()
+
+    main(_args)
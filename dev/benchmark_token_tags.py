@@ -0,0 +1,121 @@
+"""
+time of the word & entity assembly (merge_tokens_to_words, unpretokenize, merge_tokens_to_entities)
+with TokenTags (one document at a time) and TokenTagsArrays (all documents at once) on random documents
+
+usage:
+    python dev/benchmark_token_tags.py --documents 10000
+"""
+import argparse
+import random
+import time
+from copy import deepcopy
+from typing import List, Dict, Tuple
+
+import numpy as np
+
+from nerblackbox.modules.ner_training.annotation_tags.token_tags import TokenTags
+from nerblackbox.modules.ner_training.annotation_tags.token_tags_arrays import (
+    TokenTagsArrays,
+)
+
+CLASSES = ["O", "B-PER", "I-PER", "B-ORG", "I-ORG", "B-LOC", "I-LOC"]
+WEIGHTS = [20, 1, 1, 1, 1, 1, 1]
+
+
+def create_documents(
+    number_of_documents: int, number_of_words: int, seed: int = 42
+) -> Tuple[List[str], List[List[Dict[str, str]]]]:
+    _random = random.Random(seed)
+    texts, token_tag_lists = list(), list()
+    for _ in range(number_of_documents):
+        words = [
+            "".join(_random.choices("abcdefgh", k=_random.randint(1, 8)))
+            for _ in range(number_of_words)
+        ]
+        tags = _random.choices(CLASSES, weights=WEIGHTS, k=number_of_words)
+        text = " ".join(words)
+        token_tag_list, char_start = list(), 0
+        for word, tag in zip(words, tags):
+            token_tag_list.append(
+                {
+                    "char_start": str(char_start),
+                    "char_end": str(char_start + len(word)),
+                    "token": word,
+                    "tag": tag,
+                }
+            )
+            char_start += len(word) + 1
+        texts.append(text)
+        token_tag_lists.append(token_tag_list)
+    return texts, token_tag_lists
+
+
+def run_token_tags(
+    texts: List[str], token_tag_lists: List[List[Dict[str, str]]]
+) -> List[List[Dict[str, str]]]:
+    predictions = list()
+    for text, token_tag_list in zip(texts, token_tag_lists):
+        token_tags = TokenTags(token_tag_list, scheme="bio")
+        token_tags.merge_tokens_to_words()
+        token_tags.unpretokenize(
+            [
+                (int(elem["char_start"]), int(elem["char_end"]))
+                for elem in token_tag_list
+            ]
+        )
+        token_tags.merge_tokens_to_entities(original_text=text, verbose=False)
+        predictions.append(token_tags.as_list())
+    return predictions
+
+
+def run_token_tags_arrays(
+    texts: List[str],
+    char_start: np.ndarray,
+    char_end: np.ndarray,
+    tag_id: np.ndarray,
+    doc_offsets: np.ndarray,
+) -> List[List[Dict[str, str]]]:
+    token_tags = TokenTagsArrays(
+        char_start, char_end, tag_id, doc_offsets, CLASSES, scheme="bio", texts=texts
+    )
+    token_tags.merge_tokens_to_words()
+    token_tags.unpretokenize(np.stack([char_start, char_end], axis=1))
+    token_tags.merge_tokens_to_entities(original_texts=texts)
+    return token_tags.as_lists()
+
+
+def main(args):
+    texts, token_tag_lists = create_documents(args.documents, args.words)
+    tokens = [elem for token_tag_list in token_tag_lists for elem in token_tag_list]
+    char_start = np.array([int(elem["char_start"]) for elem in tokens])
+    char_end = np.array([int(elem["char_end"]) for elem in tokens])
+    tag_id = np.array([CLASSES.index(elem["tag"]) for elem in tokens])
+    doc_offsets = np.cumsum([0] + [len(elem) for elem in token_tag_lists])
+    print(f"> {args.documents} documents, {args.words} words each")
+
+    _token_tag_lists = deepcopy(token_tag_lists)  # TokenTags changes its input
+    start = time.perf_counter()
+    predictions = run_token_tags(texts, _token_tag_lists)
+    seconds = time.perf_counter() - start
+    print(f"TokenTags       | {seconds:7.3f} sec")
+
+    start = time.perf_counter()
+    predictions_arrays = run_token_tags_arrays(
+        texts, char_start, char_end, tag_id, doc_offsets
+    )
+    seconds_arrays = time.perf_counter() - start
+    print(
+        f"TokenTagsArrays | {seconds_arrays:7.3f} sec | speedup = {seconds / seconds_arrays:.1f}x"
+    )
+
+    assert predictions_arrays == predictions, "ERROR! predictions are not identical."
+    print("> predictions are identical")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--documents", type=int, default=10000)
+    parser.add_argument("--words", type=int, default=50)
+    _args = parser.parse_args()
+
+    main(_args)
@@ -13,10 +13,43 @@ if os.environ.get("DATA_DIR") is None:
     os.environ["DATA_DIR"] = abspath("./store")
 
 ########################################################################################################################
+from typing import TYPE_CHECKING, Any, List
 from nerblackbox import __about__
-from nerblackbox.api.store import Store
-from nerblackbox.api.dataset import Dataset
-from nerblackbox.api.experiment import Experiment
-from nerblackbox.api.model import Model
-from nerblackbox.modules.ner_training.data_preprocessing.text_encoder import TextEncoder
-from nerblackbox.api.annotation_tool import AnnotationTool
+
+# the api classes are imported on first access, such that e.g. "from nerblackbox import Model"
+# does not import the dependencies of training (mlflow, pytorch_lightning, pandas, seqeval, sklearn)
+_API = {
+    "Store": "nerblackbox.api.store",
+    "Dataset": "nerblackbox.api.dataset",
+    "Experiment": "nerblackbox.api.experiment",
+    "Model": "nerblackbox.api.model",
+    "AsyncPredictor": "nerblackbox.api.async_predictor",
+    "TextEncoder": "nerblackbox.modules.ner_training.data_preprocessing.text_encoder",
+    "AnnotationTool": "nerblackbox.api.annotation_tool",
+}
+
+__all__ = list(_API.keys())
+
+if TYPE_CHECKING:
+    from nerblackbox.api.store import Store
+    from nerblackbox.api.dataset import Dataset
+    from nerblackbox.api.experiment import Experiment
+    from nerblackbox.api.model import Model
+    from nerblackbox.api.async_predictor import AsyncPredictor
+    from nerblackbox.modules.ner_training.data_preprocessing.text_encoder import (
+        TextEncoder,
+    )
+    from nerblackbox.api.annotation_tool import AnnotationTool
+
+
+def __getattr__(name: str) -> Any:
+    if name in _API:
+        # __import__ (unlike importlib.import_module) is also tracked by python -X importtime
+        value = getattr(__import__(_API[name], fromlist=[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> List[str]:
+    return sorted(list(globals().keys()) + __all__)
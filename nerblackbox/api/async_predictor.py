@@ -0,0 +1,187 @@
+import asyncio
+from functools import partial
+from typing import List, Dict, Any, Tuple, Optional
+
+from nerblackbox.api.model import Model
+
+REQUEST = Tuple[str, Tuple[Tuple[str, Any], ...], "asyncio.Future[Any]"]
+
+
+class AsyncPredictor:
+    r"""
+    asyncio-friendly wrapper around Model for online serving.
+    concurrent requests are coalesced into batches, such that a single forward pass serves many requests.
+    """
+
+    def __init__(
+        self,
+        model: Model,
+        max_batch_size: int = 16,
+        max_wait_time: float = 0.005,
+    ):
+        r"""
+        Args:
+            model: Model used for prediction
+            max_batch_size: maximum number of requests that are coalesced into one batch
+            max_wait_time: maximum time (in seconds) the first request of a batch waits for more requests
+        """
+        assert (
+            max_batch_size > 0
+        ), f"ERROR! max_batch_size = {max_batch_size} needs to be > 0."
+        assert (
+            max_wait_time >= 0
+        ), f"ERROR! max_wait_time = {max_wait_time} needs to be >= 0."
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait_time = max_wait_time
+
+        # created on first use, within the running event loop
+        self._pending: List[REQUEST] = list()
+        self._not_empty: Optional[asyncio.Event] = None
+        self._full: Optional[asyncio.Event] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+
+        # metrics
+        self._requests = 0
+        self._batches = 0
+        self._max_queue_depth = 0
+
+    async def predict_async(
+        self,
+        input_text: str,
+        level: str = "entity",
+        autocorrect: bool = False,
+        proba: bool = False,
+        is_pretokenized: bool = False,
+    ) -> List[Dict[str, Any]]:
+        r"""predict tags (or probabilities for tags if proba = True) for a single input text
+
+        Args:
+            input_text: e.g. "example 1"
+            level: "entity" or "word"
+            autocorrect: if True, autocorrect annotation scheme (e.g. B- and I- tags).
+            proba: if True, predict probabilities instead of labels (on word level)
+            is_pretokenized: True if input_text is pretokenized
+
+        Returns:
+            predictions: [list] of [dict], i.e. the predictions of Model.predict() / Model.predict_proba() for input_text
+        """
+        self._start()
+        assert self._not_empty is not None and self._full is not None
+
+        kwargs_predict = (
+            ("level", level),
+            ("autocorrect", autocorrect),
+            ("proba", proba),
+            ("is_pretokenized", is_pretokenized),
+        )
+        future: "asyncio.Future[Any]" = asyncio.get_running_loop().create_future()
+        self._pending.append((input_text, kwargs_predict, future))
+        self._max_queue_depth = max(self._max_queue_depth, len(self._pending))
+        self._not_empty.set()
+        if len(self._pending) >= self.max_batch_size:
+            self._full.set()
+
+        return await future
+
+    def metrics(self) -> Dict[str, float]:
+        r"""
+        Returns:
+            metrics: [dict] w/ keys =
+                     requests:        number of processed requests
+                     batches:         number of processed batches
+                     queue_depth:     number of requests currently waiting
+                     max_queue_depth: maximum number of requests that were waiting at the same time
+                     batch_size_mean: average number of requests per batch
+                     batch_fill:      batch_size_mean / max_batch_size
+        """
+        batch_size_mean = self._requests / self._batches if self._batches else 0.0
+        return {
+            "requests": self._requests,
+            "batches": self._batches,
+            "queue_depth": len(self._pending),
+            "max_queue_depth": self._max_queue_depth,
+            "batch_size_mean": batch_size_mean,
+            "batch_fill": batch_size_mean / self.max_batch_size,
+        }
+
+    async def close(self) -> None:
+        r"""
+        stop the batching loop. requests that are still waiting are cancelled.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for _, _, future in self._pending:
+            future.cancel()
+        self._pending = list()
+
+    ####################################################################################################################
+    # PRIVATE HELPER METHODS
+    ####################################################################################################################
+    def _start(self) -> None:
+        r"""
+        start the batching loop on first use
+        """
+        if self._task is None:
+            self._not_empty = asyncio.Event()
+            self._full = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        r"""
+        batching loop: wait for the first request, then for more requests until
+        max_batch_size is reached or max_wait_time has passed. process the batch and repeat.
+        """
+        assert self._not_empty is not None and self._full is not None
+        while True:
+            await self._not_empty.wait()
+            if len(self._pending) < self.max_batch_size:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.max_wait_time)
+                except asyncio.TimeoutError:
+                    pass
+
+            batch = self._pending[: self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size :]
+            if len(self._pending) < self.max_batch_size:
+                self._full.clear()
+            if len(self._pending) == 0:
+                self._not_empty.clear()
+
+            self._requests += len(batch)
+            self._batches += 1
+            await self._process(batch)
+
+    async def _process(self, batch: List[REQUEST]) -> None:
+        r"""
+        run one prediction per group of requests with identical arguments (usually only one group)
+        in a separate thread, and split the results back to the requests.
+
+        Args:
+            batch: [list] of requests, each consisting of input_text, kwargs_predict and future
+        """
+        groups: Dict[Tuple[Tuple[str, Any], ...], List[REQUEST]] = dict()
+        for request in batch:
+            groups.setdefault(request[1], list()).append(request)
+
+        loop = asyncio.get_running_loop()
+        for kwargs_predict, requests in groups.items():
+            input_texts = [input_text for input_text, _, _ in requests]
+            try:
+                predictions = await loop.run_in_executor(
+                    None,
+                    partial(self.model._predict, input_texts, **dict(kwargs_predict)),
+                )
+            except Exception as e:
+                for _, _, future in requests:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for (_, _, future), prediction in zip(requests, predictions):
+                    if not future.done():
+                        future.set_result(prediction)
@@ -1,7 +1,10 @@
+import inspect
 import json
-import string
-from os.path import join, isdir, isfile
-from typing import Tuple, Any, Optional
+import re
+import time
+from collections import defaultdict
+from os.path import join, isdir, isfile, abspath
+from typing import Tuple, Any, Optional, Callable, Iterator, BinaryIO, cast
 import numpy as np
 
 import torch
@@ -9,26 +12,40 @@ from transformers import AutoModelForTokenClassification, AutoTokenizer
 from typing import List, Union, Dict
 from torch.nn.functional import softmax
 from huggingface_hub import hf_hub_download
-from itertools import product
 
 from nerblackbox.modules.ner_training.annotation_tags.token_tags import TokenTags
+from nerblackbox.modules.ner_training.annotation_tags.token_tags_arrays import (
+    TokenTagsArrays,
+)
 from nerblackbox.modules.ner_training.data_preprocessing.data_preprocessor import (
     DataPreprocessor,
 )
-from nerblackbox.tests.utils import PseudoDefaultLogger
-from nerblackbox.api.store import Store
-from nerblackbox.api.dataset import Dataset
-from nerblackbox.modules.ner_training.metrics.ner_metrics import NerMetrics
-from nerblackbox.modules.experiment_results import ExperimentResults
-from nerblackbox.modules.ner_training.ner_model_train2model import (
-    NerModelTrain2Model,
+from nerblackbox.modules.ner_training.data_preprocessing.tools.utils import Encodings
+from nerblackbox.modules.inference.model_pool import ModelPool
+from nerblackbox.modules.inference.onnx_backend import (
+    OnnxRuntimeModel,
+    load_onnx_model,
 )
-from nerblackbox.modules.ner_training.data_preprocessing.tools.csv_reader import (
-    CsvReader,
+from nerblackbox.modules.inference.quantization import (
+    QUANTIZATIONS,
+    load_quantized_model,
 )
+from nerblackbox.modules.inference.memory_mapping import (
+    get_memory_usage,
+    load_memory_mapped_model,
+)
+from nerblackbox.modules.inference.fingerprint import get_checkpoint_fingerprint
+from nerblackbox.modules.inference.prediction_cache import PredictionCache
+from nerblackbox.modules.inference.profiling import Profiler
+from nerblackbox.modules.inference.threads import set_num_threads
+from nerblackbox.tests.utils import PseudoDefaultLogger
 from nerblackbox.modules.ner_training.annotation_tags.tags import Tags
 
 PREDICTIONS = List[List[Dict[str, Any]]]
+PREDICTION_ARRAYS = Dict[str, np.ndarray]
+OUTPUT_FORMATS = ["dicts", "arrays", "arrow"]
+BACKENDS = ["pytorch", "onnx"]
+WINDOW_FUSIONS = ["average", "central"]
 EVALUATION_DICT = Dict[str, Dict[str, Dict[str, Optional[float]]]]
 
 VERBOSE = False
@@ -40,15 +57,25 @@ class Model:
     """
 
     @classmethod
-    def from_experiment(cls, experiment_name: str) -> Optional["Model"]:
+    def from_experiment(
+        cls, experiment_name: str, **kwargs_model: Any
+    ) -> Optional["Model"]:
         r"""load best model from experiment.
 
         Args:
             experiment_name: name of the experiment, e.g. "exp0"
+            **kwargs_model: optional arguments for Model, e.g. batch_size=32
 
         Returns:
             model: best model from experiment
         """
+        # imported here, as mlflow & pytorch_lightning are not needed for inference
+        from nerblackbox.api.store import Store
+        from nerblackbox.modules.experiment_results import ExperimentResults
+        from nerblackbox.modules.ner_training.ner_model_train2model import (
+            NerModelTrain2Model,
+        )
+
         experiment_exists, experiment_results = Store.get_experiment_results_single(
             experiment_name
         )
@@ -84,14 +111,17 @@ class Model:
                 )
                 ner_model_train2model.export_to_ner_model_prod(checkpoint_path_train)
 
-            return Model(checkpoint_path_predict)
+            return Model(checkpoint_path_predict, **kwargs_model)
 
     @classmethod
-    def from_checkpoint(cls, checkpoint_directory: str) -> Optional["Model"]:
+    def from_checkpoint(
+        cls, checkpoint_directory: str, **kwargs_model: Any
+    ) -> Optional["Model"]:
         r"""
 
         Args:
             checkpoint_directory: path to the checkpoint directory
+            **kwargs_model: optional arguments for Model, e.g. batch_size=32
 
         Returns:
             model: best model from experiment
@@ -102,14 +132,15 @@ class Model:
             )
             return None
         else:
-            return Model(checkpoint_directory)
+            return Model(checkpoint_directory, **kwargs_model)
 
     @classmethod
-    def from_huggingface(cls, repo_id: str) -> Optional["Model"]:
+    def from_huggingface(cls, repo_id: str, **kwargs_model: Any) -> Optional["Model"]:
         r"""
 
         Args:
             repo_id: id of the huggingface hub repo id, e.g. 'KB/bert-base-swedish-cased-ner'
+            **kwargs_model: optional arguments for Model, e.g. batch_size=32
 
         Returns:
             model: model
@@ -141,7 +172,7 @@ class Model:
         cache_directory = cache_directories[0]
 
         # create Model from files in cache directory
-        return Model(cache_directory)
+        return Model(cache_directory, **kwargs_model)
 
     @classmethod
     def checkpoint_exists(cls, checkpoint_directory: str) -> bool:
@@ -152,15 +183,97 @@ class Model:
         checkpoint_directory: str,
         batch_size: int = 16,
         max_seq_length: Optional[int] = None,
+        dynamic_padding: bool = False,
+        num_workers: int = 0,
+        threads_per_worker: int = 1,
+        backend: str = "pytorch",
+        quantization: Optional[str] = None,
+        packing: bool = False,
+        stride: int = 0,
+        window_fusion: str = "average",
+        cache_size: int = 0,
+        cache_max_bytes: Optional[int] = None,
+        cache_directory: Optional[str] = None,
+        cache_max_disk_bytes: int = 1024**3,
+        profiling: bool = False,
+        mmap: bool = False,
+        num_threads: Optional[int] = None,
+        num_interop_threads: Optional[int] = None,
+        inference_mode: bool = False,
+        torch_compile: bool = False,
     ):
         r"""
         Args:
             checkpoint_directory: path to the checkpoint directory
-            batch_size: batch size used by dataloader
+            batch_size: batch size used for inference
             max_seq_length: maximum sequence length (Optional). Loaded from checkpoint if not specified.
+            dynamic_padding: if True, slices are sorted by length and each batch is only padded to its longest slice
+            num_workers: if > 0, input texts are sharded across num_workers worker processes (CPU only)
+            threads_per_worker: number of torch threads (and pinned cpus) used by each worker process
+            backend: "pytorch" or "onnx". if "onnx", the forward pass is run with onnxruntime on cpu.
+                     the model is exported to checkpoint_directory/model.onnx on first use
+                     (and again if the checkpoint is overwritten).
+            quantization: None or "dynamic_int8". if "dynamic_int8", the linear layers are quantized to int8 (cpu only).
+                          the quantized weights are cached in checkpoint_directory/model_dynamic_int8.pt on first use.
+            packing: if True, several short input texts are packed into one sequence (backend = pytorch only).
+                     a block-diagonal attention mask and restarted position ids keep the texts independent.
+            stride: number of overlapping tokens between consecutive slices of long input texts
+            window_fusion: "average" or "central". how the logits of overlapping tokens are fused (only if stride > 0)
+                           average: average the logits of both slices
+                           central: use the logits of the slice in which the token is more central
+            cache_size: if > 0, the predictions for up to cache_size input texts are cached in memory (LRU)
+            cache_max_bytes: maximum size (in bytes) of the cached predictions in memory (Optional)
+            cache_directory: directory of a persistent on-disk cache tier (Optional, requires cache_size > 0)
+            cache_max_disk_bytes: maximum size (in bytes) of the on-disk cache tier (LRU)
+            profiling: if True, the wall time per stage and the number of documents, slices and tokens are recorded
+                       in self.profiler.stats (and logged on the logger "nerblackbox.profiling" w/ level DEBUG)
+            mmap: if True, the weights are memory-mapped from checkpoint_directory/model_mmap.safetensors (cpu only),
+                  such that worker processes on the same host share them. see memory_usage()
+                  the safetensors file is converted from the checkpoint on first use (and if it is overwritten).
+            num_threads: number of intra-op threads of torch (and onnxruntime). if None, the default is used.
+                         note that this is set for the whole process.
+            num_interop_threads: number of inter-op threads of torch (and onnxruntime). if None, the default is used.
+                                 note that this is set for the whole process, and only once.
+            inference_mode: if True, the forward pass is run in torch.inference_mode() instead of torch.no_grad()
+            torch_compile: if True, the model is compiled with torch.compile() (backend = pytorch only).
+                           the first forward passes (for each new input shape) are slow due to compilation.
         """
-        # 0. device
-        self.device = torch.device("cuda:0" if torch.cuda.is_available() else "cpu")
+        assert (
+            backend in BACKENDS
+        ), f"ERROR! backend = {backend} unknown, needs to be in {BACKENDS}."
+        assert (
+            quantization is None or quantization in QUANTIZATIONS
+        ), f"ERROR! quantization = {quantization} unknown, needs to be None or in {QUANTIZATIONS}."
+        assert (
+            quantization is None or backend == "pytorch"
+        ), f"ERROR! quantization = {quantization} requires backend = pytorch."
+        assert not mmap or (
+            backend == "pytorch" and quantization is None
+        ), f"ERROR! mmap = {mmap} requires backend = pytorch and quantization = None."
+        assert (
+            not torch_compile or backend == "pytorch"
+        ), f"ERROR! torch_compile = {torch_compile} requires backend = pytorch."
+        assert (
+            not packing or backend == "pytorch"
+        ), f"ERROR! packing = {packing} requires backend = pytorch."
+        assert (
+            window_fusion in WINDOW_FUSIONS
+        ), f"ERROR! window_fusion = {window_fusion} unknown, needs to be in {WINDOW_FUSIONS}."
+        self.checkpoint_directory = checkpoint_directory
+        self.backend = backend
+        self.quantization = quantization
+        self.mmap = mmap
+        self.num_threads = num_threads
+        self.num_interop_threads = num_interop_threads
+        self.inference_mode = inference_mode
+        self.torch_compile = torch_compile
+
+        # 0. threads & device
+        set_num_threads(num_threads, num_interop_threads)
+        if self.backend == "onnx" or self.quantization is not None or self.mmap:
+            self.device = torch.device("cpu")
+        else:
+            self.device = torch.device("cuda:0" if torch.cuda.is_available() else "cpu")
 
         # 1: config (max_seq_length & annotation)
         path_config = join(checkpoint_directory, "config.json")
@@ -174,56 +287,198 @@ class Model:
         else:
             self.max_seq_length = config["max_position_embeddings"]
 
-        id2label = {int(_id): label for _id, label in config["id2label"].items()}
+        self.id2label = {int(_id): label for _id, label in config["id2label"].items()}
         label2id = {label: int(_id) for _id, label in config["id2label"].items()}
         self.annotation_classes = list(config["id2label"].values())
+        self.entity_classes = list(
+            dict.fromkeys(
+                ["O"]
+                + [
+                    annotation_class.split("-")[-1]
+                    for annotation_class in self.annotation_classes
+                    if annotation_class != "O"
+                ]
+            )
+        )
 
-        self.annotation_scheme = derive_annotation_scheme(id2label)
+        self.annotation_scheme = derive_annotation_scheme(self.id2label)
 
         # 3. model
-        self.model = AutoModelForTokenClassification.from_pretrained(
-            checkpoint_directory,
-            id2label=id2label,
-            label2id=label2id,
-            return_dict=False,
-        )
-        self.model.eval()
-        self.model = self.model.to(self.device)
+        self.model: Union[torch.nn.Module, OnnxRuntimeModel]
+        if self.backend == "onnx":
+            self.model = load_onnx_model(
+                checkpoint_directory,
+                num_threads=torch.get_num_threads(),
+                num_interop_threads=num_interop_threads,
+            )
+        elif self.quantization is not None:
+            self.model = load_quantized_model(
+                checkpoint_directory,
+                self.quantization,
+                id2label=self.id2label,
+                label2id=label2id,
+                return_dict=False,
+            )
+        elif self.mmap:
+            self.model = load_memory_mapped_model(
+                checkpoint_directory,
+                id2label=self.id2label,
+                label2id=label2id,
+                return_dict=False,
+            )
+        else:
+            model = AutoModelForTokenClassification.from_pretrained(
+                checkpoint_directory,
+                id2label=self.id2label,
+                label2id=label2id,
+                return_dict=False,
+            )
+            model.eval()
+            self.model = model.to(self.device)
+        self.position_offset = 0
+        if packing:
+            assert isinstance(self.model, torch.nn.Module)
+            assert (
+                "position_ids" in inspect.signature(self.model.forward).parameters
+            ), f"ERROR! packing = {packing} requires a model that accepts position_ids."
+            # the position ids of roberta-like models start after the padding index
+            embeddings = getattr(self.model.base_model, "embeddings", None)
+            self.position_offset = getattr(embeddings, "padding_idx", -1) + 1
+        if self.torch_compile:
+            # torch.compile() returns an OptimizedModule, i.e. a torch.nn.Module
+            self.model = cast(torch.nn.Module, torch.compile(self.model))
 
         # 4. tokenizer
         self.tokenizer = AutoTokenizer.from_pretrained(
             checkpoint_directory,
         )
 
-        # 5. batch_size (dataloader)
+        # 5. batching
         self.batch_size = batch_size
+        self.dynamic_padding = dynamic_padding
+        self.packing = packing
+        self.stride = stride
+        self.window_fusion = window_fusion
+
+        # 6. worker processes (started on first use)
+        self.num_workers = num_workers
+        self.threads_per_worker = threads_per_worker
+        self._pool: Optional[ModelPool] = None
 
-    def predict_on_file(self, input_file: str, output_file: str) -> None:
+        # 7. preprocessing pipeline (created once, reused by all predict calls)
+        self.data_preprocessor = DataPreprocessor(
+            tokenizer=self.tokenizer,
+            do_lower_case=self.tokenizer.do_lower_case,
+            max_seq_length=self.max_seq_length,
+            default_logger=PseudoDefaultLogger(),
+        )
+        self.input_examples_to_tensors = (
+            self.data_preprocessor.get_input_examples_to_tensors(
+                self.annotation_classes, stride=self.stride
+            )
+        )
+
+        # 8. profiling
+        self.profiler = Profiler(enabled=profiling)
+
+        # 9. prediction cache
+        self.cache: Optional[PredictionCache] = None
+        if cache_size > 0:
+            # all options that affect the predictions are part of the cache keys
+            namespace = json.dumps(
+                [
+                    abspath(checkpoint_directory),
+                    get_checkpoint_fingerprint(checkpoint_directory),
+                    self.max_seq_length,
+                    self.backend,
+                    self.quantization,
+                    self.packing,
+                    self.stride,
+                    self.window_fusion,
+                ]
+            )
+            self.cache = PredictionCache(
+                cache_size,
+                max_bytes=cache_max_bytes,
+                directory=cache_directory,
+                namespace=namespace,
+                max_disk_bytes=cache_max_disk_bytes,
+            )
+
+    def predict_on_file(
+        self,
+        input_file: str,
+        output_file: str,
+        batch_size: Optional[int] = None,
+        start_offset: int = 0,
+        progress_callback: Optional[Callable[[Dict[str, float]], None]] = None,
+    ) -> Dict[str, float]:
         r"""
         predict tags for all input texts in input file, write results to output file
 
+        the input file is read lazily and processed in batches, the results are written after each batch.
+        hence, memory consumption does not depend on the size of the input file.
+        an interrupted run can be resumed using start_offset = progress["offset"] of the last completed batch.
+
         Args:
             input_file: e.g. strangnas/test.jsonl
             output_file: e.g. strangnas/test_anonymized.jsonl
+            batch_size: number of input lines that are predicted together. defaults to self.batch_size
+            start_offset: byte offset in the input file to start (resume) from. if > 0, results are appended to output_file
+            progress_callback: function that is called with the progress after each batch
+
+        Returns:
+            progress: [dict] w/ keys =
+                      documents (number of processed documents),
+                      offset (byte offset in the input file after the last processed document),
+                      seconds (elapsed time),
+                      documents_per_second,
+                      bytes_per_second
         """
-        print(f"> read   input_file = {input_file}")
-        with open(input_file, "r") as f:
-            input_lines = [json.loads(line) for line in f]
-
-        output_lines = list()
-        for input_line in input_lines:
-            text = input_line["text"]
-            tags = self.predict(text)[0]
-            output_line = {
-                "text": text,
-                "tags": tags,
-            }
-            output_lines.append(output_line)
+        if batch_size is None:
+            batch_size = self.batch_size
+
+        progress: Dict[str, float] = {
+            "documents": 0,
+            "offset": start_offset,
+            "seconds": 0.0,
+            "documents_per_second": 0.0,
+            "bytes_per_second": 0.0,
+        }
+        time_start = time.perf_counter()
 
+        print(f"> read   input_file = {input_file} (start_offset = {start_offset})")
         print(f"> write output_file = {output_file}")
-        with open(output_file, "w") as f:
-            for line in output_lines:
-                f.write(json.dumps(line, ensure_ascii=False) + "\n")
+        with open(input_file, "rb") as f_in, open(
+            output_file, "a" if start_offset > 0 else "w"
+        ) as f_out:
+            f_in.seek(start_offset)
+            for input_texts, offset in read_jsonl_texts_in_batches(
+                f_in, batch_size, start_offset
+            ):
+                predictions = self.predict(input_texts)
+                for text, tags in zip(input_texts, predictions):
+                    output_line = {
+                        "text": text,
+                        "tags": tags,
+                    }
+                    f_out.write(json.dumps(output_line, ensure_ascii=False) + "\n")
+                f_out.flush()
+
+                seconds = time.perf_counter() - time_start
+                progress["documents"] += len(input_texts)
+                progress["offset"] = offset
+                progress["seconds"] = seconds
+                progress["documents_per_second"] = progress["documents"] / seconds
+                progress["bytes_per_second"] = (offset - start_offset) / seconds
+                if progress_callback is not None:
+                    progress_callback(progress)
+
+        print(
+            f"> processed {int(progress['documents'])} documents "
+            f"in {progress['seconds']:.1f}s ({progress['documents_per_second']:.1f} documents/s)"
+        )
+        return progress
 
     def predict(
         self,
@@ -231,7 +486,8 @@ class Model:
         level: str = "entity",
         autocorrect: bool = False,
         is_pretokenized: bool = False,
-    ) -> PREDICTIONS:
+        output_format: str = "dicts",
+    ) -> Union[PREDICTIONS, PREDICTION_ARRAYS, Any]:
         r"""predict tags for input texts. output on entity or word level.
 
         Examples:
@@ -266,16 +522,33 @@ class Model:
             #     {"char_start": "27", "char_end": "36", "token": "stockholm", "tag": "LOC"},
             # ]]
             ```
+            ```
+            predict(["arbetsförmedlingen finns i stockholm"], level="entity", autocorrect=True, output_format="arrays")
+            # {
+            #     "doc_index": array([0, 0]),
+            #     "char_start": array([0, 27]),
+            #     "char_end": array([18, 36]),
+            #     "tag_id": array([1, 2]),  # indices of model.entity_classes = ["O", "ORG", "LOC"]
+            # }
+            ```
 
         Args:
             input_texts:   e.g. ["example 1", "example 2"]
             level:         "entity" or "word"
             autocorrect:   if True, autocorrect annotation scheme (e.g. B- and I- tags).
             is_pretokenized: True if input_texts are pretokenized
+            output_format: "dicts", "arrays" or "arrow"
 
         Returns:
-            predictions: [list] of predictions for the different examples.
-                         each list contains a [list] of [dict] w/ keys = char_start, char_end, word, tag
+            predictions: output_format = "dicts":
+                           [list] of predictions for the different examples.
+                           each list contains a [list] of [dict] w/ keys = char_start, char_end, word, tag
+                         output_format = "arrays":
+                           [dict] of parallel [np array] w/ keys = doc_index, char_start, char_end, tag_id
+                           where tag_id refers to model.annotation_classes (level = "word")
+                           or model.entity_classes (level = "entity")
+                         output_format = "arrow":
+                           [pyarrow Table] w/ the same columns as for output_format = "arrays"
         """
         return self._predict(
             input_texts,
@@ -283,11 +556,15 @@ class Model:
             autocorrect,
             proba=False,
             is_pretokenized=is_pretokenized,
+            output_format=output_format,
         )
 
     def predict_proba(
-        self, input_texts: Union[str, List[str]], is_pretokenized: bool = False
-    ) -> PREDICTIONS:
+        self,
+        input_texts: Union[str, List[str]],
+        is_pretokenized: bool = False,
+        output_format: str = "dicts",
+    ) -> Union[PREDICTIONS, PREDICTION_ARRAYS, Any]:
         r"""predict probability distributions for input texts. output on word level.
 
         Examples:
@@ -304,11 +581,19 @@ class Model:
         Args:
             input_texts:   e.g. ["example 1", "example 2"]
             is_pretokenized: True if input_texts are pretokenized
+            output_format: "dicts", "arrays" or "arrow"
 
         Returns:
-            predictions: [list] of probability predictions for different examples.
-                         each list contains a [list] of [dict] w/ keys = char_start, char_end, word, proba_dist
-                         where proba_dist = [dict] that maps self.annotation.classes to probabilities
+            predictions: output_format = "dicts":
+                           [list] of probability predictions for different examples.
+                           each list contains a [list] of [dict] w/ keys = char_start, char_end, word, proba_dist
+                           where proba_dist = [dict] that maps self.annotation.classes to probabilities
+                         output_format = "arrays":
+                           [dict] of parallel [np array] w/ keys = doc_index, char_start, char_end, tag_id, score, proba
+                           where tag_id refers to the most likely class in model.annotation_classes,
+                           score is its probability and proba is a 2D array with all probabilities
+                         output_format = "arrow":
+                           [pyarrow Table] w/ the same columns as for output_format = "arrays"
         """
         return self._predict(
             input_texts,
@@ -316,6 +601,7 @@ class Model:
             autocorrect=False,
             proba=True,
             is_pretokenized=is_pretokenized,
+            output_format=output_format,
         )
 
     def _predict(
@@ -325,7 +611,8 @@ class Model:
         autocorrect: bool = False,
         proba: bool = False,
         is_pretokenized: bool = False,
-    ) -> PREDICTIONS:
+        output_format: str = "dicts",
+    ) -> Union[PREDICTIONS, PREDICTION_ARRAYS, Any]:
         r"""predict tags or probabilities for tags
 
         Args:
@@ -334,16 +621,21 @@ class Model:
             autocorrect:  if True, autocorrect annotation scheme (e.g. B- and I- tags).
             proba:        if True, predict probabilities instead of labels (on word level)
             is_pretokenized: True if input_texts are pretokenized
+            output_format: "dicts", "arrays" or "arrow"
 
         Returns:
             predictions: [list] of [list] of [dict] w/ keys = char_start, char_end, word, tag/proba_dist
                          where proba_dist = [dict] that maps self.annotation.classes to probabilities
+                         or, if output_format != "dicts", the same predictions as parallel arrays (see predict)
         """
         # --- check input arguments ---
         assert level in [
             "entity",
             "word",
         ], f"ERROR! model prediction level = {level} unknown, needs to be entity or word."
+        assert (
+            output_format in OUTPUT_FORMATS
+        ), f"ERROR! output_format = {output_format} unknown, needs to be in {OUTPUT_FORMATS}."
         if proba:
             assert level == "word" and autocorrect is False, (
                 f"ERROR! probability predictions require level = word and autocorrect = False. "
@@ -354,111 +646,475 @@ class Model:
         # 0. ensure input_texts is a list
         if isinstance(input_texts, str):
             input_texts = [input_texts]
+
+        kwargs_predict = {
+            "level": level,
+            "autocorrect": autocorrect,
+            "proba": proba,
+            "is_pretokenized": is_pretokenized,
+            "output_format": output_format,
+        }
+        with self.profiler.call():
+            if self.cache is None:
+                predictions = self._predict_uncached(input_texts, **kwargs_predict)
+            else:
+                predictions = self._predict_cached(input_texts, **kwargs_predict)
+
+            return self._format_output(predictions, output_format, proba)
+
+    def _predict_uncached(
+        self, input_texts: List[str], **kwargs_predict: Any
+    ) -> List[Any]:
+        r"""
+        Args:
+            input_texts: e.g. ["example 1", "example 2"]
+            kwargs_predict: see _predict_documents()
+
+        Returns:
+            predictions: [list] with one element for each input text, see _post_processing()
+        """
+        if self.num_workers > 0 and len(input_texts) > 1:
+            return self._get_pool().predict(
+                input_texts, profiler=self.profiler, **kwargs_predict
+            )
+        else:
+            return self._predict_documents(input_texts, **kwargs_predict)
+
+    def _predict_cached(
+        self, input_texts: List[str], **kwargs_predict: Any
+    ) -> List[Any]:
+        r"""
+        look up the input texts in the cache and predict (and cache) only the missing ones.
+        duplicate input texts are predicted only once.
+
+        Args:
+            input_texts: e.g. ["example 1", "example 2"]
+            kwargs_predict: see _predict_documents()
+
+        Returns:
+            predictions: [list] with one element for each input text, see _post_processing()
+        """
+        assert self.cache is not None
+        keys = [
+            self.cache.key(input_text, **kwargs_predict) for input_text in input_texts
+        ]
+        predictions = [self.cache.get(key) for key in keys]
+
+        missing: Dict[str, List[int]] = defaultdict(list)  # key -> indices
+        for i, (key, prediction) in enumerate(zip(keys, predictions)):
+            if prediction is None:
+                missing[key].append(i)
+
+        if len(missing):
+            predictions_missing = self._predict_uncached(
+                [input_texts[indices[0]] for indices in missing.values()],
+                **kwargs_predict,
+            )
+            for (key, indices), prediction in zip(missing.items(), predictions_missing):
+                self.cache.put(key, prediction)
+                for i in indices:
+                    predictions[i] = prediction
+        return predictions
+
+    def _predict_documents(
+        self,
+        input_texts: List[str],
+        level: str,
+        autocorrect: bool,
+        proba: bool,
+        is_pretokenized: bool,
+        output_format: str,
+    ) -> List[Any]:
+        r"""predict tags or probabilities for tags in the current process
+
+        Args:
+            input_texts:  e.g. ["example 1", "example 2"]
+            level:        "entity" or "word"
+            autocorrect:  if True, autocorrect annotation scheme (e.g. B- and I- tags).
+            proba:        if True, predict probabilities instead of labels (on word level)
+            is_pretokenized: True if input_texts are pretokenized
+            output_format: "dicts", "arrays" or "arrow"
+
+        Returns:
+            predictions: [list] with one element for each input text, see _post_processing()
+        """
         number_of_input_texts = len(input_texts)
+        if number_of_input_texts == 0:
+            return []
 
         # 1. pure model inference
-        self.data_preprocessor = DataPreprocessor(
-            tokenizer=self.tokenizer,
-            do_lower_case=self.tokenizer.do_lower_case,
-            max_seq_length=self.max_seq_length,
-            default_logger=PseudoDefaultLogger(),
-        )
-        (
-            input_examples,
-            input_texts_pretokenized,
-            pretokenization_offsets,
-        ) = self.data_preprocessor.get_input_examples_predict(
-            examples=input_texts,
-            is_pretokenized=is_pretokenized,
-        )
+        with self.profiler.stage("pretokenization"):
+            (
+                input_examples,
+                input_texts_pretokenized,
+                pretokenization_offsets,
+            ) = self.data_preprocessor.get_input_examples_predict(
+                examples=input_texts,
+                is_pretokenized=is_pretokenized,
+            )
 
-        dataloader_all, offsets_all = self.data_preprocessor.to_dataloader(
-            input_examples, self.annotation_classes, batch_size=self.batch_size
+        with self.profiler.stage("tensors"):
+            encodings, offsets = self.input_examples_to_tensors(
+                input_examples["predict"], predict=True
+            )
+        self.profiler.count(
+            documents=number_of_input_texts, slices=len(encodings["input_ids"])
         )
-        dataloader = dataloader_all["predict"]
-        offsets = offsets_all["predict"]
-
-        inputs_batches = list()
-        outputs_batches = list()
-
-        for sample in dataloader:
-            inputs_batches.append(sample["input_ids"])
-            sample.pop("labels")
-            sample = {k: v.to(self.device) for k, v in sample.items()}
-            with torch.no_grad():
-                outputs_batch = self.model(**sample)[
-                    0
-                ]  # shape = [batch_size, seq_length, num_labels]
-            outputs_batches.append(outputs_batch.detach().cpu())
 
-        inputs = torch.cat(inputs_batches)  # tensor of shape = [batch_size, seq_length]
-        outputs = torch.cat(
-            outputs_batches
-        )  # tensor of shape = [batch_size, seq_length, num_labels]
+        with self.profiler.stage("forward"):
+            outputs = self._forward(
+                encodings
+            )  # List[tensor of shape = [slice_length, num_labels]] with len = number_of_slices
 
         ################################################################################################################
         ################################################################################################################
-        tokens: List[List[str]] = [
-            self.tokenizer.convert_ids_to_tokens(input_ids)
-            for input_ids in inputs.tolist()
-        ]  # List[List[str]] with len = batch_size
-
-        predictions: List[List[Any]]
-        if proba:
-            predictions = turn_tensors_into_tag_probability_distributions(
-                annotation_classes=self.annotation_classes,
-                outputs=outputs,
-            )  # List[List[Dict[str, float]]] with len = batch_size
-        else:
-            predictions_ids = torch.argmax(
-                outputs, dim=2
-            )  # tensor of shape [batch_size, seq_length]
-            predictions = [
-                [
-                    self.model.config.id2label[prediction]
-                    for prediction in predictions_ids[i].numpy()
-                ]
-                for i in range(len(predictions_ids))
-            ]  # List[List[str]] with len = batch_size
-
-        # merge
-        tokens = [
-            merge_slices_for_single_document(tokens[offsets[i] : offsets[i + 1]])
-            for i in range(len(offsets) - 1)
-        ]  # List[List[str]] with len = number_of_input_texts
-        predictions = [
-            merge_slices_for_single_document(predictions[offsets[i] : offsets[i + 1]])
-            for i in range(len(offsets) - 1)
-        ]  # List[List[str]] or List[List[Dict[str, float]]] with len = number_of_input_texts
+        with self.profiler.stage("merge"):
+            word_ids, predictions = self._merge_outputs(
+                encodings, offsets, outputs, proba
+            )
 
-        assert len(tokens) == len(
+        assert len(word_ids) == len(
             predictions
-        ), f"ERROR! len(tokens) = {len(tokens)} should equal len(predictions) = {len(predictions)}"
+        ), f"ERROR! len(word_ids) = {len(word_ids)} should equal len(predictions) = {len(predictions)}"
         assert (
-            len(tokens) == number_of_input_texts
-        ), f"ERROR! len(tokens) = {len(tokens)} should equal len(input_texts) = {number_of_input_texts}"
+            len(word_ids) == number_of_input_texts
+        ), f"ERROR! len(word_ids) = {len(word_ids)} should equal len(input_texts) = {number_of_input_texts}"
         assert (
             len(predictions) == number_of_input_texts
         ), f"ERROR! len(predictions) = {len(predictions)} should equal len(input_texts) = {number_of_input_texts}"
 
         # 2. post processing
-        predictions = [
-            self._post_processing(
-                level,
-                autocorrect,
-                proba,
-                input_texts[i],
-                input_texts_pretokenized[i],
-                pretokenization_offsets[i]
-                if pretokenization_offsets is not None
-                else None,
-                tokens[i],
-                predictions[i],
+        with self.profiler.stage("post_processing"):
+            if proba or autocorrect:
+                document_predictions: List[Any] = [
+                    self._post_processing(
+                        level,
+                        autocorrect,
+                        proba,
+                        input_texts[i],
+                        input_texts_pretokenized[i],
+                        pretokenization_offsets[i]
+                        if pretokenization_offsets is not None
+                        else None,
+                        word_ids[i],
+                        predictions[i]
+                        if proba
+                        else [
+                            self.id2label[prediction] for prediction in predictions[i]
+                        ],
+                        output_format,
+                    )
+                    for i in range(number_of_input_texts)
+                ]
+            else:
+                document_predictions = self._post_processing_batch(
+                    level,
+                    input_texts,
+                    input_texts_pretokenized,
+                    pretokenization_offsets,
+                    word_ids,
+                    predictions,
+                    output_format,
+                )
+
+        return document_predictions
+
+    def _merge_outputs(
+        self,
+        encodings: Encodings,
+        offsets: List[int],
+        outputs: List[torch.Tensor],
+        proba: bool,
+    ) -> Tuple[List[List[int]], List[List[Any]]]:
+        r"""
+        merge the slices of each document and turn the logits into tag ids (or probabilities)
+
+        Args:
+            encodings: [Encodings] w/ key word_ids
+            offsets: [list] of slice indices where each document starts, e.g. [0, 2, 3]
+            outputs: [list] of [torch tensor] of shape [slice_length, num_labels], one for each slice
+            proba: if True, return probabilities instead of tag ids
+
+        Returns:
+            word_ids: [list] w/ one [list] of word ids for each document, e.g. [[-1, 0, 1, 1, -1], ..]
+            predictions: [list] w/ one [list] of tag ids (or probability arrays) for each document
+        """
+        # merge slices (that overlap if self.stride > 0) for each document
+        word_ids_slices = [
+            encodings["word_ids"][i][: len(outputs[i])] for i in range(len(outputs))
+        ]  # List[tensor of shape = [slice_length]] with len = number_of_slices
+        word_ids: List[List[int]] = [
+            merge_overlapping_slices_for_single_document(
+                word_ids_slices[offsets[i] : offsets[i + 1]], self.stride
+            ).tolist()
+            for i in range(len(offsets) - 1)
+        ]  # List[List[int]] with len = number_of_input_texts
+        outputs = [
+            merge_overlapping_slices_for_single_document(
+                outputs[offsets[i] : offsets[i + 1]], self.stride, self.window_fusion
             )
-            for i in range(number_of_input_texts)
-        ]
+            for i in range(len(offsets) - 1)
+        ]  # List[tensor of shape = [document_length, num_labels]] with len = number_of_input_texts
 
-        return predictions
+        predictions: List[List[Any]]
+        if proba:
+            # one softmax for all tokens of all documents.
+            # probability dicts are created in _post_processing, only for tokens that are kept.
+            probabilities = turn_tensors_into_tag_probability_arrays(
+                torch.cat(outputs).unsqueeze(0)
+            )[0]
+            split_indices = np.cumsum([len(output) for output in outputs])[:-1]
+            predictions = [
+                list(probabilities_document)
+                for probabilities_document in np.split(probabilities, split_indices)
+            ]  # List[List[np.ndarray]] with len = number_of_input_texts
+        else:
+            predictions = [
+                torch.argmax(output, dim=1).tolist() for output in outputs
+            ]  # List[List[int]] with len = number_of_input_texts
+
+        return word_ids, predictions
+
+    def _get_pool(self) -> ModelPool:
+        r"""
+        start the worker processes on first use
+
+        Returns:
+            pool: [ModelPool] with self.num_workers worker processes
+        """
+        if self._pool is None:
+            self._pool = ModelPool(
+                self.checkpoint_directory,
+                num_workers=self.num_workers,
+                threads_per_worker=self.threads_per_worker,
+                batch_size=self.batch_size,
+                max_seq_length=self.max_seq_length,
+                dynamic_padding=self.dynamic_padding,
+                backend=self.backend,
+                quantization=self.quantization,
+                packing=self.packing,
+                stride=self.stride,
+                window_fusion=self.window_fusion,
+                profiling=self.profiler.enabled,
+                mmap=self.mmap,
+                inference_mode=self.inference_mode,
+                torch_compile=self.torch_compile,
+            )
+        return self._pool
+
+    def memory_usage(self) -> List[Dict[str, int]]:
+        r"""
+        resident memory of the current process and of the worker processes (if started), see get_memory_usage()
+
+        Returns:
+            memory_usage: [list] of [dict] w/ keys = pid, rss, pss, shared (in bytes), one for each process
+        """
+        pids = self._pool.pids() if self._pool is not None else list()
+        return [get_memory_usage()] + [get_memory_usage(pid) for pid in pids]
+
+    def close(self) -> None:
+        r"""
+        shut down the worker processes (only relevant if num_workers > 0)
+        """
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+
+    def _format_output(
+        self, predictions: List[Any], output_format: str, proba: bool
+    ) -> Union[PREDICTIONS, PREDICTION_ARRAYS, Any]:
+        r"""
+        Args:
+            predictions: [list] w/ one element for each document,
+                         [list] of [dict] if output_format = "dicts", else PREDICTION_ARRAYS
+            output_format: "dicts", "arrays" or "arrow"
+            proba: if True, predictions contain probabilities
+
+        Returns:
+            predictions: in output_format
+        """
+        if output_format == "dicts":
+            return predictions
+
+        prediction_arrays = concatenate_prediction_arrays(
+            predictions, number_of_labels=len(self.annotation_classes), proba=proba
+        )
+        if output_format == "arrays":
+            return prediction_arrays
+        else:
+            return convert_prediction_arrays_to_arrow(prediction_arrays)
+
+    def _forward(self, encodings: Encodings) -> List[torch.Tensor]:
+        r"""
+        forward pass in batches of size self.batch_size.
+        the encodings are sliced directly, i.e. no DataLoader is involved.
+        if all slices fit into a single batch (e.g. for a single short text), there is only one forward pass.
+
+        if self.dynamic_padding is True, the slices are sorted by length before batching,
+        and each batch is only padded to its longest slice.
+
+        if self.packing is True, several slices are packed into one sequence (see pack_model_inputs)
+        and the outputs are split back per slice. the slices of a sequence do not attend to each other.
+
+        Args:
+            encodings: [Encodings] w/ values = [2D torch tensor] of shape [number_of_slices, seq_length]
+
+        Returns:
+            outputs: [list] of [torch tensor] of shape [slice_length, num_labels], one for each slice (original order).
+                     slice_length = number of non-padding tokens in the slice
+        """
+        model_inputs = {
+            key: value
+            for key, value in encodings.items()
+            if key not in ["labels", "word_ids"] and len(value)
+        }
+        if self.packing:
+            packed_model_inputs, boundaries = pack_model_inputs(
+                model_inputs, self.max_seq_length, self.position_offset
+            )
+            packed_outputs = self._forward_batches(
+                packed_model_inputs, dynamic_padding=True, block_diagonal=True
+            )
+            return unpack_outputs(packed_outputs, boundaries)
+        else:
+            return self._forward_batches(model_inputs, self.dynamic_padding)
+
+    def _forward_batches(
+        self,
+        model_inputs: Encodings,
+        dynamic_padding: bool,
+        block_diagonal: bool = False,
+    ) -> List[torch.Tensor]:
+        r"""
+        Args:
+            model_inputs: [Encodings] w/ values = [2D torch tensor] of shape [number_of_sequences, seq_length]
+            dynamic_padding: if True, sort sequences by length and pad each batch only to its longest sequence
+            block_diagonal: if True, the tokens only attend to the tokens of the same packed slice
+                            (see get_block_diagonal_attention_mask)
+
+        Returns:
+            outputs: [list] of [torch tensor] of shape [sequence_length, num_labels], one for each sequence.
+                     sequence_length = number of non-padding tokens in the sequence
+        """
+        lengths = model_inputs["attention_mask"].sum(dim=1)
+        number_of_sequences = len(lengths)
+
+        if dynamic_padding:
+            order = torch.argsort(lengths, descending=True)
+        else:
+            order = torch.arange(number_of_sequences)
+
+        outputs: List[torch.Tensor] = [torch.empty(0)] * number_of_sequences
+        for start in range(0, number_of_sequences, self.batch_size):
+            batch_indices = order[start : start + self.batch_size]
+            if dynamic_padding:
+                batch_length = int(lengths[batch_indices].max())
+                batch = {
+                    key: value[batch_indices, :batch_length].to(self.device)
+                    for key, value in model_inputs.items()
+                }
+            else:
+                batch = {
+                    key: value[start : start + self.batch_size].to(self.device)
+                    for key, value in model_inputs.items()
+                }
+            if self.profiler.enabled:
+                batch_tokens = int(lengths[batch_indices].sum())
+                self.profiler.count(
+                    batches=1,
+                    tokens=batch_tokens,
+                    padding_tokens=batch["attention_mask"].numel() - batch_tokens,
+                )
+            if block_diagonal:
+                batch["attention_mask"] = get_block_diagonal_attention_mask(
+                    batch["attention_mask"], batch["position_ids"]
+                )
+            with torch.inference_mode() if self.inference_mode else torch.no_grad():
+                outputs_batch = self.model(**batch)[
+                    0
+                ]  # shape = [batch_size, batch_length, num_labels]
+            outputs_batch = outputs_batch.detach().cpu()
+            for j, index in enumerate(batch_indices.tolist()):
+                outputs[index] = outputs_batch[j, : lengths[index]]
+
+        return outputs
+
+    def _post_processing_batch(
+        self,
+        level: str,
+        input_texts: List[str],
+        input_texts_pretokenized: List[str],
+        pretokenization_offsets: Optional[List[List[Tuple[int, int]]]],
+        word_ids: List[List[int]],
+        tag_ids: List[List[int]],
+        output_format: str = "dicts",
+    ) -> Union[List[List[Dict[str, str]]], List[PREDICTION_ARRAYS]]:
+        r"""
+        same as _post_processing() for all documents at once (w/o autocorrect and proba), using TokenTagsArrays
+
+        Args:
+            level: "word" or "entity"
+            input_texts: e.g. ["we are in stockholm."]
+            input_texts_pretokenized: e.g. ["we are in stockholm ."]
+            pretokenization_offsets: e.g. [[(0,2), (3,6), (7,9), (10,19), (19,20)]]
+            word_ids: e.g. [[-1, 0, 1, 2, 3, 3, 4, -1]] (-1 for special tokens)
+            tag_ids: e.g. [[0, 0, 0, 0, 1, 2, 0, 0]]
+            output_format: "dicts", "arrays" or "arrow"
+
+        Returns:
+            predictions: [list] w/ one element for each document,
+                         [list] of [dict] if output_format = "dicts", else PREDICTION_ARRAYS
+        """
+        ######################################
+        # 1 tokens -> words (first token of each word)
+        ######################################
+        char_start, char_end, word_tag_ids, unpretokenized_offsets = (
+            list(),
+            list(),
+            list(),
+            list(),
+        )
+        for i in range(len(input_texts)):
+            _word_ids = np.array(word_ids[i], dtype=np.int64)
+            word_start_mask = _word_ids != -1
+            word_start_mask[1:] &= _word_ids[1:] != _word_ids[:-1]
+            _words = _word_ids[word_start_mask]
+
+            word_spans = np.array(
+                derive_word_spans(input_texts_pretokenized[i]), dtype=np.int64
+            ).reshape(-1, 2)[_words]
+            char_start.append(word_spans[:, 0])
+            char_end.append(word_spans[:, 1])
+            word_tag_ids.append(np.array(tag_ids[i], dtype=np.int64)[word_start_mask])
+            if pretokenization_offsets is not None:
+                unpretokenized_offsets.append(
+                    np.array(pretokenization_offsets[i], dtype=np.int64).reshape(-1, 2)[
+                        _words
+                    ]
+                )
+
+        token_tags = TokenTagsArrays(
+            char_start=np.concatenate(char_start),
+            char_end=np.concatenate(char_end),
+            tag_id=np.concatenate(word_tag_ids),
+            doc_offsets=np.cumsum([0] + [len(elem) for elem in word_tag_ids]),
+            classes=[self.id2label[i] for i in range(len(self.id2label))],
+            scheme=self.annotation_scheme,
+            texts=input_texts_pretokenized,
+        )
+        token_tags.merge_tokens_to_words()
+        if pretokenization_offsets is not None:
+            token_tags.unpretokenize(np.concatenate(unpretokenized_offsets))
+
+        if level == "entity":
+            token_tags.merge_tokens_to_entities(original_texts=input_texts)
+
+        if output_format == "dicts":
+            return token_tags.as_lists()
+        else:
+            return token_tags.as_arrays(
+                self.annotation_classes if level == "word" else self.entity_classes
+            )
 
     def _post_processing(
         self,
@@ -468,9 +1124,10 @@ class Model:
         input_text: str,
         input_text_pretokenized: str,
         pretokenization_offsets: Optional[List[Tuple[int, int]]],
-        tokens: List[str],
+        word_ids: List[int],
         predictions: List[Any],
-    ) -> List[List[Dict[str, str]]]:
+        output_format: str = "dicts",
+    ) -> Union[List[Dict[str, str]], PREDICTION_ARRAYS]:
         r"""
         Args:
             level: "word" or "entity"
@@ -479,22 +1136,48 @@ class Model:
             input_text: e.g. "we are in stockholm."
             input_text_pretokenized: e.g. "we are in stockholm ."
             pretokenization_offsets: e.g. [(0,2), (3,6), (7,9), (10,19), (19,20)]
-            tokens: e.g. ["we", "are", "in", "stockholm", "."]
-            predictions: e.g. ["O", "O", "O", "B-LOC", "O"]
+            word_ids: e.g. [-1, 0, 1, 2, 3, 3, 4, -1] (-1 for special tokens)
+            predictions: e.g. ["O", "O", "O", "O", "B-LOC", "I-LOC", "O", "O"]
+                         or [np array] of probabilities for each token if proba = True
+            output_format: "dicts", "arrays" or "arrow"
 
         Returns:
-            input_text_word_predictions: ???
+            input_text_word_predictions: [list] of [dict] if output_format = "dicts", else PREDICTION_ARRAYS
         """
         ######################################
         # 1 input_text, merged chunks, tokens -> words
         ######################################
-        _token_predictions: List[
-            Tuple[str, Union[str, Dict[str, float]]]
-        ] = merge_subtoken_to_token_predictions(tokens, predictions)
-
-        token_predictions: List[Dict[str, Union[str, Dict]]] = restore_unknown_tokens(
-            _token_predictions, input_text_pretokenized, verbose=VERBOSE
+        _word_predictions: List[Tuple[int, Any]] = merge_token_to_word_predictions(
+            word_ids, predictions
         )
+        if proba and output_format == "dicts":
+            _word_predictions = [
+                (word_id, dict(zip(self.annotation_classes, prediction.tolist())))
+                for word_id, prediction in _word_predictions
+            ]
+
+        word_spans = derive_word_spans(input_text_pretokenized)
+        token_predictions: List[Dict[str, Union[str, Dict]]] = [
+            {
+                "char_start": str(word_spans[word_id][0]),
+                "char_end": str(word_spans[word_id][1]),
+                "token": input_text_pretokenized[
+                    word_spans[word_id][0] : word_spans[word_id][1]
+                ],
+                "tag": prediction,
+            }
+            for word_id, prediction in _word_predictions
+        ]
+
+        probabilities: Optional[np.ndarray] = None
+        if proba and output_format != "dicts":
+            # keep probability arrays separately, replace them by the most likely tag
+            probabilities = np.array(
+                [elem["tag"] for elem in token_predictions], dtype=np.float32
+            ).reshape(-1, len(self.annotation_classes))
+            for elem, tag_id in zip(token_predictions, probabilities.argmax(axis=1)):
+                elem["tag"] = self.annotation_classes[tag_id]
+            probabilities = probabilities[derive_word_start_mask(token_predictions)]
 
         if autocorrect or level == "entity":
             assert (
@@ -507,7 +1190,9 @@ class Model:
         token_tags.merge_tokens_to_words()
         #######################################
         if pretokenization_offsets is not None:
-            token_tags.unpretokenize(pretokenization_offsets)
+            token_tags.unpretokenize(
+                [pretokenization_offsets[word_id] for word_id, _ in _word_predictions]
+            )
 
         if autocorrect:
             token_tags.restore_annotation_scheme_consistency()
@@ -519,7 +1204,14 @@ class Model:
 
         predictions = token_tags.as_list()
 
-        return predictions
+        if output_format == "dicts":
+            return predictions
+        else:
+            return convert_predictions_to_arrays(
+                predictions,
+                self.annotation_classes if level == "word" else self.entity_classes,
+                probabilities,
+            )
 
     def evaluate_on_dataset(
         self,
@@ -530,10 +1222,15 @@ class Model:
         number: Optional[int] = None,
         derived_from_jsonl: bool = False,
         rounded_decimals: Optional[int] = 3,
+        chunk_size: int = 1000,
+        progress_callback: Optional[Callable[[Dict[str, float]], None]] = None,
     ) -> EVALUATION_DICT:
         r"""
         evaluate model on dataset from huggingface or local dataset in jsonl or csv format
 
+        the dataset is read, predicted and evaluated in chunks of chunk_size documents.
+        hence, memory consumption does not depend on the size of the dataset.
+
         Args:
             dataset_name: e.g. 'conll2003'
             dataset_format: 'huggingface', 'jsonl', 'csv'
@@ -542,6 +1239,9 @@ class Model:
             number: e.g. 100
             derived_from_jsonl:
             rounded_decimals: if not None, results will be rounded to provided decimals
+            chunk_size: number of documents that are predicted and evaluated together
+            progress_callback: function that is called with the progress after each chunk,
+                               see _evaluate_on_csv()
 
         Returns:
             evaluation_dict:
@@ -550,6 +1250,8 @@ class Model:
                 level in ['entity', 'token']
                 metric in ['precision', 'recall', 'f1', 'precision_seqeval', 'recall_seqeval', 'f1_seqeval']
                 and values = float between 0 and 1
+                if the model is quantized, [label]['entity']['f1_delta'] additionally contains
+                the entity-level f1 difference between the quantized and the unquantized model
 
         """
         dataset_formats = ["infer", "jsonl", "csv", "huggingface"]
@@ -559,6 +1261,8 @@ class Model:
         ), f"ERROR! dataset_format={dataset_format} unknown (known={dataset_formats})"
         assert phase in phases, f"ERROR! phase = {phase} unknown (known={phases})"
 
+        from nerblackbox.api.store import Store
+
         store_path = Store.get_path()
         assert isinstance(
             store_path, str
@@ -580,19 +1284,68 @@ class Model:
         dir_path = join(store_path, "datasets", dataset_name)
         if dataset_format == "huggingface":
             evaluation_dict = self._evaluate_on_huggingface(
-                dataset_name, phase, class_mapping, number
+                dataset_name,
+                phase,
+                class_mapping,
+                number,
+                chunk_size=chunk_size,
+                progress_callback=progress_callback,
             )
         elif dataset_format == "jsonl":
             evaluation_dict = self._evaluate_on_jsonl(
-                dir_path, phase, class_mapping, number
+                dir_path,
+                phase,
+                class_mapping,
+                number,
+                chunk_size=chunk_size,
+                progress_callback=progress_callback,
             )
         elif dataset_format == "csv":
             evaluation_dict = self._evaluate_on_csv(
-                dir_path, phase, class_mapping, number, derived_from_jsonl
+                dir_path,
+                phase,
+                class_mapping,
+                number,
+                derived_from_jsonl,
+                chunk_size=chunk_size,
+                progress_callback=progress_callback,
             )
         else:
             raise Exception(f"ERROR! dataset_format = {dataset_format} unknown.")
 
+        if self.quantization is not None:
+            # same options as self (except quantization), such that f1_delta only reflects the quantization
+            model_unquantized = Model(
+                self.checkpoint_directory,
+                batch_size=self.batch_size,
+                max_seq_length=self.max_seq_length,
+                dynamic_padding=self.dynamic_padding,
+                packing=self.packing,
+                stride=self.stride,
+                window_fusion=self.window_fusion,
+            )
+            evaluation_dict_unquantized = model_unquantized.evaluate_on_dataset(
+                dataset_name,
+                dataset_format=dataset_format,
+                phase=phase,
+                class_mapping=class_mapping,
+                number=number,
+                derived_from_jsonl=derived_from_jsonl,
+                rounded_decimals=None,
+                chunk_size=chunk_size,
+            )
+            for label in evaluation_dict.keys():
+                f1 = evaluation_dict[label]["entity"]["f1"]
+                f1_unquantized = evaluation_dict_unquantized[label]["entity"]["f1"]
+                evaluation_dict[label]["entity"]["f1_delta"] = (
+                    f1 - f1_unquantized
+                    if f1 is not None and f1_unquantized is not None
+                    else None
+                )
+            print(
+                f"> entity f1 (micro) delta of quantized model = {evaluation_dict['micro']['entity']['f1_delta']}"
+            )
+
         if rounded_decimals is None:
             return evaluation_dict
         else:
@@ -604,6 +1357,8 @@ class Model:
         phase: str,
         class_mapping: Optional[Dict[str, str]] = None,
         number: Optional[int] = None,
+        chunk_size: int = 1000,
+        progress_callback: Optional[Callable[[Dict[str, float]], None]] = None,
     ) -> EVALUATION_DICT:
         r"""
         evaluate model on dataset from huggingface
@@ -613,6 +1368,8 @@ class Model:
             phase: e.g. 'test'
             class_mapping: e.g. {"PER": "PI", "ORG": "PI}
             number: e.g. 100
+            chunk_size: see evaluate_on_dataset()
+            progress_callback: see evaluate_on_dataset()
 
         Returns:
             evaluation_dict:
@@ -622,6 +1379,9 @@ class Model:
                 metric in ['precision', 'recall', 'f1', 'precision_seqeval', 'recall_seqeval', 'f1_seqeval']
                 and values = float between 0 and 1
         """
+        from nerblackbox.api.store import Store
+        from nerblackbox.api.dataset import Dataset
+
         dataset = Dataset(name=dataset_name, source="HF")
         dataset.set_up()
         dir_path = f"{Store.get_path()}/datasets/{dataset_name}"
@@ -631,6 +1391,8 @@ class Model:
             class_mapping=class_mapping,
             number=number,
             derived_from_jsonl=False,
+            chunk_size=chunk_size,
+            progress_callback=progress_callback,
         )
 
     def _evaluate_on_jsonl(
@@ -639,6 +1401,8 @@ class Model:
         phase: str,
         class_mapping: Optional[Dict[str, str]] = None,
         number: Optional[int] = None,
+        chunk_size: int = 1000,
+        progress_callback: Optional[Callable[[Dict[str, float]], None]] = None,
     ) -> EVALUATION_DICT:
         r"""
         evaluate model on local dataset in jsonl format
@@ -648,6 +1412,8 @@ class Model:
             phase: e.g. 'test'
             class_mapping: e.g. {"PER": "PI", "ORG": "PI"}
             number: e.g. 100
+            chunk_size: see evaluate_on_dataset()
+            progress_callback: see evaluate_on_dataset()
 
         Returns:
             evaluation_dict:
@@ -672,6 +1438,8 @@ class Model:
             class_mapping=class_mapping,
             number=number,
             derived_from_jsonl=True,
+            chunk_size=chunk_size,
+            progress_callback=progress_callback,
         )
 
     def _evaluate_on_csv(
@@ -681,16 +1449,23 @@ class Model:
         class_mapping: Optional[Dict[str, str]] = None,
         number: Optional[int] = None,
         derived_from_jsonl: bool = False,
+        chunk_size: int = 1000,
+        progress_callback: Optional[Callable[[Dict[str, float]], None]] = None,
     ) -> EVALUATION_DICT:
         r"""
         evaluate model on local dataset in csv format
 
+        the csv file is read lazily and processed in chunks. for each chunk, the true positives,
+        predicted and true counts per class are accumulated, and the metrics are computed at the end.
+
         Args:
             dir_path: e.g. './store/datasets/my_dataset'
             phase: e.g. 'test'
             class_mapping: e.g. {"PER": "PI", "ORG": "PI}
             number: e.g. 100
             derived_from_jsonl: should be True is csv was created from jsonl through pretokenization
+            chunk_size: number of documents that are predicted and evaluated together
+            progress_callback: function that is called with the progress after each chunk
 
         Returns:
             evaluation_dict:
@@ -700,6 +1475,8 @@ class Model:
                 metric in ['precision', 'recall', 'f1', 'precision_seqeval', 'recall_seqeval', 'f1_seqeval']
                 and values = float between 0 and 1
         """
+        assert chunk_size > 0, f"ERROR! chunk_size = {chunk_size} needs to be > 0."
+
         # derived_from_jsonl = True  => pretokenized_<phase>.csv is used
         # derived_from_jsonl = False => <phase>.csv is used
         file_path = join(
@@ -708,73 +1485,105 @@ class Model:
         )
         assert isfile(file_path), f"ERROR! could not find {file_path}"
 
+        from nerblackbox.modules.ner_training.data_preprocessing.tools.csv_reader import (
+            CsvReader,
+        )
+        from nerblackbox.modules.ner_training.metrics.streaming_ner_metrics import (
+            StreamingNerMetrics,
+        )
+
         csv_reader = CsvReader(
             dir_path,
             self.tokenizer,
             pretokenized=derived_from_jsonl is False,
             do_lower_case=self.tokenizer.do_lower_case,
             default_logger=None,
+            lazy=True,
         )
-        data = csv_reader.get_input_examples(phase)
-        ground_truth = [elem.tags.split() for elem in data]
-        input_texts = [elem.text for elem in data]
-        if number is not None:
-            ground_truth = ground_truth[:number]
-            input_texts = input_texts[:number]
 
+        if self.annotation_scheme == "plain":
+            print(
+                "> ATTENTION! predictions converted from plain to bio annotation scheme!"
+            )
+
+        streaming_ner_metrics = StreamingNerMetrics()
+        progress: Dict[str, float] = {
+            "documents": 0,
+            "seconds": 0.0,
+            "documents_per_second": 0.0,
+        }
+        time_start = time.perf_counter()
+        for data in csv_reader.get_input_examples_in_chunks(phase, chunk_size):
+            if number is not None:
+                data = data[: number - int(progress["documents"])]
+            ground_truth = [elem.tags.split() for elem in data]
+            input_texts = [elem.text for elem in data]
+            predictions = self._predict_tags(input_texts)
+
+            # check that ground truth and predictions have same lengths
+            assert len(ground_truth) == len(
+                predictions
+            ), f"ERROR! #ground_truth = {len(ground_truth)}, #predictions = {len(predictions)}"
+            for i in range(len(ground_truth)):
+                assert len(ground_truth[i]) == len(predictions[i]), (
+                    f"ERROR! #ground_truth[{i}] = {len(ground_truth[i])} ({ground_truth[i]}), "
+                    f"#predictions[{i}] = {len(predictions[i])} ({predictions[i]}),"
+                    f"input_texts[{i}] = {input_texts[i]}"
+                )
+
+            streaming_ner_metrics.update(
+                ground_truth, self._map_classes(predictions, class_mapping)
+            )
+
+            seconds = time.perf_counter() - time_start
+            progress["documents"] += len(input_texts)
+            progress["seconds"] = seconds
+            progress["documents_per_second"] = progress["documents"] / seconds
+            if progress_callback is not None:
+                progress_callback(progress)
+            if number is not None and progress["documents"] >= number:
+                break
+
+        return streaming_ner_metrics.results()
+
+    def _predict_tags(self, input_texts: List[str]) -> List[List[str]]:
+        r"""
+        Args:
+            input_texts: pretokenized, e.g. ["we are in stockholm", "example 2"]
+
+        Returns:
+            predictions: word-level tags in the bio scheme, e.g. [["O", "O", "O", "B-LOC"], ["O", "O"]]
+        """
         _predictions = self.predict(input_texts, level="word", is_pretokenized=True)
+        assert isinstance(
+            _predictions, list
+        ), f"ERROR! type(_predictions) = {type(_predictions)} should be list"
         predictions = [
             [elem["tag"] for elem in _prediction] for _prediction in _predictions
         ]
 
-        def convert_plain_to_bio(_predictions: List[str]) -> List[str]:
-            tags = Tags(_predictions)
-            return tags.convert_scheme("plain", "bio")
-
         if self.annotation_scheme == "plain":
-            print(
-                "> ATTENTION! predictions converted from plain to bio annotation scheme!"
-            )
             predictions = [
-                convert_plain_to_bio(prediction) for prediction in predictions
+                Tags(prediction).convert_scheme("plain", "bio")
+                for prediction in predictions
             ]
-
-        # check that ground truth and predictions have same lengths
-        assert len(ground_truth) == len(
-            predictions
-        ), f"ERROR! #ground_truth = {len(ground_truth)}, #predictions = {len(predictions)}"
-        for i in range(len(ground_truth)):
-            assert len(ground_truth[i]) == len(predictions[i]), (
-                f"ERROR! #ground_truth[{i}] = {len(ground_truth[i])} ({ground_truth[i]}), "
-                f"#predictions[{i}] = {len(predictions[i])} ({predictions[i]}),"
-                f"input_texts[{i}] = {input_texts[i]}"
-            )
-
-        return self._evaluate(ground_truth, predictions, class_mapping)
+        return predictions
 
     @staticmethod
-    def _evaluate(
-        ground_truth: List[List[str]],
-        predictions: List[List[str]],
-        class_mapping: Optional[Dict[str, str]] = None,
-    ) -> EVALUATION_DICT:
+    def _map_classes(
+        predictions: List[List[str]], class_mapping: Optional[Dict[str, str]] = None
+    ) -> List[List[str]]:
         r"""
-        evaluate by comparing ground_truth with predictions (after applying class_mapping)
-
         Args:
-            ground_truth: e.g. [["B-PER", "I-PER"], ["O", "B-ORG"]]
             predictions: e.g. [["B-PER", "O"], ["O", "B-ORG"]]
-            class_mapping: e.g. {"PER": "PI", "ORG": "PI}
+            class_mapping: e.g. {"PER": "PI"}
 
         Returns:
-            evaluation_dict:
-                Dict with keys [label][level][metric]
-                where label in ['micro', 'macro'],
-                level in ['entity', 'token']
-                metric in ['precision', 'recall', 'f1', 'precision_seqeval', 'recall_seqeval', 'f1_seqeval']
-                and values = float between 0 and 1
+            predictions_mapped: e.g. [["B-PI", "O"], ["O", "O"]]
         """
-        # class mapping
+        if class_mapping is None:
+            return predictions
+
         def map_class(_class: str) -> str:
             r"""
             maps class according to class_mapping
@@ -803,66 +1612,40 @@ class Model:
                     _class_new = "O"
                 return _class_new
 
-        if class_mapping is not None:
-            predictions = [
-                [map_class(elem) for elem in sublist] for sublist in predictions
-            ]
+        return [[map_class(elem) for elem in sublist] for sublist in predictions]
 
-        # flatten
-        true_flat = [elem for sublist in ground_truth for elem in sublist]
-        pred_flat = [elem for sublist in predictions for elem in sublist]
-        assert len(true_flat) == len(
-            pred_flat
-        ), f"ERROR! true_flat = {len(true_flat)}, #pred_flat = {len(pred_flat)}"
-
-        # 4. evaluate: compare ground truth with predictions
-        # NerMetrics
-        labels = ["micro", "macro"]
-        metrics = ["precision", "recall", "f1"]
-        metrics_seqeval = [f"{metric}_seqeval" for metric in metrics]
-        levels = ["entity", "token"]
-        evaluation: EVALUATION_DICT = {
-            label: {
-                level: {metric: None for metric in metrics + metrics_seqeval}
-                for level in levels
-            }
-            for label in labels
-        }
 
-        ner_metrics_entity = NerMetrics(
-            true_flat, pred_flat, level="entity", scheme="bio"
-        )
-        ner_metrics_entity.compute(metrics)
-        # print("== ENTITY (nerblackbox) ==")
-        for metric in metrics:
-            _metric = metric if metric == "acc" else f"{metric}_micro"
-            # print(f"> {metric}: {ner_metrics_entity.results_as_dict()[_metric]:.3f}")
-        # print()
-
-        for metric, label in product(metrics, labels):
-            evaluation[label]["entity"][metric] = ner_metrics_entity.results_as_dict()[
-                f"{metric}_{label}"
-            ]
-
-        # seqeval - just for testing - start
-        from seqeval.metrics import precision_score, recall_score, f1_score
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+def read_jsonl_texts_in_batches(
+    _file: BinaryIO, _batch_size: int, _offset: int = 0
+) -> Iterator[Tuple[List[str], int]]:
+    r"""
+    read jsonl file lazily and yield the texts in batches
 
-        scores = [precision_score, recall_score, f1_score]
-        # print("== ENTITY (seqeval) ==")
-        for metric_seqeval, score in zip(metrics_seqeval, scores):
-            result = score(
-                ground_truth,
-                predictions,
-            )
-            # print(f"> {metric_seqeval}: {result:.3f}")
-            evaluation["micro"]["entity"][f"{metric_seqeval}"] = result
+    Args:
+        _file: jsonl file opened in binary mode, e.g. with lines '{"text": "example 1"}'
+        _batch_size: e.g. 2
+        _offset: byte offset that corresponds to the current position in _file
 
-        return evaluation
+    Returns:
+        batches: iterator of tuples (texts, offset)
+                 texts: e.g. ["example 1", "example 2"]
+                 offset: byte offset after the last line that belongs to the batch
+    """
+    texts: List[str] = list()
+    for line in _file:
+        _offset += len(line)
+        if line.strip():
+            texts.append(json.loads(line)["text"])
+            if len(texts) == _batch_size:
+                yield texts, _offset
+                texts = list()
+    if len(texts):
+        yield texts, _offset
 
 
-########################################################################################################################
-########################################################################################################################
-########################################################################################################################
 def round_evaluation_dict(
     _evaluation_dict: EVALUATION_DICT, _rounded_decimals: int
 ) -> EVALUATION_DICT:
@@ -944,239 +1727,217 @@ def derive_annotation_scheme(_id2label: Dict[int, str]) -> str:
         )
 
 
-def turn_tensors_into_tag_probability_distributions(
-    annotation_classes: List[str], outputs: torch.Tensor
-) -> List[List[Dict[str, float]]]:
+def turn_tensors_into_tag_probability_arrays(outputs: torch.Tensor) -> np.ndarray:
     """
     Args:
-        annotation_classes: e.g. ["O", "B-PER", "I-PER"]
         outputs: [torch tensor]  of shape = [batch_size, seq_length, num_labels]
 
     Returns:
-        predictions_proba: [list] of [list] of [prob dist], i.e. dict that maps tags to probabilities
+        probabilities: [np array] of shape = [batch_size, seq_length, num_labels]
     """
-    probability_distributions = softmax(outputs, dim=2)
-    predictions_proba = [
-        [
-            {
-                annotation_classes[j]: float(
-                    probability_distributions[x][i][j].detach().numpy()
-                )
-                for j in range(len(annotation_classes))
-            }
-            for i in range(outputs.shape[1])  # seq_length
-        ]
-        for x in range(outputs.shape[0])  # number_of_input_texts
-    ]
+    return softmax(outputs, dim=2).detach().cpu().numpy()
 
-    return predictions_proba
 
+def merge_token_to_word_predictions(
+    word_ids: List[int],
+    predictions: List[Any],
+) -> List[Tuple[int, Any]]:
+    """
+    uses the prediction of the first token of each word
+
+    Args:
+        word_ids: e.g. [-1, 0, 0, 1, 2, 3, -1, -1] (-1 for special tokens)
+        predictions:  e.g. ["[S]", "ORG", "ORG", "O", "O", "O", "[S]", "[S]"]
 
-def merge_slices_for_single_document(_list: List[List[Any]]) -> List[Any]:
+    Returns:
+        word_predictions: e.g. [(0, "ORG"), (1, "O"), (2, "O"), (3, "O")]
     """
-    merges the slices for a single document
+    word_predictions = list()
+    previous_word_id = -1
+    for word_id, prediction in zip(word_ids, predictions):
+        if word_id != -1 and word_id != previous_word_id:
+            word_predictions.append((word_id, prediction))
+        previous_word_id = word_id
+    return word_predictions
+
 
-    input is
-    - either List[List[str]], for tokens & predictions
-    - or     List[List[Dict[str, float]]], for predictions with proba = True
+def derive_word_spans(input_text: str) -> List[Tuple[int, int]]:
+    """
+    derive the character spans of the whitespace-separated words,
+    i.e. the words that are fed to the tokenizer
 
     Args:
-        _list: predictions for one or more slices that belong to same document,
-               e.g. one slice:  [["[CLS]", "this", "is", "one", "slice", "[SEP]"]],
-               e.g. two slices: [
-                                    ["[CLS]", "this", "is", "one", "slice", "[SEP]"],
-                                    ["[CLS]", "and", "a", "second", "one", "[SEP]"]
-                                ],
+        input_text: e.g. "arbetsförmedlingen finns i stockholm"
 
     Returns:
-        _list_flat: predictions for one document
-               e.g. one slice:  ["[CLS]", "this", "is", "one", "slice", "[SEP]"],
-               e.g. two slices: ["[CLS]", "this", "is", "one", "slice", "and", "a", "second", "one", "[SEP]"],
+        word_spans: e.g. [(0, 18), (19, 24), (25, 26), (27, 36)]
     """
-    if len(_list) == 1:  # one slice
-        return _list[0]
-    else:  # more slices
-        _list_flat = list()
-        for i, sublist in enumerate(_list):
-            if i == 0:
-                _list_flat.extend(sublist[:-1])
-            elif 0 < i < len(_list) - 1:
-                _list_flat.extend(sublist[1:-1])
-            else:
-                _list_flat.extend(sublist[1:])
-        return _list_flat
+    return [match.span() for match in re.finditer(r"\S+", input_text)]
 
 
-def merge_subtoken_to_token_predictions(
-    tokens: List[str],
-    predictions: List[Any],
-) -> List[Tuple[str, Any]]:
+def merge_overlapping_slices_for_single_document(
+    _slices: List[torch.Tensor], stride: int = 0, fusion: Optional[str] = None
+) -> torch.Tensor:
     """
+    merges the slices for a single document, where consecutive slices overlap by stride tokens.
+    for stride = 0, the first & last token of each slice (except at the document boundaries) are dropped
+
     Args:
-        tokens: e.g. ["[CLS]", "arbetsförmedl", "##ingen", "finns", "i", "stockholm", "[SEP]", "[PAD]"]
-        predictions:  e.g. ["[S]", "ORG", "ORG", "O", "O", "O", "[S]", "[S]"]
+        _slices: [list] of [torch tensor] of shape [slice_length] or [slice_length, num_labels],
+                 each including the special tokens at its start & end,
+                 e.g. two slices (shown as tokens) with stride = 1:
+                 [
+                     ["[CLS]", "this", "is", "one", "[SEP]"],
+                     ["[CLS]", "one", "and", "two", "[SEP]"],
+                 ]
+        stride: number of overlapping tokens, e.g. 1
+        fusion: how the overlapping tokens are fused
+                None:      use the first slice (e.g. for word_ids, which are identical)
+                "average": average of both slices
+                "central": use the slice in which the token is further away from the slice's edges
 
     Returns:
-        token_predictions: e.g. [("arbetsförmedlingen", "ORG"), ("finns", "O"), ("i", "O"), ("stockholm", "O")]
+        _merged: [torch tensor] of shape [document_length] or [document_length, num_labels]
+                 e.g. ["[CLS]", "this", "is", "one", "and", "two", "[SEP]"]
     """
-    # predict tags on words between [CLS] and [SEP]
-    token_predictions_list = list()
-    for token, example_token_prediction in zip(tokens, predictions):
-        if token not in ["[CLS]", "[SEP]", "[PAD]"]:
-            if not token.startswith("##"):
-                token_predictions_list.append([token, example_token_prediction])
+    _merged = _slices[0]
+    for i in range(1, len(_slices)):
+        _previous_length = len(_slices[i - 1])
+        _current = _slices[i]
+        _merged = _merged[:-1]  # remove last special token of previous slice
+        if stride > 0:
+            _overlap_previous = _merged[-stride:]
+            _overlap_current = _current[1 : 1 + stride]
+            if fusion == "average":
+                _overlap = (_overlap_previous + _overlap_current) / 2
+            elif fusion == "central":
+                # distance of overlapping tokens to the edges of the previous and the current slice
+                j = torch.arange(stride)
+                _distance_previous = torch.minimum(
+                    _previous_length - 1 - stride + j, stride - j
+                )
+                _distance_current = torch.minimum(1 + j, len(_current) - 2 - j)
+                _use_current = _distance_current > _distance_previous
+                if _overlap_current.dim() > 1:
+                    _use_current = _use_current.unsqueeze(1)
+                _overlap = torch.where(
+                    _use_current, _overlap_current, _overlap_previous
+                )
             else:
-                token_predictions_list[-1][0] += token.strip("##")
+                _overlap = _overlap_previous
+            _merged = torch.cat([_merged[:-stride], _overlap, _current[1 + stride :]])
+        else:
+            _merged = torch.cat([_merged, _current[1:]])
+    return _merged
 
-    token_predictions = [(elem[0], elem[1]) for elem in token_predictions_list]
 
-    return token_predictions
+def pack_model_inputs(
+    model_inputs: Encodings, max_length: int, position_offset: int = 0
+) -> Tuple[Encodings, List[List[Tuple[int, int, int]]]]:
+    """
+    packs consecutive slices (incl. their special tokens) into sequences of at most max_length tokens:
+
+    [CLS] a1 a2 [SEP] + [CLS] b1 [SEP] -> [CLS] a1 a2 [SEP] [CLS] b1 [SEP]
 
+    the position ids restart for each slice, and get_block_diagonal_attention_mask() derives an attention mask
+    from them that prevents the slices of a sequence from attending to each other.
+    hence, the outputs of a slice do not depend on the other slices it is packed with.
 
-def restore_unknown_tokens(
-    word_predictions: List[Tuple[str, Union[str, Dict[str, float]]]],
-    input_text: str,
-    verbose: bool = False,
-) -> List[Dict[str, Union[str, Dict]]]:
+    Args:
+        model_inputs: [Encodings] w/ values = [2D torch tensor] of shape [number_of_slices, seq_length]
+        max_length: e.g. 128
+        position_offset: position id of the first token of each slice, e.g. 0 (bert) or padding_idx + 1 (roberta)
+
+    Returns:
+        packed_model_inputs: [Encodings] w/ values = [2D torch tensor] of shape [number_of_sequences, packed_length],
+                             incl. position_ids
+        boundaries: [list] with one element for each packed sequence,
+                    [list] of (slice_index, start, slice_length) for each slice in the sequence,
+                    where start is the position of the slice's first token in the packed sequence,
+                    e.g. [[(0, 0, 4), (1, 4, 3)]]
     """
-    - replace "[UNK]" tokens by the original token
-    - enrich tokens with char_start & char_end
+    lengths = model_inputs["attention_mask"].sum(dim=1).tolist()
+
+    # 1. assign slices to sequences (in the original order)
+    boundaries: List[List[Tuple[int, int, int]]] = list()
+    sequence: List[Tuple[int, int, int]] = list()
+    sequence_length = 0
+    for index, length in enumerate(lengths):
+        if len(sequence) and sequence_length + length > max_length:
+            boundaries.append(sequence)
+            sequence, sequence_length = list(), 0
+        sequence.append((index, sequence_length, length))
+        sequence_length += length
+    if len(sequence):
+        boundaries.append(sequence)
+
+    # 2. create packed sequences (padding is masked by attention_mask = 0)
+    packed_length = max(
+        [start + length for sequence in boundaries for _, start, length in sequence]
+        + [1]
+    )
+    packed_model_inputs = {
+        key: torch.zeros((len(boundaries), packed_length), dtype=value.dtype)
+        for key, value in model_inputs.items()
+    }
+    packed_model_inputs["position_ids"] = torch.zeros(
+        (len(boundaries), packed_length), dtype=torch.long
+    )
+    for i, sequence in enumerate(boundaries):
+        for index, start, length in sequence:
+            for key, value in model_inputs.items():
+                packed_model_inputs[key][i, start : start + length] = value[
+                    index, :length
+                ]
+            packed_model_inputs["position_ids"][
+                i, start : start + length
+            ] = torch.arange(position_offset, position_offset + length)
+
+    return packed_model_inputs, boundaries
+
+
+def get_block_diagonal_attention_mask(
+    attention_mask: torch.Tensor, position_ids: torch.Tensor
+) -> torch.Tensor:
+    """
+    derives the attention mask of packed sequences, in which each token only attends to the tokens of its own slice.
+    a new slice starts wherever the position ids do not increase (see pack_model_inputs).
 
     Args:
-        word_predictions: e.g. [('example', 'O'), ('of', 'O), ('author', 'PERSON'), ..]
-        input_text: e.g. 'example of author'
-        verbose: e.g. False
+        attention_mask: [2D torch tensor] of shape [batch_size, packed_length], e.g. [[1, 1, 1, 1, 0]]
+        position_ids: [2D torch tensor] of shape [batch_size, packed_length], e.g. [[0, 1, 0, 1, 0]]
 
     Returns:
-        word_predictions_restored: e.g. [
-            {"char_start": "0", "char_end": "7", "token": "example", "tag": "O"},
-            ..
-        ]
+        block_diagonal_attention_mask: [3D torch tensor] of shape [batch_size, packed_length, packed_length],
+                                       e.g. [[[1, 1, 0, 0, 0], [1, 1, 0, 0, 0], [0, 0, 1, 1, 0], ...]]
     """
-    word_predictions_restored = list()
-
-    # 1. get margins of known tokens
-    token_char_margins: List[Tuple[Any, ...]] = list()
-    char_start = 0
-    unknown_counter = 0
-    for token, _ in word_predictions:
-        if token == "[UNK]":
-            token_char_margins.append((None, None))
-            unknown_counter += 1
-        else:
-            # move char_start to where punctuation or whitespace is found
-            while unknown_counter > 0:
-                try:
-                    if token in string.punctuation or len(token) != 1:
-                        char_start = input_text.index(token, char_start)
-                    else:  # i.e. len(token) == 1
-                        char_start = input_text.index(f" {token}", char_start)
-                except ValueError:  # .index() did not find anything
-                    if verbose:
-                        print(
-                            f"! token = {token} not found in example[{char_start}:] (unknown)"
-                        )
-                unknown_counter -= 1
-
-            # find token_char_margins for token
-            try:
-                char_start = input_text.index(token, char_start)
-                token_char_margins.append((char_start, char_start + len(token)))
-            except ValueError:
-                if verbose:
-                    print(f"! token = {token} not found in example[{char_start}:]")
-                token_char_margins.append((None, None))
-            char_start += len(token)
-            unknown_counter = 0
-
-    # 2. restore unknown tokens
-    for i, (token, tag) in enumerate(word_predictions):
-        if (
-            token_char_margins[i][0] is not None
-            and token_char_margins[i][1] is not None
-        ):
-            word_predictions_restored.append(
-                {
-                    "char_start": str(token_char_margins[i][0]),
-                    "char_end": str(token_char_margins[i][1]),
-                    "token": token,
-                    "tag": tag,
-                }
-            )
-        else:
-            for j in range(2):
-                assert (
-                    token_char_margins[i][j] is None
-                ), f"ERROR! token_char_margin[{i}][{j}] is not None for token = {token}"
-
-            char_start_margin, char_end_margin = None, None
-            k_prev, k_next = None, None
-            for k in range(1, 10):
-                k_prev = k
-                if i - k < 0:
-                    char_start_margin = 0
-                    break
-                elif token_char_margins[i - k][1] is not None:
-                    char_start_margin = token_char_margins[i - k][1]
-                    break
-            for k in range(1, 10):
-                k_next = k
-                if i + k >= len(token_char_margins):
-                    char_end_margin = len(input_text)
-                    break
-                elif token_char_margins[i + k][0] is not None:
-                    char_end_margin = token_char_margins[i + k][0]
-                    break
-            assert (
-                char_start_margin is not None
-            ), f"ERROR! could not find char_start_margin"
-            assert char_end_margin is not None, (
-                f"ERROR! could not find char_end_margin. token = {token}\n"
-                f"char_start_margin = {char_start_margin}\n"
-                f"word_predictions = {word_predictions}\n"
-                f"input_text = {input_text}\n"
-                f"token_char_margins = {token_char_margins}\n"
-                f"word_predictions_restored = {word_predictions_restored}"
-            )
-            assert (
-                k_prev is not None and k_next is not None
-            ), f"ERROR! could not find k_prev or k_next"
-
-            new_token = input_text[char_start_margin:char_end_margin].strip()
-            if k_prev != 1 or k_next != 1:
-                new_token_parts = new_token.split()
-                assert len(new_token_parts) == 1 + np.absolute(k_prev - k_next), (
-                    f"ERROR! new_token = {new_token} consists of {len(new_token_parts)} parts, "
-                    f"expected {1+np.absolute(k_prev-k_next)} (k_prev = {k_prev}, k_next = {k_next})"
-                )
-                new_token = new_token_parts[k_prev - 1]
-
-            if len(new_token):
-                char_start = input_text.index(new_token, char_start_margin)
-                char_end = char_start + len(new_token)
-                if verbose:
-                    print(
-                        f"! restored unknown token = {new_token} between "
-                        f"char_start = {char_start}, "
-                        f"char_end = {char_end}"
-                    )
-                word_predictions_restored.append(
-                    {
-                        "char_start": str(char_start),
-                        "char_end": str(char_end),
-                        "token": new_token,
-                        "tag": tag,
-                    }
-                )
-            else:
-                if verbose:
-                    print(
-                        f"! dropped unknown empty token between "
-                        f"char_start = {char_start_margin}, "
-                        f"char_end = {char_end_margin}"
-                    )
+    slice_starts = torch.ones_like(position_ids, dtype=torch.bool)
+    slice_starts[:, 1:] = position_ids[:, 1:] <= position_ids[:, :-1]
+    slice_ids = slice_starts.cumsum(dim=1)
+    same_slice = slice_ids[:, :, None] == slice_ids[:, None, :]
+    return (same_slice & attention_mask[:, None, :].bool()).to(attention_mask.dtype)
 
-    return word_predictions_restored
+
+def unpack_outputs(
+    packed_outputs: List[torch.Tensor],
+    boundaries: List[List[Tuple[int, int, int]]],
+) -> List[torch.Tensor]:
+    """
+    splits the outputs of packed sequences back into outputs for the original slices.
+
+    Args:
+        packed_outputs: [list] of [torch tensor] of shape [packed_length, num_labels], one for each packed sequence
+        boundaries: see pack_model_inputs(), e.g. [[(0, 0, 4), (1, 4, 3)]]
+
+    Returns:
+        outputs: [list] of [torch tensor] of shape [slice_length, num_labels], one for each slice (original order).
+    """
+    number_of_slices = sum([len(sequence) for sequence in boundaries])
+    outputs: List[torch.Tensor] = [torch.empty(0)] * number_of_slices
+    for packed_output, sequence in zip(packed_outputs, boundaries):
+        for index, start, length in sequence:
+            outputs[index] = packed_output[start : start + length]
+    return outputs
 
 
 def assert_typing(
@@ -1201,3 +1962,143 @@ def assert_typing(
         {k: str(v) for k, v in input_text_word_prediction.items()}
         for input_text_word_prediction in input_text_word_predictions
     ]
+
+
+def derive_word_start_mask(token_predictions: List[Dict[str, Any]]) -> np.ndarray:
+    """
+    derive which tokens are kept by TokenTags.merge_tokens_to_words(),
+    i.e. tokens that do not directly follow the previous token
+
+    Args:
+        token_predictions: e.g. [
+            {"char_start": "0", "char_end": "4", "token": "2020", "tag": "B-TAG"},
+            {"char_start": "4", "char_end": "5", "token": "-", "tag": "I-TAG"},
+            {"char_start": "6", "char_end": "8", "token": "04", "tag": "I-TAG"},
+        ]
+
+    Returns:
+        word_start_mask: e.g. np.array([True, False, True])
+    """
+    return np.array(
+        [
+            i == 0
+            or token_predictions[i]["char_start"]
+            != token_predictions[i - 1]["char_end"]
+            for i in range(len(token_predictions))
+        ],
+        dtype=bool,
+    )
+
+
+def convert_predictions_to_arrays(
+    predictions: List[Dict[str, Any]],
+    classes: List[str],
+    probabilities: Optional[np.ndarray] = None,
+) -> PREDICTION_ARRAYS:
+    """
+    Args:
+        predictions: predictions for a single document, e.g. [
+            {"char_start": "0", "char_end": "18", "token": "arbetsförmedlingen", "tag": "ORG"},
+            {"char_start": "27", "char_end": "36", "token": "stockholm", "tag": "LOC"},
+        ]
+        classes: e.g. ["O", "ORG", "LOC"]
+        probabilities: [np array] of shape [len(predictions), number_of_labels], optional
+
+    Returns:
+        prediction_arrays: e.g. {
+            "char_start": np.array([0, 27]),
+            "char_end": np.array([18, 36]),
+            "tag_id": np.array([1, 2]),
+        }
+        plus "score" & "proba" if probabilities are provided
+    """
+    tag2id = {tag: i for i, tag in enumerate(classes)}
+    prediction_arrays = {
+        "char_start": np.array(
+            [int(elem["char_start"]) for elem in predictions], dtype=np.int64
+        ),
+        "char_end": np.array(
+            [int(elem["char_end"]) for elem in predictions], dtype=np.int64
+        ),
+        "tag_id": np.array(
+            [tag2id[elem["tag"]] for elem in predictions], dtype=np.int64
+        ),
+    }
+    if probabilities is not None:
+        assert len(probabilities) == len(
+            predictions
+        ), f"ERROR! #probabilities = {len(probabilities)} != #predictions = {len(predictions)}"
+        prediction_arrays["score"] = probabilities.max(axis=1, initial=0.0)
+        prediction_arrays["proba"] = probabilities
+    return prediction_arrays
+
+
+def concatenate_prediction_arrays(
+    prediction_arrays_documents: List[PREDICTION_ARRAYS],
+    number_of_labels: int,
+    proba: bool = False,
+) -> PREDICTION_ARRAYS:
+    """
+    Args:
+        prediction_arrays_documents: [list] of PREDICTION_ARRAYS for single documents, e.g. [
+            {"char_start": np.array([0, 27]), "char_end": np.array([18, 36]), "tag_id": np.array([1, 2])},
+            {"char_start": np.array([5]), "char_end": np.array([9]), "tag_id": np.array([1])},
+        ]
+        number_of_labels: e.g. 3
+        proba: if True, prediction arrays also contain score & proba
+
+    Returns:
+        prediction_arrays: e.g. {
+            "doc_index": np.array([0, 0, 1]),
+            "char_start": np.array([0, 27, 5]),
+            "char_end": np.array([18, 36, 9]),
+            "tag_id": np.array([1, 2, 1]),
+        }
+    """
+    empty_arrays = {
+        "char_start": np.zeros(0, dtype=np.int64),
+        "char_end": np.zeros(0, dtype=np.int64),
+        "tag_id": np.zeros(0, dtype=np.int64),
+    }
+    if proba:
+        empty_arrays["score"] = np.zeros(0, dtype=np.float32)
+        empty_arrays["proba"] = np.zeros((0, number_of_labels), dtype=np.float32)
+
+    prediction_arrays = {
+        "doc_index": np.repeat(
+            np.arange(len(prediction_arrays_documents), dtype=np.int64),
+            [len(elem["tag_id"]) for elem in prediction_arrays_documents],
+        )
+    }
+    for key, empty_array in empty_arrays.items():
+        prediction_arrays[key] = np.concatenate(
+            [empty_array] + [elem[key] for elem in prediction_arrays_documents]
+        )
+    return prediction_arrays
+
+
+def convert_prediction_arrays_to_arrow(prediction_arrays: PREDICTION_ARRAYS) -> Any:
+    """
+    Args:
+        prediction_arrays: e.g. {
+            "doc_index": np.array([0, 0, 1]),
+            "char_start": np.array([0, 27, 5]),
+            "char_end": np.array([18, 36, 9]),
+            "tag_id": np.array([1, 2, 1]),
+        }
+
+    Returns:
+        table: [pyarrow Table] with the same columns.
+               2D arrays (proba) are stored as fixed size lists.
+    """
+    import pyarrow as pa
+
+    columns = dict()
+    for key, array in prediction_arrays.items():
+        if array.ndim == 2:
+            columns[key] = pa.FixedSizeListArray.from_arrays(
+                pa.array(array.ravel()), array.shape[1]
+            )
+        else:
+            columns[key] = pa.array(array)
+    return pa.table(columns)
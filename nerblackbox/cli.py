@@ -3,7 +3,6 @@
 import subprocess
 from os.path import join
 import click
-from nerblackbox.api.store import Store
 from nerblackbox.modules.utils.env_variable import env_variable
 
 
@@ -26,7 +25,10 @@ def nerblackbox(ctx, **kwargs_optional):
 
     # environ
     data_dir = kwargs.pop("store_dir")
-    if len(data_dir):
+    if len(data_dir) and ctx.invoked_subcommand != "serve":
+        # serve does not use the store, so the training dependencies (e.g. mlflow) are not imported
+        from nerblackbox.api.store import Store
+
         Store.set_path(data_dir)
 
     # context
@@ -51,3 +53,80 @@ def tensorboard():
         f"cd {cd_dir}; tensorboard --logdir tensorboard --reload_multifile=true",
         shell=True,
     )
+
+
+@nerblackbox.command(name="serve")
+@click.option(
+    "--checkpoint", type=str, required=True, help="[str] checkpoint directory"
+)
+@click.option("--host", default="127.0.0.1", type=str, help="[str] host")
+@click.option("--port", default=8000, type=int, help="[int] port")
+@click.option(
+    "--workers",
+    default=0,
+    type=int,
+    help="[int] number of worker processes (0 = predict in the server process)",
+)
+@click.option(
+    "--threads_per_worker",
+    default=1,
+    type=int,
+    help="[int] number of torch threads per worker process",
+)
+@click.option(
+    "--batch_size", default=16, type=int, help="[int] batch size of forward pass"
+)
+@click.option(
+    "--max_batch_size",
+    default=16,
+    type=int,
+    help="[int] maximum number of texts that are batched server-side",
+)
+@click.option(
+    "--max_wait_time",
+    default=0.005,
+    type=float,
+    help="[float] maximum time in seconds that a text waits for others to be batched with",
+)
+@click.option(
+    "--dynamic_padding", is_flag=True, help="[bool] pad each batch to its longest slice"
+)
+@click.option(
+    "--mmap",
+    is_flag=True,
+    help="[bool] memory-map the weights, such that worker processes share them",
+)
+def serve(
+    checkpoint: str,
+    host: str,
+    port: int,
+    workers: int,
+    threads_per_worker: int,
+    batch_size: int,
+    max_batch_size: int,
+    max_wait_time: float,
+    dynamic_padding: bool,
+    mmap: bool,
+):
+    """serve model predictions via http (POST /predict, /predict_proba; GET /health, /metrics)."""
+    from nerblackbox.api.model import Model
+    from nerblackbox.modules.inference.server import InferenceServer
+
+    model = Model.from_checkpoint(
+        checkpoint,
+        batch_size=batch_size,
+        dynamic_padding=dynamic_padding,
+        num_workers=workers,
+        threads_per_worker=threads_per_worker,
+        mmap=mmap,
+    )
+    assert model is not None, f"ERROR! checkpoint = {checkpoint} does not exist."
+    server = InferenceServer(
+        model,
+        host=host,
+        port=port,
+        max_batch_size=max_batch_size,
+        max_wait_time=max_wait_time,
+    )
+    print(f"> serving {checkpoint} on http://{server.host}:{server.port}")
+    server.serve_forever()
@@ -0,0 +1,37 @@
+import hashlib
+import json
+import os
+from os.path import join, isfile
+
+CHECKPOINT_FILE_NAMES = [
+    "config.json",
+    "pytorch_model.bin",
+    "model.safetensors",
+    "tokenizer.json",
+    "tokenizer_config.json",
+    "special_tokens_map.json",
+    "vocab.txt",
+]
+
+
+def get_checkpoint_fingerprint(checkpoint_directory: str) -> str:
+    r"""
+    fingerprint of the content of a checkpoint, used to invalidate files that are derived from it
+    (e.g. model.onnx) and cached predictions.
+
+    it is computed from the size and modification time of the weights, config and tokenizer files,
+    i.e. it changes if the checkpoint is retrained or overwritten in place, w/o reading the (large) weights.
+
+    Args:
+        checkpoint_directory: path to the checkpoint directory
+
+    Returns:
+        fingerprint: e.g. '3f7c0a..'
+    """
+    files = dict()
+    for file_name in CHECKPOINT_FILE_NAMES:
+        path = join(checkpoint_directory, file_name)
+        if isfile(path):
+            stat = os.stat(path)
+            files[file_name] = [stat.st_size, stat.st_mtime_ns]
+    return hashlib.sha256(json.dumps(files, sort_keys=True).encode("utf-8")).hexdigest()
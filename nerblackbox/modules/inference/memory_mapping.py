@@ -0,0 +1,183 @@
+import os
+from os.path import join, isfile
+from typing import Any, Dict, Optional
+
+import torch
+from torch.overrides import TorchFunctionMode
+from transformers import AutoConfig, AutoModelForTokenClassification
+
+from nerblackbox.modules.inference.fingerprint import get_checkpoint_fingerprint
+
+# private file name, such that transformers does not load it instead of the checkpoint's weights
+SAFETENSORS_FILE_NAME = "model_mmap.safetensors"
+SAFETENSORS_FINGERPRINT_KEY = "checkpoint_fingerprint"
+
+
+def export_to_safetensors(
+    checkpoint_directory: str,
+    safetensors_path: Optional[str] = None,
+    fingerprint: Optional[str] = None,
+) -> str:
+    r"""
+    convert the weights of the model in checkpoint_directory (e.g. pytorch_model.bin) to safetensors
+
+    Args:
+        checkpoint_directory: path to the checkpoint directory
+        safetensors_path: path of the safetensors file. if None, it is created in checkpoint_directory
+        fingerprint: checkpoint fingerprint (see get_checkpoint_fingerprint()) that is stored in the metadata
+
+    Returns:
+        safetensors_path: path of the safetensors file
+    """
+    from safetensors.torch import save_model
+
+    if safetensors_path is None:
+        safetensors_path = join(checkpoint_directory, SAFETENSORS_FILE_NAME)
+    metadata = {"format": "pt"}
+    if fingerprint is not None:
+        metadata[SAFETENSORS_FINGERPRINT_KEY] = fingerprint
+
+    model = AutoModelForTokenClassification.from_pretrained(checkpoint_directory)
+    # write to a temporary file first, such that concurrent readers never see partial files
+    safetensors_path_tmp = f"{safetensors_path}.{os.getpid()}.tmp"
+    try:
+        save_model(model, safetensors_path_tmp, metadata=metadata)
+        os.replace(safetensors_path_tmp, safetensors_path)
+    finally:
+        if isfile(safetensors_path_tmp):
+            os.remove(safetensors_path_tmp)
+    return safetensors_path
+
+
+def load_memory_mapped_model(
+    checkpoint_directory: str, **kwargs_config: Any
+) -> torch.nn.Module:
+    r"""
+    load the model with all weights memory-mapped from checkpoint_directory/model_mmap.safetensors (read-only, cpu).
+
+    the weights are neither copied nor read at startup. pages of the file are only loaded when they are used
+    in a forward pass, and they are shared (via the page cache) by all processes on the same host
+    that map the same file. tensors in the file that the model does not use are never materialized.
+    if the safetensors file does not exist or was converted from a different checkpoint
+    (i.e. the fingerprint in its metadata differs, see get_checkpoint_fingerprint()),
+    it is (re-)converted from the checkpoint.
+
+    Args:
+        checkpoint_directory: path to the checkpoint directory
+        kwargs_config: passed to AutoConfig.from_pretrained(), e.g. id2label
+
+    Returns:
+        model: in eval mode
+    """
+    from safetensors import safe_open
+
+    safetensors_path = join(checkpoint_directory, SAFETENSORS_FILE_NAME)
+    fingerprint = get_checkpoint_fingerprint(checkpoint_directory)
+    if _get_safetensors_fingerprint(safetensors_path) != fingerprint:
+        export_to_safetensors(checkpoint_directory, safetensors_path, fingerprint)
+
+    config = AutoConfig.from_pretrained(checkpoint_directory, **kwargs_config)
+    with _ParametersOnMetaDevice():
+        model = AutoModelForTokenClassification.from_config(config)
+
+    with safe_open(safetensors_path, framework="pt", device="cpu") as f:
+        keys = set(f.keys())
+        state_dict = {
+            name: f.get_tensor(name) for name in model.state_dict() if name in keys
+        }
+    model.load_state_dict(state_dict, strict=False, assign=True)
+    model.tie_weights()
+
+    missing = [
+        name
+        for name, tensor in [*model.named_parameters(), *model.named_buffers()]
+        if tensor.is_meta
+    ]
+    assert (
+        len(missing) == 0
+    ), f"ERROR! tensors {missing} not found in {safetensors_path}."
+    model.eval()
+    return model
+
+
+def _get_safetensors_fingerprint(safetensors_path: str) -> Optional[str]:
+    r"""
+    Args:
+        safetensors_path: path of the safetensors file
+
+    Returns:
+        fingerprint: checkpoint fingerprint in the metadata of the file, or None if the file does not exist
+    """
+    from safetensors import safe_open
+
+    if not isfile(safetensors_path):
+        return None
+    with safe_open(safetensors_path, framework="pt", device="cpu") as f:
+        metadata = f.metadata() or dict()
+    return metadata.get(SAFETENSORS_FINGERPRINT_KEY)
+
+
+def get_memory_usage(pid: Optional[int] = None) -> Dict[str, int]:
+    r"""
+    Args:
+        pid: process id. if None, the current process is used
+
+    Returns:
+        memory_usage: [dict] w/ keys =
+                      pid:    process id
+                      rss:    resident memory (in bytes)
+                      pss:    proportional set size (in bytes), i.e. shared pages are divided by the number of
+                              processes that share them. -1 if not available
+                      shared: resident memory that is shared with other processes (in bytes). -1 if not available
+    """
+    if pid is None:
+        pid = os.getpid()
+    memory_usage = {"pid": pid, "rss": -1, "pss": -1, "shared": -1}
+
+    # linux: /proc/<pid>/smaps_rollup (values in kB)
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            values = {
+                parts[0].rstrip(":"): int(parts[1]) * 1024
+                for parts in (line.split() for line in f)
+                if len(parts) == 3 and parts[2] == "kB"
+            }
+        memory_usage["rss"] = values["Rss"]
+        memory_usage["pss"] = values["Pss"]
+        memory_usage["shared"] = values["Shared_Clean"] + values["Shared_Dirty"]
+        return memory_usage
+    except (OSError, KeyError):
+        pass
+
+    # other platforms: peak resident memory of the current process only
+    if pid == os.getpid():
+        try:
+            import resource
+            import sys
+
+            maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            memory_usage["rss"] = maxrss if sys.platform == "darwin" else maxrss * 1024
+        except ImportError:
+            pass
+    return memory_usage
+
+
+class _ParametersOnMetaDevice(TorchFunctionMode):
+    r"""
+    context manager that creates the parameters of torch.nn modules on the meta device.
+    hence, no memory is used and no time is spent on the random initialization of the weights
+    (torch.nn.init on the meta device is a no-op).
+
+    like torch.device("meta"), it is a torch function mode and thus only affects the current thread.
+    in contrast to torch.device("meta"), only torch.empty() (which torch.nn modules use to create their parameters)
+    is redirected to the meta device, while buffers (e.g. position_ids, created w/ torch.arange)
+    stay on the cpu, as they are not necessarily contained in the checkpoint.
+    """
+
+    def __torch_function__(
+        self, func: Any, types: Any, args: Any = (), kwargs: Any = None
+    ) -> Any:
+        kwargs = kwargs or {}
+        if func is torch.empty and kwargs.get("device") is None:
+            kwargs["device"] = "meta"
+        return func(*args, **kwargs)
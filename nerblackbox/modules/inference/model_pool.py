@@ -0,0 +1,180 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+
+import torch
+
+from nerblackbox.modules.inference.profiling import Profiler
+
+_model: Optional[Any] = None  # Model instance of the current worker process
+
+
+class ModelPool:
+    r"""
+    pool of worker processes, each of which holds its own Model instance.
+    input texts are sharded across the workers and the results are reassembled in the original order.
+    """
+
+    def __init__(
+        self,
+        checkpoint_directory: str,
+        num_workers: int,
+        threads_per_worker: int = 1,
+        pin_cpus: bool = True,
+        **kwargs_model: Any,
+    ):
+        r"""
+        Args:
+            checkpoint_directory: path to the checkpoint directory
+            num_workers: number of worker processes
+            threads_per_worker: number of torch threads used by each worker process
+            pin_cpus: if True, each worker process is pinned to its own set of threads_per_worker cpus (Linux only)
+            kwargs_model: passed to Model in each worker process, e.g. batch_size
+        """
+        assert num_workers > 0, f"ERROR! num_workers = {num_workers} needs to be > 0."
+        assert (
+            threads_per_worker > 0
+        ), f"ERROR! threads_per_worker = {threads_per_worker} needs to be > 0."
+        self.num_workers = num_workers
+
+        # spawn (instead of fork) to not inherit the state of torch's thread pools
+        context = multiprocessing.get_context("spawn")
+        # process ids of the worker processes (0 = not started yet)
+        self._pids = context.Array("i", num_workers)
+        self.executor = ProcessPoolExecutor(
+            max_workers=num_workers,
+            mp_context=context,
+            initializer=_initialize_worker,
+            initargs=(
+                checkpoint_directory,
+                kwargs_model,
+                threads_per_worker,
+                pin_cpus,
+                context.Value("i", 0),
+                self._pids,
+            ),
+        )
+
+    def predict(
+        self,
+        input_texts: List[str],
+        profiler: Optional[Profiler] = None,
+        **kwargs_predict: Any,
+    ) -> List[Any]:
+        r"""
+        Args:
+            input_texts: e.g. ["example 1", "example 2"]
+            profiler: if enabled, the stats of the worker processes are added to it (Optional)
+            kwargs_predict: passed to Model._predict_documents() in each worker process, e.g. level = "word"
+
+        Returns:
+            predictions: [list] with one element for each input text, see Model._predict_documents()
+        """
+        futures = [
+            self.executor.submit(_predict_documents, shard, kwargs_predict)
+            for shard in shard_input_texts(input_texts, self.num_workers)
+        ]
+        predictions = list()
+        for future in futures:
+            predictions_shard, stats = future.result()
+            predictions.extend(predictions_shard)
+            if profiler is not None and stats is not None:
+                profiler.add(seconds=stats["seconds"], counts=stats["counts"])
+        return predictions
+
+    def pids(self) -> List[int]:
+        r"""
+        Returns:
+            pids: process ids of the worker processes that have been started
+        """
+        return [pid for pid in self._pids[:] if pid > 0]
+
+    def close(self) -> None:
+        r"""
+        shut down the worker processes
+        """
+        self.executor.shutdown(wait=True)
+
+
+def shard_input_texts(input_texts: List[str], num_shards: int) -> List[List[str]]:
+    r"""
+    split input_texts into at most num_shards contiguous shards of (almost) equal size
+
+    Args:
+        input_texts: e.g. ["a", "b", "c", "d", "e"]
+        num_shards: e.g. 2
+
+    Returns:
+        shards: e.g. [["a", "b", "c"], ["d", "e"]]
+    """
+    shard_size, remainder = divmod(len(input_texts), num_shards)
+    shards = list()
+    start = 0
+    for i in range(num_shards):
+        end = start + shard_size + (1 if i < remainder else 0)
+        if end > start:
+            shards.append(input_texts[start:end])
+        start = end
+    return shards
+
+
+def _initialize_worker(
+    checkpoint_directory: str,
+    kwargs_model: Dict[str, Any],
+    threads_per_worker: int,
+    pin_cpus: bool,
+    worker_counter,
+    pids,
+) -> None:
+    r"""
+    executed once in each worker process: set threads (& cpu affinity) and load the model
+
+    Args:
+        checkpoint_directory: path to the checkpoint directory
+        kwargs_model: passed to Model
+        threads_per_worker: number of torch threads
+        pin_cpus: if True, pin the worker process to threads_per_worker cpus
+        worker_counter: [multiprocessing.Value] used to assign an index to each worker process
+        pids: [multiprocessing.Array] the process id is stored at the index of the worker process
+    """
+    global _model
+    from nerblackbox.api.model import Model
+
+    with worker_counter.get_lock():
+        worker_index = worker_counter.value
+        worker_counter.value += 1
+    pids[worker_index % len(pids)] = os.getpid()
+
+    torch.set_num_threads(threads_per_worker)
+    torch.set_num_interop_threads(1)
+    if pin_cpus and hasattr(os, "sched_setaffinity"):
+        cpus = sorted(os.sched_getaffinity(0))
+        if len(cpus) >= threads_per_worker:
+            start = (worker_index * threads_per_worker) % len(cpus)
+            os.sched_setaffinity(
+                0,
+                [cpus[(start + i) % len(cpus)] for i in range(threads_per_worker)],
+            )
+
+    _model = Model(checkpoint_directory, **kwargs_model)
+
+
+def _predict_documents(
+    input_texts: List[str], kwargs_predict: Dict[str, Any]
+) -> Tuple[List[Any], Optional[Dict[str, Any]]]:
+    r"""
+    executed in a worker process for each shard
+
+    Args:
+        input_texts: e.g. ["example 1", "example 2"]
+        kwargs_predict: passed to Model._predict_documents()
+
+    Returns:
+        predictions: [list] with one element for each input text
+        stats: stats of the worker's profiler for this shard, see PredictStats.as_dict(). None if disabled.
+    """
+    assert _model is not None, f"ERROR! worker process has not been initialized."
+    predictions = _model._predict_documents(input_texts, **kwargs_predict)
+    stats = _model.profiler.pop() if _model.profiler.enabled else None
+    return predictions, stats
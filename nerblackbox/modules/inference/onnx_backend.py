@@ -0,0 +1,187 @@
+import os
+import inspect
+import tempfile
+from os.path import join, isfile
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import torch
+from transformers import AutoModelForTokenClassification, AutoTokenizer
+
+from nerblackbox.modules.inference.fingerprint import get_checkpoint_fingerprint
+
+ONNX_FILE_NAME = "model.onnx"
+ONNX_OPSET_VERSION = 14
+ONNX_FINGERPRINT_KEY = "checkpoint_fingerprint"
+
+
+def load_onnx_model(
+    checkpoint_directory: str,
+    num_threads: Optional[int] = None,
+    num_interop_threads: Optional[int] = None,
+) -> "OnnxRuntimeModel":
+    r"""
+    load checkpoint_directory/model.onnx if it was exported from the current checkpoint,
+    i.e. if the fingerprint in its metadata equals the checkpoint's (see get_checkpoint_fingerprint()).
+    otherwise, (re-)export it first. if the checkpoint directory is read-only,
+    the model is exported to a temporary directory instead (and not cached).
+
+    Args:
+        checkpoint_directory: path to the checkpoint directory
+        num_threads: number of intra-op threads. if None, onnxruntime's default is used
+        num_interop_threads: number of inter-op threads. if None, onnxruntime's default is used
+
+    Returns:
+        onnx_runtime_model
+    """
+    onnx_path = join(checkpoint_directory, ONNX_FILE_NAME)
+    fingerprint = get_checkpoint_fingerprint(checkpoint_directory)
+    if isfile(onnx_path):
+        onnx_runtime_model = OnnxRuntimeModel(
+            onnx_path, num_threads=num_threads, num_interop_threads=num_interop_threads
+        )
+        if onnx_runtime_model.metadata.get(ONNX_FINGERPRINT_KEY) == fingerprint:
+            return onnx_runtime_model
+
+    try:
+        export_to_onnx(checkpoint_directory, onnx_path, fingerprint=fingerprint)
+    except OSError:  # e.g. read-only checkpoint directory
+        print(f"> ATTENTION! could not cache onnx model at {onnx_path}")
+        with tempfile.TemporaryDirectory() as directory:
+            return OnnxRuntimeModel(
+                export_to_onnx(
+                    checkpoint_directory,
+                    join(directory, ONNX_FILE_NAME),
+                    fingerprint=fingerprint,
+                ),
+                num_threads=num_threads,
+                num_interop_threads=num_interop_threads,
+            )
+    return OnnxRuntimeModel(
+        onnx_path, num_threads=num_threads, num_interop_threads=num_interop_threads
+    )
+
+
+def export_to_onnx(
+    checkpoint_directory: str,
+    onnx_path: Optional[str] = None,
+    opset_version: int = ONNX_OPSET_VERSION,
+    fingerprint: Optional[str] = None,
+) -> str:
+    r"""
+    export the model in checkpoint_directory to onnx, with dynamic batch and sequence axes
+
+    Args:
+        checkpoint_directory: path to the checkpoint directory
+        onnx_path: path of the onnx file. if None, it is created in checkpoint_directory
+        opset_version: onnx opset version
+        fingerprint: if specified, it is stored in the metadata of the onnx file, see load_onnx_model()
+
+    Returns:
+        onnx_path: path of the onnx file
+    """
+    if onnx_path is None:
+        onnx_path = join(checkpoint_directory, ONNX_FILE_NAME)
+
+    model = AutoModelForTokenClassification.from_pretrained(
+        checkpoint_directory, return_dict=False
+    )
+    model.eval()
+    tokenizer = AutoTokenizer.from_pretrained(checkpoint_directory)
+    dummy_encodings = tokenizer(["nerblackbox"], return_tensors="pt")
+
+    # inputs need to be in the order of the forward signature, as they are passed as positional arguments
+    input_names = [
+        name
+        for name in inspect.signature(model.forward).parameters
+        if name in dummy_encodings.keys()
+    ]
+    dynamic_axes = {
+        name: {0: "batch", 1: "sequence"} for name in input_names + ["logits"]
+    }
+
+    # dynamic_axes are only supported by the torchscript exporter (default in older torch versions)
+    kwargs_export: Dict[str, Any] = dict()
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        kwargs_export["dynamo"] = False
+
+    # write to a temporary file first, such that concurrent readers never see partial files
+    onnx_path_tmp = f"{onnx_path}.{os.getpid()}.tmp"
+    try:
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                tuple(dummy_encodings[name] for name in input_names),
+                onnx_path_tmp,
+                input_names=input_names,
+                output_names=["logits"],
+                dynamic_axes=dynamic_axes,
+                opset_version=opset_version,
+                **kwargs_export,
+            )
+        if fingerprint is not None:
+            import onnx
+
+            onnx_model = onnx.load(onnx_path_tmp)
+            onnx.helper.set_model_props(onnx_model, {ONNX_FINGERPRINT_KEY: fingerprint})
+            onnx.save(onnx_model, onnx_path_tmp)
+        os.replace(onnx_path_tmp, onnx_path)
+    finally:
+        if isfile(onnx_path_tmp):
+            os.remove(onnx_path_tmp)
+    return onnx_path
+
+
+class OnnxRuntimeModel:
+    r"""
+    runs the forward pass of an exported model with onnxruntime on cpu.
+    can be called like the pytorch model in Model._forward(), i.e. model(**batch)[0] returns the logits.
+    """
+
+    def __init__(
+        self,
+        onnx_path: str,
+        num_threads: Optional[int] = None,
+        num_interop_threads: Optional[int] = None,
+    ):
+        r"""
+        Args:
+            onnx_path: path of the onnx file
+            num_threads: number of intra-op threads. if None, onnxruntime's default is used
+            num_interop_threads: number of inter-op threads. if None, onnxruntime's default is used
+        """
+        try:
+            import onnxruntime
+        except ImportError:
+            raise ImportError(
+                "ERROR! backend = onnx requires onnxruntime. install it with: pip install nerblackbox[onnx]"
+            )
+
+        options = onnxruntime.SessionOptions()
+        if num_threads is not None:
+            options.intra_op_num_threads = num_threads
+        if num_interop_threads is not None:
+            options.inter_op_num_threads = num_interop_threads
+        self.session = onnxruntime.InferenceSession(
+            onnx_path, options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [_input.name for _input in self.session.get_inputs()]
+        self.metadata = dict(self.session.get_modelmeta().custom_metadata_map)
+
+    def __call__(self, **inputs: torch.Tensor) -> Tuple[torch.Tensor]:
+        r"""
+        Args:
+            inputs: [dict] w/ keys = input_ids, attention_mask, (token_type_ids)
+                    and values = [torch tensor] of shape [batch_size, seq_length]
+
+        Returns:
+            outputs: [tuple] w/ logits = [torch tensor] of shape [batch_size, seq_length, num_labels]
+        """
+        logits = self.session.run(
+            ["logits"],
+            {
+                name: inputs[name].cpu().numpy().astype(np.int64)
+                for name in self.input_names
+            },
+        )[0]
+        return (torch.from_numpy(logits),)
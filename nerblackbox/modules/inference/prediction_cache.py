@@ -0,0 +1,287 @@
+import io
+import os
+import json
+import hashlib
+import threading
+from os.path import join, isfile
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+FILE_EXTENSION = ".cache"
+FORMAT_JSON = b"j"
+FORMAT_NPZ = b"n"
+
+
+class PredictionCache:
+    r"""
+    thread-safe LRU cache that maps (input text, predict arguments) to the final prediction of a Model.
+
+    the in-memory tier is bounded by the number of entries and (optionally) by the size of the serialized predictions.
+    the optional on-disk tier survives restarts: entries that are evicted from memory can be reloaded from disk,
+    and a new process starts with a warm cache. it is bounded by max_disk_bytes: if the size of the directory
+    exceeds max_disk_bytes, the entries that were least recently written or read from disk are removed.
+
+    predictions are serialized w/o pickle (see _serialize()), such that files in the (possibly shared) directory
+    can never execute code when they are loaded.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: Optional[int] = None,
+        directory: Optional[str] = None,
+        namespace: str = "",
+        max_disk_bytes: int = 1024**3,
+    ):
+        r"""
+        Args:
+            max_entries: maximum number of entries in memory, e.g. 10000
+            max_bytes: maximum size (in bytes) of all serialized predictions in memory, e.g. 100 * 1024**2. None = no limit
+            directory: directory of the on-disk tier. None = in-memory only
+            namespace: part of every key, e.g. to separate predictions of different models in the same directory
+            max_disk_bytes: maximum size (in bytes) of the on-disk tier, e.g. 1024**3
+        """
+        assert max_entries > 0, f"ERROR! max_entries = {max_entries} needs to be > 0."
+        assert (
+            max_bytes is None or max_bytes > 0
+        ), f"ERROR! max_bytes = {max_bytes} needs to be None or > 0."
+        assert (
+            max_disk_bytes > 0
+        ), f"ERROR! max_disk_bytes = {max_disk_bytes} needs to be > 0."
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.namespace = namespace
+        self.max_disk_bytes = max_disk_bytes
+        if self.directory is not None:
+            os.makedirs(self.directory, exist_ok=True)
+
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._disk_bytes: Optional[int] = None  # determined on first write
+        self._lock = threading.Lock()
+
+        # metrics
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._disk_evictions = 0
+
+    def key(self, input_text: str, **kwargs_predict: Any) -> str:
+        r"""
+        Args:
+            input_text: e.g. "example 1"
+            kwargs_predict: e.g. level = "entity", autocorrect = False, proba = False, is_pretokenized = False
+
+        Returns:
+            key: sha256 hash of namespace, input_text and kwargs_predict
+        """
+        content = json.dumps(
+            [self.namespace, input_text, sorted(kwargs_predict.items())]
+        )
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        r"""
+        Args:
+            key: see key()
+
+        Returns:
+            prediction: a copy of the cached prediction, or None if the key is not cached
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return _deserialize(value)
+
+        value = self._read(key)
+        prediction = _deserialize(value) if value is not None else None
+        with self._lock:
+            if value is None or prediction is None:
+                self._misses += 1
+                return None
+            self._disk_hits += 1
+            self._insert(key, value)
+        return prediction
+
+    def put(self, key: str, prediction: Any) -> None:
+        r"""
+        Args:
+            key: see key()
+            prediction: prediction for a single input text, see _serialize()
+        """
+        value = _serialize(prediction)
+        with self._lock:
+            self._insert(key, value)
+        self._write(key, value)
+
+    def clear(self) -> None:
+        r"""
+        remove all entries from memory (the on-disk tier is kept)
+        """
+        with self._lock:
+            self._entries = OrderedDict()
+            self._bytes = 0
+
+    def metrics(self) -> Dict[str, Any]:
+        r"""
+        Returns:
+            metrics: [dict] w/ keys =
+                     hits:      number of lookups served from memory
+                     disk_hits: number of lookups served from disk
+                     misses:    number of lookups that were not cached
+                     evictions: number of entries evicted from memory
+                     disk_evictions: number of entries removed from disk
+                     entries:   number of entries in memory
+                     bytes:     size of the serialized predictions in memory
+                     hit_rate:  (hits + disk_hits) / lookups
+        """
+        with self._lock:
+            lookups = self._hits + self._disk_hits + self._misses
+            return {
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "disk_evictions": self._disk_evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hit_rate": (self._hits + self._disk_hits) / lookups
+                if lookups
+                else 0.0,
+            }
+
+    ####################################################################################################################
+    # PRIVATE HELPER METHODS
+    ####################################################################################################################
+    def _insert(self, key: str, value: bytes) -> None:
+        r"""
+        insert value in memory and evict the least recently used entries. needs to be called with self._lock.
+        values that exceed max_bytes on their own are not kept in memory.
+        """
+        if self.max_bytes is not None and len(value) > self.max_bytes:
+            return
+        if key in self._entries:
+            self._bytes -= len(self._entries.pop(key))
+        self._entries[key] = value
+        self._bytes += len(value)
+        while len(self._entries) > self.max_entries or (
+            self.max_bytes is not None and self._bytes > self.max_bytes
+        ):
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self._evictions += 1
+
+    def _path(self, key: str) -> str:
+        assert self.directory is not None
+        return join(self.directory, f"{key}{FILE_EXTENSION}")
+
+    def _read(self, key: str) -> Optional[bytes]:
+        if self.directory is None or not isfile(self._path(key)):
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                value = f.read()
+            os.utime(self._path(key))  # last used
+            return value
+        except OSError:
+            return None
+
+    def _write(self, key: str, value: bytes) -> None:
+        if self.directory is None or isfile(self._path(key)):
+            return
+        # write to a temporary file first, such that concurrent readers never see partial files
+        path_tmp = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(path_tmp, "wb") as f:
+            f.write(value)
+        os.replace(path_tmp, self._path(key))
+
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, _, size in self._disk_entries())
+            else:
+                self._disk_bytes += len(value)
+            evict = self._disk_bytes > self.max_disk_bytes
+        if evict:
+            self._evict_disk()
+
+    def _disk_entries(self) -> List[Tuple[float, str, int]]:
+        r"""
+        Returns:
+            disk_entries: [list] of (last used, path, size in bytes) for each entry on disk
+        """
+        assert self.directory is not None
+        disk_entries = list()
+        for file_name in os.listdir(self.directory):
+            if file_name.endswith(FILE_EXTENSION):
+                path = join(self.directory, file_name)
+                try:
+                    disk_entries.append(
+                        (os.path.getmtime(path), path, os.path.getsize(path))
+                    )
+                except OSError:  # removed by a concurrent process
+                    pass
+        return disk_entries
+
+    def _evict_disk(self) -> None:
+        r"""
+        remove least recently used entries from disk until the size of the on-disk tier is at most
+        90% of max_disk_bytes, such that the directory is not scanned on every write.
+        """
+        disk_entries = self._disk_entries()
+        size = sum(entry[2] for entry in disk_entries)
+        removed = 0
+        for _, path, entry_size in sorted(disk_entries):
+            if size <= 0.9 * self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:  # removed by a concurrent process
+                pass
+            size -= entry_size
+        with self._lock:
+            self._disk_bytes = size
+            self._disk_evictions += removed
+
+
+def _serialize(prediction: Any) -> bytes:
+    r"""
+    Args:
+        prediction: either json serializable, e.g. [{"char_start": "0", "char_end": "4", "token": "anna", "tag": "PER"}]
+                    or a dict of numpy arrays (output_format = "arrays"), e.g. {"char_start": np.array([0]), ..}
+
+    Returns:
+        value: format byte (FORMAT_JSON or FORMAT_NPZ), followed by the json or npz content
+    """
+    if isinstance(prediction, dict) and all(
+        isinstance(array, np.ndarray) for array in prediction.values()
+    ):
+        buffer = io.BytesIO()
+        np.savez(buffer, **prediction)
+        return FORMAT_NPZ + buffer.getvalue()
+    return FORMAT_JSON + json.dumps(prediction).encode("utf-8")
+
+
+def _deserialize(value: bytes) -> Optional[Any]:
+    r"""
+    Args:
+        value: see _serialize()
+
+    Returns:
+        prediction: see _serialize(), or None if value is not valid (e.g. corrupt file)
+    """
+    try:
+        if value[:1] == FORMAT_NPZ:
+            with np.load(io.BytesIO(value[1:]), allow_pickle=False) as npz_file:
+                return {name: npz_file[name] for name in npz_file.files}
+        if value[:1] == FORMAT_JSON:
+            return json.loads(value[1:].decode("utf-8"))
+    except Exception:  # e.g. corrupt file
+        pass
+    return None
@@ -0,0 +1,158 @@
+import json
+import time
+import logging
+import threading
+from contextlib import nullcontext
+from typing import Dict, Any, Optional, ContextManager
+
+STAGES = ["pretokenization", "tensors", "forward", "merge", "post_processing"]
+COUNTS = ["calls", "documents", "slices", "batches", "tokens", "padding_tokens"]
+
+logger = logging.getLogger("nerblackbox.profiling")
+
+_NULL_CONTEXT = nullcontext()
+
+
+class PredictStats:
+    r"""
+    wall time (in seconds) per stage of Model.predict() and counts of documents, slices, batches and tokens
+    """
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = dict()
+        self.counts: Dict[str, int] = dict()
+        self.reset()
+
+    def reset(self) -> None:
+        self.seconds = {stage: 0.0 for stage in STAGES + ["total"]}
+        self.counts = {count: 0 for count in COUNTS}
+
+    def add(
+        self,
+        seconds: Optional[Dict[str, float]] = None,
+        counts: Optional[Dict[str, int]] = None,
+    ) -> None:
+        r"""
+        Args:
+            seconds: e.g. {"forward": 0.02}
+            counts: e.g. {"slices": 3}
+        """
+        for stage, value in (seconds or dict()).items():
+            self.seconds[stage] += value
+        for count, value in (counts or dict()).items():
+            self.counts[count] += value
+
+    def as_dict(self) -> Dict[str, Any]:
+        r"""
+        Returns:
+            stats: [dict] w/ keys =
+                   seconds:       wall time per stage, e.g. {"pretokenization": 0.001, .., "total": 0.05}
+                   counts:        e.g. {"calls": 1, "documents": 2, "slices": 3, "batches": 1, "tokens": 40, ..}
+                   padding_ratio: padding_tokens / (tokens + padding_tokens) in the forward pass
+        """
+        processed_tokens = self.counts["tokens"] + self.counts["padding_tokens"]
+        return {
+            "seconds": dict(self.seconds),
+            "counts": dict(self.counts),
+            "padding_ratio": self.counts["padding_tokens"] / processed_tokens
+            if processed_tokens
+            else 0.0,
+        }
+
+
+class Profiler:
+    r"""
+    records PredictStats for all predict calls of a Model (self.stats).
+    each predict call is additionally logged as json on the logger "nerblackbox.profiling" (level DEBUG).
+
+    if disabled, stage() returns a shared no-op context manager and count() returns immediately.
+    """
+
+    def __init__(self, enabled: bool = False):
+        r"""
+        Args:
+            enabled: if True, record stats
+        """
+        self.enabled = enabled
+        self.stats = PredictStats()
+        self._lock = threading.Lock()
+        # stats of the current predict call (per thread)
+        self._local = threading.local()
+
+    def call(self) -> ContextManager:
+        r"""
+        context manager for a whole predict call. records the total time and logs the stats of the call.
+        """
+        return _Call(self) if self.enabled else _NULL_CONTEXT
+
+    def stage(self, stage: str) -> ContextManager:
+        r"""
+        context manager for a single stage, e.g. "forward"
+        """
+        return _Stage(self, stage) if self.enabled else _NULL_CONTEXT
+
+    def count(self, **counts: int) -> None:
+        r"""
+        Args:
+            counts: e.g. slices = 3
+        """
+        if self.enabled:
+            self.add(counts=counts)
+
+    def add(
+        self,
+        seconds: Optional[Dict[str, float]] = None,
+        counts: Optional[Dict[str, int]] = None,
+    ) -> None:
+        r"""
+        add seconds and counts to self.stats and to the stats of the current predict call
+
+        Args:
+            seconds: e.g. {"forward": 0.02}
+            counts: e.g. {"slices": 3}
+        """
+        with self._lock:
+            self.stats.add(seconds, counts)
+        current: Optional[PredictStats] = getattr(self._local, "current", None)
+        if current is not None:
+            current.add(seconds, counts)
+
+    def pop(self) -> Dict[str, Any]:
+        r"""
+        Returns:
+            stats: self.stats.as_dict(). self.stats is reset afterwards.
+        """
+        with self._lock:
+            stats = self.stats.as_dict()
+            self.stats.reset()
+        return stats
+
+
+class _Stage:
+    def __init__(self, profiler: Profiler, stage: str):
+        self.profiler = profiler
+        self.stage = stage
+        self.start = 0.0
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *args: Any) -> None:
+        self.profiler.add(seconds={self.stage: time.perf_counter() - self.start})
+
+
+class _Call(_Stage):
+    def __init__(self, profiler: Profiler):
+        super().__init__(profiler, "total")
+
+    def __enter__(self) -> None:
+        self.profiler._local.current = PredictStats()
+        super().__enter__()
+
+    def __exit__(self, *args: Any) -> None:
+        self.profiler.add(counts={"calls": 1})
+        super().__exit__(*args)
+        current = self.profiler._local.current
+        self.profiler._local.current = None
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(json.dumps({"event": "predict", **current.as_dict()}))
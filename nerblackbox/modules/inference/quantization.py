@@ -0,0 +1,139 @@
+import os
+import json
+from os.path import join, isfile
+from typing import Any, Dict, Optional
+
+import torch
+import transformers
+from transformers import AutoConfig, AutoModelForTokenClassification
+
+from nerblackbox.modules.inference.fingerprint import get_checkpoint_fingerprint
+
+QUANTIZATIONS = ["dynamic_int8"]
+
+
+def get_quantized_model_path(checkpoint_directory: str, quantization: str) -> str:
+    r"""
+    Args:
+        checkpoint_directory: path to the checkpoint directory
+        quantization: e.g. "dynamic_int8"
+
+    Returns:
+        quantized_model_path: e.g. "<checkpoint_directory>/model_dynamic_int8.pt"
+    """
+    return join(checkpoint_directory, f"model_{quantization}.pt")
+
+
+def get_quantized_model_key(checkpoint_directory: str, quantization: str) -> str:
+    r"""
+    Args:
+        checkpoint_directory: path to the checkpoint directory
+        quantization: e.g. "dynamic_int8"
+
+    Returns:
+        key: identifies everything the quantized weights depend on, i.e. the checkpoint content,
+             the quantization and the versions of torch & transformers
+    """
+    return json.dumps(
+        [
+            get_checkpoint_fingerprint(checkpoint_directory),
+            quantization,
+            torch.__version__,
+            transformers.__version__,
+        ]
+    )
+
+
+def quantize_model(model: torch.nn.Module, quantization: str) -> torch.nn.Module:
+    r"""
+    Args:
+        model: pytorch model in eval mode
+        quantization: "dynamic_int8", i.e. the weights of all linear layers are quantized to int8,
+                      the activations are quantized dynamically at inference time (cpu only)
+
+    Returns:
+        quantized_model
+    """
+    assert (
+        quantization in QUANTIZATIONS
+    ), f"ERROR! quantization = {quantization} unknown, needs to be in {QUANTIZATIONS}."
+    return torch.ao.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+
+
+def load_quantized_model(
+    checkpoint_directory: str, quantization: str, **kwargs_from_pretrained: Any
+) -> torch.nn.Module:
+    r"""
+    load the quantized weights from the disk cache next to the checkpoint if they are up to date.
+    otherwise, load and quantize the model from the checkpoint and write its weights to the disk cache.
+
+    only the state_dict of the quantized model is cached (together with its key, see get_quantized_model_key()),
+    and it is loaded with weights_only = True. the structure of the quantized model is always created
+    from the config with quantize_model().
+
+    Args:
+        checkpoint_directory: path to the checkpoint directory
+        quantization: e.g. "dynamic_int8"
+        kwargs_from_pretrained: passed to AutoModelForTokenClassification.from_pretrained()
+
+    Returns:
+        quantized_model: in eval mode
+    """
+    from transformers.modeling_utils import no_init_weights
+
+    quantized_model_path = get_quantized_model_path(checkpoint_directory, quantization)
+    key = get_quantized_model_key(checkpoint_directory, quantization)
+    state_dict = _load_quantized_state_dict(quantized_model_path, key)
+    if state_dict is not None:
+        config = AutoConfig.from_pretrained(
+            checkpoint_directory, **kwargs_from_pretrained
+        )
+        with no_init_weights():
+            model = AutoModelForTokenClassification.from_config(config)
+        model.eval()
+        quantized_model = quantize_model(model, quantization)
+        quantized_model.load_state_dict(state_dict)
+    else:
+        model = AutoModelForTokenClassification.from_pretrained(
+            checkpoint_directory, **kwargs_from_pretrained
+        )
+        model.eval()
+        quantized_model = quantize_model(model, quantization)
+        try:
+            # write to a temporary file first, such that concurrent readers never see partial files
+            quantized_model_path_tmp = f"{quantized_model_path}.{os.getpid()}.tmp"
+            torch.save(
+                {"key": key, "state_dict": quantized_model.state_dict()},
+                quantized_model_path_tmp,
+            )
+            os.replace(quantized_model_path_tmp, quantized_model_path)
+        except OSError:  # e.g. read-only checkpoint directory
+            print(
+                f"> ATTENTION! could not cache quantized model at {quantized_model_path}"
+            )
+    quantized_model.eval()
+    return quantized_model
+
+
+def _load_quantized_state_dict(
+    quantized_model_path: str, key: str
+) -> Optional[Dict[str, Any]]:
+    r"""
+    Args:
+        quantized_model_path: e.g. "<checkpoint_directory>/model_dynamic_int8.pt"
+        key: see get_quantized_model_key()
+
+    Returns:
+        state_dict of the quantized model, or None if the cache does not exist or is stale
+    """
+    if not isfile(quantized_model_path):
+        return None
+    try:
+        cached = torch.load(quantized_model_path, weights_only=True)
+    except Exception:  # e.g. corrupt file or file written by an older version
+        return None
+    if not isinstance(cached, dict) or cached.get("key") != key:
+        return None
+    return cached["state_dict"]
@@ -0,0 +1,282 @@
+import json
+import time
+import asyncio
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import List, Dict, Any, Optional, Tuple
+
+from nerblackbox.api.model import Model
+from nerblackbox.api.async_predictor import AsyncPredictor
+
+ENDPOINTS_POST = ["/predict", "/predict_proba"]
+LATENCY_BUCKETS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]  # ms
+
+
+class LatencyHistogram:
+    r"""
+    thread-safe histogram of request latencies (in milliseconds) with fixed buckets
+    """
+
+    def __init__(self, buckets: Optional[List[float]] = None):
+        r"""
+        Args:
+            buckets: upper bounds of the buckets in milliseconds, e.g. [1, 2, 5, 10]
+        """
+        self.buckets = LATENCY_BUCKETS if buckets is None else buckets
+        self.counts = [0] * (len(self.buckets) + 1)  # last bucket = +Inf
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, latency: float) -> None:
+        r"""
+        Args:
+            latency: in milliseconds, e.g. 3.7
+        """
+        index = len(self.buckets)
+        for i, bucket in enumerate(self.buckets):
+            if latency <= bucket:
+                index = i
+                break
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += latency
+
+    def as_dict(self) -> Dict[str, Any]:
+        r"""
+        Returns:
+            histogram: e.g. {"count": 3, "mean": 4.2, "buckets": {"1": 0, "2": 1, "5": 1, .., "+Inf": 0}}
+                       where each bucket contains the number of latencies <= its upper bound (and > the previous one)
+        """
+        with self._lock:
+            return {
+                "count": self.count,
+                "mean": self.sum / self.count if self.count else 0.0,
+                "buckets": {
+                    **{
+                        str(bucket): count
+                        for bucket, count in zip(self.buckets, self.counts)
+                    },
+                    "+Inf": self.counts[-1],
+                },
+            }
+
+
+class InferenceServer:
+    r"""
+    local HTTP inference server for a Model.
+
+    endpoints:
+        POST /predict       json body w/ keys = text or texts, level, autocorrect, is_pretokenized
+        POST /predict_proba json body w/ keys = text or texts, is_pretokenized
+        GET  /health        status and batching metrics
+        GET  /metrics       latency histograms, batching metrics and memory usage
+
+    requests are batched server-side by an AsyncPredictor that runs in a background event loop.
+    """
+
+    def __init__(
+        self,
+        model: Model,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        max_batch_size: int = 16,
+        max_wait_time: float = 0.005,
+    ):
+        r"""
+        Args:
+            model: Model used for prediction
+            host: e.g. "127.0.0.1"
+            port: e.g. 8000. if 0, a free port is chosen (see self.port)
+            max_batch_size: maximum number of texts that are coalesced into one batch
+            max_wait_time: maximum time (in seconds) the first text of a batch waits for more texts
+        """
+        self.model = model
+        self.predictor = AsyncPredictor(
+            model, max_batch_size=max_batch_size, max_wait_time=max_wait_time
+        )
+        self.latency = {endpoint: LatencyHistogram() for endpoint in ENDPOINTS_POST}
+        self.loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self._server_thread: Optional[threading.Thread] = None
+
+        server = self
+
+        class RequestHandler(_RequestHandler):
+            inference_server = server
+
+        self.http_server = ThreadingHTTPServer((host, port), RequestHandler)
+        self.http_server.daemon_threads = True
+        # server_address is typed as str | bytes, but it is a str for AF_INET
+        self.host = str(self.http_server.server_address[0])
+        self.port = int(self.http_server.server_address[1])
+
+    def serve_forever(self) -> None:
+        r"""
+        start the server and block until shutdown() is called (or KeyboardInterrupt)
+        """
+        if not self._loop_thread.is_alive():
+            self._loop_thread.start()
+        try:
+            self.http_server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._close()
+
+    def start(self) -> None:
+        r"""
+        start the server in a background thread
+        """
+        self._loop_thread.start()
+        self._server_thread = threading.Thread(
+            target=self.http_server.serve_forever, daemon=True
+        )
+        self._server_thread.start()
+
+    def shutdown(self) -> None:
+        r"""
+        stop the server, the batching loop and the model's worker processes
+        """
+        self.http_server.shutdown()
+        if self._server_thread is not None:
+            self._server_thread.join()
+            self._close()
+
+    def predict(self, input_texts: List[str], **kwargs_predict: Any) -> List[Any]:
+        r"""
+        submit the input texts to the batching loop and wait for the predictions (called from request threads)
+
+        Args:
+            input_texts: e.g. ["example 1", "example 2"]
+            kwargs_predict: passed to AsyncPredictor.predict_async(), e.g. level = "word"
+
+        Returns:
+            predictions: [list] with one element for each input text
+        """
+        return asyncio.run_coroutine_threadsafe(
+            self._predict(input_texts, **kwargs_predict), self.loop
+        ).result()
+
+    def metrics(self) -> Dict[str, Any]:
+        r"""
+        Returns:
+            metrics: [dict] w/ keys = latency (one histogram per endpoint, in ms), batching
+                     and memory (resident memory per process, in bytes)
+        """
+        return {
+            "latency": {
+                endpoint: histogram.as_dict()
+                for endpoint, histogram in self.latency.items()
+            },
+            "batching": self.predictor.metrics(),
+            "memory": self.model.memory_usage(),
+        }
+
+    ####################################################################################################################
+    # PRIVATE HELPER METHODS
+    ####################################################################################################################
+    async def _predict(
+        self, input_texts: List[str], **kwargs_predict: Any
+    ) -> List[Any]:
+        return list(
+            await asyncio.gather(
+                *[
+                    self.predictor.predict_async(input_text, **kwargs_predict)
+                    for input_text in input_texts
+                ]
+            )
+        )
+
+    def _close(self) -> None:
+        self.http_server.server_close()
+        asyncio.run_coroutine_threadsafe(self.predictor.close(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._loop_thread.join()
+        self.loop.close()
+        self.model.close()
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    inference_server: InferenceServer
+
+    def do_GET(self) -> None:
+        if self.path == "/health":
+            self._respond(
+                200,
+                {
+                    "status": "ok",
+                    "checkpoint_directory": self.inference_server.model.checkpoint_directory,
+                    "batching": self.inference_server.predictor.metrics(),
+                },
+            )
+        elif self.path == "/metrics":
+            self._respond(200, self.inference_server.metrics())
+        else:
+            self._respond(404, {"error": f"endpoint {self.path} unknown"})
+
+    def do_POST(self) -> None:
+        if self.path not in ENDPOINTS_POST:
+            self._respond(404, {"error": f"endpoint {self.path} unknown"})
+            return
+
+        start = time.perf_counter()
+        try:
+            input_texts, kwargs_predict = self._parse_request()
+        except (ValueError, KeyError, TypeError) as e:
+            self._respond(400, {"error": f"invalid request: {e}"})
+            return
+
+        try:
+            predictions = self.inference_server.predict(input_texts, **kwargs_predict)
+        except AssertionError as e:
+            self._respond(400, {"error": str(e)})
+            return
+        except Exception as e:
+            self._respond(500, {"error": str(e)})
+            return
+
+        self.inference_server.latency[self.path].record(
+            1000 * (time.perf_counter() - start)
+        )
+        self._respond(200, {"predictions": predictions})
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass  # no log line for each request
+
+    def _parse_request(self) -> Tuple[List[str], Dict[str, Any]]:
+        r"""
+        Returns:
+            input_texts: e.g. ["example 1", "example 2"]
+            kwargs_predict: e.g. {"level": "word", "autocorrect": False, "proba": False, "is_pretokenized": False}
+        """
+        content_length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(content_length) or b"{}")
+        if "texts" in body:
+            input_texts = body["texts"]
+        else:
+            input_texts = [body["text"]]
+        if not isinstance(input_texts, list) or not all(
+            isinstance(input_text, str) for input_text in input_texts
+        ):
+            raise TypeError("text needs to be a string and texts a list of strings")
+
+        if self.path == "/predict_proba":
+            kwargs_predict = {"level": "word", "autocorrect": False, "proba": True}
+        else:
+            kwargs_predict = {
+                "level": body.get("level", "entity"),
+                "autocorrect": bool(body.get("autocorrect", False)),
+                "proba": False,
+            }
+        kwargs_predict["is_pretokenized"] = bool(body.get("is_pretokenized", False))
+        return input_texts, kwargs_predict
+
+    def _respond(self, status: int, content: Dict[str, Any]) -> None:
+        body = json.dumps(content).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
@@ -0,0 +1,39 @@
+from typing import Optional
+
+import torch
+
+
+def set_num_threads(
+    num_threads: Optional[int] = None, num_interop_threads: Optional[int] = None
+) -> None:
+    r"""
+    set the number of intra-op and inter-op threads of torch (for the whole process)
+
+    the number of inter-op threads can only be set once, before any inter-op parallel work has started.
+    if this is not possible anymore, the current value is kept and a warning is printed.
+
+    Args:
+        num_threads: number of intra-op threads, e.g. 4. if None, torch's default is kept
+        num_interop_threads: number of inter-op threads, e.g. 1. if None, torch's default is kept
+    """
+    assert (
+        num_threads is None or num_threads > 0
+    ), f"ERROR! num_threads = {num_threads} needs to be None or > 0."
+    assert (
+        num_interop_threads is None or num_interop_threads > 0
+    ), f"ERROR! num_interop_threads = {num_interop_threads} needs to be None or > 0."
+
+    if num_threads is not None:
+        torch.set_num_threads(num_threads)
+    if (
+        num_interop_threads is not None
+        and num_interop_threads != torch.get_num_interop_threads()
+    ):
+        try:
+            torch.set_num_interop_threads(num_interop_threads)
+        except RuntimeError:
+            print(
+                f"> ATTENTION! could not set num_interop_threads = {num_interop_threads}, "
+                f"as it can only be set once per process. "
+                f"current value = {torch.get_num_interop_threads()}"
+            )
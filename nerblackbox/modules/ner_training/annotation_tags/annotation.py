@@ -1,5 +1,4 @@
 from typing import List
-import pandas as pd
 
 
 class Annotation:
@@ -90,9 +89,7 @@ class Annotation:
         elif new_scheme == "plain":
             classes_bio_without_o = [elem for elem in self.classes if elem != "O"]
             classes_plain = ["O"] + list(
-                pd.Series(classes_bio_without_o)
-                .map(lambda x: x.split("-")[-1])
-                .drop_duplicates()
+                dict.fromkeys([x.split("-")[-1] for x in classes_bio_without_o])
             )
 
             annotation_plain = Annotation(classes_plain)
@@ -0,0 +1,328 @@
+from typing import List, Dict, Optional
+import numpy as np
+
+PREFIX_OTHER, PREFIX_O, PREFIX_B, PREFIX_I, PREFIX_L, PREFIX_U = range(6)
+PREFIXES = {"B-": PREFIX_B, "I-": PREFIX_I, "L-": PREFIX_L, "U-": PREFIX_U}
+
+
+class TokenTagsArrays:
+    """
+    array-backed version of TokenTags for a batch of documents.
+    tags are integer ids (w.r.t. classes) and character offsets are integer arrays,
+    such that merge_tokens_to_words(), unpretokenize() and merge_tokens_to_entities()
+    are vectorized over all tokens of all documents. the results are identical to TokenTags.
+    """
+
+    def __init__(
+        self,
+        char_start: np.ndarray,
+        char_end: np.ndarray,
+        tag_id: np.ndarray,
+        doc_offsets: np.ndarray,
+        classes: List[str],
+        scheme: str,
+        texts: List[str],
+        level: str = "token",
+    ):
+        """
+        Args:
+            char_start: [np array] of shape [number_of_tokens], e.g. np.array([0, 8, 0])
+            char_end:   [np array] of shape [number_of_tokens], e.g. np.array([7, 16, 5])
+            tag_id:     [np array] of shape [number_of_tokens], e.g. np.array([1, 2, 0])
+            doc_offsets: [np array] of shape [number_of_documents + 1], e.g. np.array([0, 2, 3])
+                         i.e. the tokens of document i are [doc_offsets[i]:doc_offsets[i+1]]
+            classes: e.g. ["O", "B-TAG", "I-TAG"]
+            scheme: e.g. "plain" or "bio"
+            texts: [list] of [str], one for each document. token j of document i is texts[i][char_start[j]:char_end[j]]
+            level: e.g. "token"
+        """
+        self.char_start = np.asarray(char_start, dtype=np.int64)
+        self.char_end = np.asarray(char_end, dtype=np.int64)
+        self.tag_id = np.asarray(tag_id, dtype=np.int64)
+        self.doc_offsets = np.asarray(doc_offsets, dtype=np.int64)
+        self.classes = classes
+        self.scheme = scheme
+        self.level = level
+        assert (
+            len(self.char_start) == len(self.char_end) == len(self.tag_id)
+        ), f"ERROR! char_start, char_end and tag_id need to have the same length."
+        assert len(self.doc_offsets) == len(texts) + 1 and self.doc_offsets[-1] == len(
+            self.tag_id
+        ), f"ERROR! doc_offsets = {self.doc_offsets} inconsistent with #texts = {len(texts)}"
+
+        # tokens are (slices of) texts. they are not affected by unpretokenize()
+        self.texts = texts
+        self.token_start = self.char_start.copy()
+        self.token_end = self.char_end.copy()
+
+        # entities w/ more than one token use the original text (see merge_tokens_to_entities)
+        self.original_texts: Optional[List[str]] = None
+        self.merged = np.zeros(len(self.tag_id), dtype=bool)
+
+        if self.level in ["token", "word"]:
+            self._assert_scheme_consistency()
+
+    def _assert_scheme_consistency(self):
+        """
+        assert that tags in self.tag_id are in accordance with self.scheme
+        """
+        tags = [
+            self.classes[tag_id]
+            for tag_id in np.unique(self.tag_id)
+            if self.classes[tag_id] != "O"
+        ]
+        if len(tags) == 0:
+            possible_schemes = ["plain", "bio", "bilou"]
+        elif all(["-" not in elem for elem in tags]):
+            possible_schemes = ["plain"]
+        elif all(["-" in elem for elem in tags]):
+            possible_schemes = ["bio", "bilou"]
+        else:
+            raise Exception(
+                "ERROR! inconsistent tags found. they do not seem to belong to a well-defined scheme."
+            )
+
+        assert (
+            self.scheme in possible_schemes
+        ), f"ERROR! scheme = {self.scheme} is inconsistent with possible_schemes = {possible_schemes}!"
+
+    def as_lists(self) -> List[List[Dict[str, str]]]:
+        """
+        Returns:
+            token_tag_lists: [list] w/ one TokenTags.token_tag_list for each document, e.g. [
+                [{"char_start": "0", "char_end": "7", "token": "example", "tag": "TAG"}, ..],
+                ..
+            ]
+        """
+        char_start = self.char_start.tolist()
+        char_end = self.char_end.tolist()
+        token_start = self.token_start.tolist()
+        token_end = self.token_end.tolist()
+        tags = [self.classes[tag_id] for tag_id in self.tag_id.tolist()]
+        merged = self.merged.tolist()
+
+        token_tag_lists = list()
+        for i in range(len(self.texts)):
+            text = self.texts[i]
+            original_text = (
+                self.original_texts[i] if self.original_texts is not None else ""
+            )
+            token_tag_lists.append(
+                [
+                    {
+                        "char_start": str(char_start[j]),
+                        "char_end": str(char_end[j]),
+                        "token": original_text[char_start[j] : char_end[j]]
+                        if merged[j]
+                        else text[token_start[j] : token_end[j]],
+                        "tag": tags[j],
+                    }
+                    for j in range(self.doc_offsets[i], self.doc_offsets[i + 1])
+                ]
+            )
+        return token_tag_lists
+
+    def as_arrays(self, classes: List[str]) -> List[Dict[str, np.ndarray]]:
+        """
+        Args:
+            classes: e.g. ["O", "TAG"], the returned tag ids refer to
+
+        Returns:
+            prediction_arrays: [list] w/ one [dict] for each document, e.g. [
+                {"char_start": np.array([0]), "char_end": np.array([16]), "tag_id": np.array([1])},
+                ..
+            ]
+        """
+        if len(self.texts) == 0:
+            return []
+        tag2id = {tag: i for i, tag in enumerate(classes)}
+        class_mapping = np.array(
+            [tag2id.get(tag, -1) for tag in self.classes], dtype=np.int64
+        )
+        tag_id = class_mapping[self.tag_id]
+        assert np.all(tag_id >= 0), f"ERROR! classes = {classes} incomplete."
+        split_indices = self.doc_offsets[1:-1]
+        return [
+            {
+                "char_start": char_start,
+                "char_end": char_end,
+                "tag_id": _tag_id,
+            }
+            for char_start, char_end, _tag_id in zip(
+                np.split(self.char_start, split_indices),
+                np.split(self.char_end, split_indices),
+                np.split(tag_id, split_indices),
+            )
+        ]
+
+    ####################################################################################################################
+    # MAIN METHODS
+    ####################################################################################################################
+    def merge_tokens_to_words(self) -> None:
+        """
+        discard tokens that are not first token of a word, see TokenTags.merge_tokens_to_words()
+
+        Changed Attr:
+            char_start, char_end, tag_id, doc_offsets (tokens -> words)
+            level: 'word'
+        """
+        continued = self._same_document()
+        continued[1:] &= self.char_start[1:] == self.char_end[:-1]
+
+        keep = np.flatnonzero(~continued)
+        last = np.append(keep[1:], len(continued)) - 1  # last token of each word
+
+        self.char_start = self.char_start[keep]
+        self.char_end = self.char_end[last]
+        self.token_start = self.token_start[keep]
+        self.token_end = self.token_end[last]
+        self.tag_id = self.tag_id[keep]
+        self.merged = self.merged[keep]
+        self.doc_offsets = np.searchsorted(keep, self.doc_offsets)
+        self.level = "word"
+
+    def unpretokenize(self, _pretokenization_offsets: np.ndarray) -> None:
+        """
+        revert pretokenization using pretokenization offsets, see TokenTags.unpretokenize()
+
+        Args:
+            _pretokenization_offsets: [np array] of shape [number_of_tokens, 2], e.g. np.array([[0, 4], [4, 5]])
+
+        Changed Attr:
+            char_start, char_end
+        """
+        assert len(self.tag_id) == len(_pretokenization_offsets), (
+            f"ERROR! #tag_id = {len(self.tag_id)} != "
+            f"#pretokenization_offsets = {len(_pretokenization_offsets)}"
+        )
+        if len(self.tag_id):
+            self.char_start = _pretokenization_offsets[:, 0].astype(np.int64)
+            self.char_end = _pretokenization_offsets[:, 1].astype(np.int64)
+
+    def merge_tokens_to_entities(self, original_texts: List[str]) -> None:
+        """
+        merge tokens that belong together and discard tokens with tag 'O', see TokenTags.merge_tokens_to_entities()
+
+        Args:
+            original_texts: [list] of [str], one for each document, e.g. ['example sentence.']
+
+        Changed Attr:
+            char_start, char_end, tag_id, doc_offsets (tokens -> entities)
+            classes: plain classes, e.g. ["O", "TAG"]
+            level: 'entity'
+        """
+        assert len(original_texts) == len(
+            self.texts
+        ), f"ERROR! #original_texts = {len(original_texts)} != #texts = {len(self.texts)}"
+        prefix, begin_key, continuation_key = self._parse_classes()
+        same_document = self._same_document()
+
+        if self.scheme == "plain":
+            # runs of identical tags (except O)
+            is_entity = prefix[self.tag_id] != PREFIX_O
+            continued = np.zeros(len(self.tag_id), dtype=bool)
+            continued[1:] = (
+                same_document[1:]
+                & is_entity[1:]
+                & (self.tag_id[1:] == self.tag_id[:-1])
+            )
+            starts = is_entity & ~continued
+        elif self.scheme in ["bio", "bilou"]:
+            # B-* followed by I-* (& L-* for bilou) of the same class; U-* on its own
+            token_prefix = prefix[self.tag_id]
+            continuation_prefixes = (
+                [PREFIX_I] if self.scheme == "bio" else [PREFIX_I, PREFIX_L]
+            )
+            previous_key = np.where(
+                token_prefix == PREFIX_B,
+                begin_key[self.tag_id],
+                continuation_key[self.tag_id],
+            )
+            linked = np.zeros(len(self.tag_id), dtype=bool)
+            linked[1:] = (
+                same_document[1:]
+                & np.isin(token_prefix[1:], continuation_prefixes)
+                & np.isin(token_prefix[:-1], [PREFIX_B, PREFIX_I])
+                & (continuation_key[self.tag_id[1:]] == previous_key[:-1])
+            )
+            # a chain of linked tokens belongs to an entity only if it is anchored at a B-* token
+            indices = np.arange(len(self.tag_id))
+            anchor = np.maximum.accumulate(np.where(linked, 0, indices))
+            continued = linked & (token_prefix[anchor] == PREFIX_B)
+            starts = np.isin(token_prefix, [PREFIX_B, PREFIX_U])
+        else:
+            raise Exception(
+                f"ERROR! merge tokens to entities not implemented for scheme = {self.scheme}."
+            )
+
+        continued_next = np.append(continued[1:], False)
+        start_indices = np.flatnonzero(starts)
+        end_indices = np.flatnonzero((starts | continued) & ~continued_next)
+        assert len(start_indices) == len(
+            end_indices
+        ), f"ERROR! #entity starts = {len(start_indices)} != #entity ends = {len(end_indices)}"
+
+        # entity classes
+        entity_classes = list(
+            dict.fromkeys(
+                ["O"]
+                + [_class.split("-")[-1] for _class in self.classes if _class != "O"]
+            )
+        )
+        entity2id = {_class: i for i, _class in enumerate(entity_classes)}
+        class_mapping = np.array(
+            [entity2id[_class.split("-")[-1]] for _class in self.classes],
+            dtype=np.int64,
+        )
+
+        self.char_start = self.char_start[start_indices]
+        self.char_end = self.char_end[end_indices]
+        self.token_start = self.token_start[start_indices]
+        self.token_end = self.token_end[start_indices]
+        self.tag_id = class_mapping[self.tag_id[start_indices]]
+        self.merged = end_indices > start_indices
+        self.doc_offsets = np.searchsorted(start_indices, self.doc_offsets)
+        self.classes = entity_classes
+        self.original_texts = original_texts
+        self.level = "entity"
+
+    ####################################################################################################################
+    # HELPER
+    ####################################################################################################################
+    def _same_document(self) -> np.ndarray:
+        """
+        Returns:
+            same_document: [np array] of shape [number_of_tokens],
+                           True if the token belongs to the same document as the previous token
+        """
+        same_document = np.ones(len(self.tag_id), dtype=bool)
+        same_document[
+            self.doc_offsets[:-1][self.doc_offsets[:-1] < len(self.tag_id)]
+        ] = False
+        return same_document
+
+    def _parse_classes(self):
+        """
+        Returns:
+            prefix: [np array] w/ prefix code for each class, e.g. PREFIX_B for "B-PER"
+            begin_key: [np array] w/ key of the plain class, as used by B-* tags (split("-")[-1])
+            continuation_key: [np array] w/ key of the plain class, as used by I-* & L-* tags ([2:])
+        """
+        keys: Dict[str, int] = dict()
+        prefix, begin_key, continuation_key = list(), list(), list()
+        for _class in self.classes:
+            if _class == "O":
+                prefix.append(PREFIX_O)
+            elif self.scheme == "plain":
+                prefix.append(PREFIX_OTHER)
+            else:
+                prefix.append(PREFIXES.get(_class[:2], PREFIX_OTHER))
+            begin_key.append(keys.setdefault(_class.split("-")[-1], len(keys)))
+            continuation_key.append(
+                keys.setdefault(_class[2:], len(keys)) if len(_class) > 2 else -1
+            )
+        return (
+            np.array(prefix, dtype=np.int64),
+            np.array(begin_key, dtype=np.int64),
+            np.array(continuation_key, dtype=np.int64),
+        )
@@ -1,12 +1,12 @@
 import json
-import pandas as pd
 
+from nerblackbox.modules.ner_training.data_preprocessing.tools.dynamic_padding import (
+    LengthGroupedSampler,
+    collate_dynamic_padding,
+)
 from nerblackbox.modules.ner_training.data_preprocessing.tools.encodings_dataset import (
     EncodingsDataset,
 )
-from nerblackbox.modules.ner_training.data_preprocessing.tools.csv_reader import (
-    CsvReader,
-)
 from nerblackbox.modules.ner_training.data_preprocessing.tools.input_example import (
     InputExample,
 )
@@ -14,14 +14,13 @@ from nerblackbox.modules.ner_training.data_preprocessing.tools.input_examples_to
     InputExamplesToTensors,
 )
 from nerblackbox.modules.ner_training.data_preprocessing.tools.utils import (
+    Encodings,
     InputExamples,
 )
 from nerblackbox.modules.ner_training.annotation_tags.annotation import Annotation
 from nerblackbox.modules.ner_training.logging.default_logger import DefaultLogger
 from nerblackbox.tests.utils import PseudoDefaultLogger
-from nerblackbox.modules.utils.util_functions import get_dataset_path
 from torch.utils.data import DataLoader, Sampler, RandomSampler, SequentialSampler
-from pkg_resources import resource_filename
 from copy import deepcopy
 from os.path import join, isfile
 from typing import List, Dict, Tuple, Optional, Any, Union
@@ -51,6 +50,7 @@ class DataPreprocessor:
         self.pretokenized: Optional[
             bool
         ] = None  # whether dataset is pretokenized (csv) or not (jsonl)
+        self.input_examples_to_tensors: Optional[InputExamplesToTensors] = None
 
     def get_input_examples_train(
         self,
@@ -72,11 +72,12 @@ class DataPreprocessor:
             input_examples:          [dict] w/ keys = 'train', 'val', 'test' & values = [list] of [InputExample]
             annotation:              [Annotation] instance
         """
-        if dataset_name is None:
-            dataset_path = resource_filename("nerblackbox", "tests/test_data")
-        else:
-            dataset_path = get_dataset_path(dataset_name)
+        # imported here, as pandas & omegaconf are not needed for inference
+        from nerblackbox.modules.ner_training.data_preprocessing.tools.csv_reader import (
+            CsvReader,
+        )
 
+        dataset_path = self.get_dataset_path(dataset_name)
         self.pretokenized = self._check_if_data_is_pretokenized(dataset_path)
         if not self.pretokenized:
             self._pretokenize(
@@ -174,6 +175,7 @@ class DataPreprocessor:
         input_examples: Dict[str, InputExamples],
         annotation_classes: List[str],
         batch_size: int,
+        **kwargs_dataloader: Any,
     ) -> Tuple[Dict[str, DataLoader], Dict[str, List[int]]]:
         """
         - turn input_examples into dataloader
@@ -183,6 +185,7 @@ class DataPreprocessor:
                                           values = [list] of [InputExample]
             annotation_classes: [list] of tags present in the dataset, e.g. ['O', 'PER', ..]
             batch_size:         [int]
+            kwargs_dataloader:  optional arguments for encodings_to_dataloader(), e.g. num_workers=2
 
         Returns:
             _dataloader:    [dict] w/ keys = ['train', 'val', 'test'] or ['predict'] &
@@ -194,28 +197,87 @@ class DataPreprocessor:
                                        means that the first two slices belong to the first input example (0->2),
                                        while the third slice belongs to the second input example (2->3).
         """
+        _encodings, _offsets = self.to_encodings(input_examples, annotation_classes)
+        _dataloader = self.encodings_to_dataloader(
+            _encodings, batch_size, **kwargs_dataloader
+        )
+        return _dataloader, _offsets
+
+    def to_encodings(
+        self,
+        input_examples: Dict[str, InputExamples],
+        annotation_classes: List[str],
+    ) -> Tuple[Dict[str, Encodings], Dict[str, List[int]]]:
+        """
+        - turn input_examples into encodings
+
+        Args:
+            input_examples:     [dict] w/ keys = ['train', 'val', 'test'] or ['predict'] &
+                                          values = [list] of [InputExample]
+            annotation_classes: [list] of tags present in the dataset, e.g. ['O', 'PER', ..]
+
+        Returns:
+            _encodings:     [dict] w/ keys = ['train', 'val', 'test'] or ['predict'] &
+                                      values = [Encodings]
+            _offsets:        [dict] w/ keys = ['train', 'val', 'test'] or ['predict'] &
+                                       values = [List] of [int], see to_dataloader()
+        """
         # input_example_to_tensors
-        input_examples_to_tensors = InputExamplesToTensors(
-            self.tokenizer,
-            max_seq_length=self.max_seq_length,
-            annotation_classes_tuple=tuple(annotation_classes),
-            default_logger=self.default_logger,
+        input_examples_to_tensors = self.get_input_examples_to_tensors(
+            annotation_classes
         )
 
-        _dataloader = dict()
+        _encodings = dict()
         _offsets = dict()
         for phase in input_examples.keys():
             self.default_logger.log_info(
                 f"[before preprocessing] {phase.ljust(5)} data: {len(input_examples[phase])} examples"
             )
-            encodings, _offsets_phase = input_examples_to_tensors(
+            _encodings[phase], _offsets[phase] = input_examples_to_tensors(
                 input_examples[phase], predict=phase == "predict"
             )
-            _offsets[phase] = _offsets_phase
 
+        return _encodings, _offsets
+
+    def encodings_to_dataloader(
+        self,
+        encodings: Dict[str, Encodings],
+        batch_size: int,
+        dynamic_padding: bool = False,
+        num_workers: int = 0,
+        pin_memory: bool = False,
+        prefetch_factor: int = 2,
+        persistent_workers: bool = False,
+    ) -> Dict[str, DataLoader]:
+        """
+        - turn encodings into dataloader
+
+        Args:
+            encodings:          [dict] w/ keys = ['train', 'val', 'test'] or ['predict'] &
+                                          values = [Encodings]
+            batch_size:         [int]
+            dynamic_padding:    [bool] if True, the train dataloader groups samples of similar length into batches
+                                       and pads each batch only to its longest sample (instead of max_seq_length).
+                                       val/test/predict batches are always padded to max_seq_length.
+            num_workers:        [int] number of worker processes for data loading. 0 = main process
+            pin_memory:         [bool] if True, batches are copied into page-locked memory (faster transfer to gpu)
+            prefetch_factor:    [int] number of batches loaded in advance by each worker (if num_workers > 0)
+            persistent_workers: [bool] if True, workers are kept alive across epochs (if num_workers > 0)
+
+        Returns:
+            _dataloader:    [dict] w/ keys = ['train', 'val', 'test'] or ['predict'] &
+                                      values = [torch Dataloader]
+        """
+        kwargs_workers: Dict[str, Any] = dict()
+        if num_workers > 0:  # not allowed by torch for num_workers = 0
+            kwargs_workers["prefetch_factor"] = prefetch_factor
+            kwargs_workers["persistent_workers"] = persistent_workers
+
+        _dataloader = dict()
+        for phase in encodings.keys():
             # dataloader
             data = EncodingsDataset(
-                encodings=encodings
+                encodings=encodings[phase]
             )  # data[j] = 4 torch tensors corresponding to EncodingKeys
             if self.default_logger:
                 self.default_logger.log_info(
@@ -229,7 +291,14 @@ class DataPreprocessor:
                 "predict",
             ], f"ERROR! phase = {phase} unknown."
             sampler: Optional[Sampler]
-            if phase == "train":
+            collate_fn = None
+            if phase == "train" and dynamic_padding:
+                sampler = LengthGroupedSampler(
+                    encodings[phase]["attention_mask"].sum(dim=1).tolist(),
+                    batch_size=batch_size,
+                )
+                collate_fn = collate_dynamic_padding
+            elif phase == "train":
                 sampler = RandomSampler(data)
             elif phase in ["val", "test"]:
                 sampler = SequentialSampler(data)
@@ -240,11 +309,61 @@ class DataPreprocessor:
                 data,
                 sampler=sampler,
                 batch_size=batch_size,
-                num_workers=0,  # num_workers=1, pin_memory=True
+                collate_fn=collate_fn,
+                num_workers=num_workers,
+                pin_memory=pin_memory,
+                **kwargs_workers,
                 # see https://pytorch-lightning.readthedocs.io/en/stable/benchmarking/performance.html
             )
 
-        return _dataloader, _offsets
+        return _dataloader
+
+    def get_input_examples_to_tensors(
+        self, annotation_classes: List[str], stride: int = 0
+    ) -> InputExamplesToTensors:
+        """
+        - get InputExamplesToTensors instance for annotation_classes
+        - the instance is created once and reused as long as annotation_classes and stride do not change
+
+        Args:
+            annotation_classes: [list] of tags present in the dataset, e.g. ['O', 'PER', ..]
+            stride: number of overlapping tokens between consecutive slices of a long input example
+
+        Returns:
+            input_examples_to_tensors: [InputExamplesToTensors]
+        """
+        annotation_classes_tuple = tuple(annotation_classes)
+        if (
+            self.input_examples_to_tensors is None
+            or self.input_examples_to_tensors.annotation_classes_tuple
+            != annotation_classes_tuple
+            or self.input_examples_to_tensors.stride != stride
+        ):
+            self.input_examples_to_tensors = InputExamplesToTensors(
+                self.tokenizer,
+                max_seq_length=self.max_seq_length,
+                annotation_classes_tuple=annotation_classes_tuple,
+                default_logger=self.default_logger,
+                stride=stride,
+            )
+        return self.input_examples_to_tensors
+
+    @staticmethod
+    def get_dataset_path(dataset_name: Optional[str] = None) -> str:
+        """
+        Args:
+            dataset_name: [str], e.g. 'suc'. if None, the test data of the package is used
+
+        Returns:
+            dataset_path: path to dataset directory
+        """
+        from pkg_resources import resource_filename
+        from nerblackbox.modules.utils.util_functions import get_dataset_path
+
+        if dataset_name is None:
+            return resource_filename("nerblackbox", "tests/test_data")
+        else:
+            return get_dataset_path(dataset_name)
 
     ####################################################################################################################
     # HELPER
@@ -409,6 +528,8 @@ class DataPreprocessor:
             data_pretokenized, _ = self._pretokenize_data(data)
 
             # 3. write csv files "pretokenized_{phase}.csv"
+            import pandas as pd
+
             df = pd.DataFrame(data_pretokenized)
             file_path = join(dataset_path, f"pretokenized_{phase}.csv")
             df.to_csv(file_path, sep="\t", header=False, index=False)
@@ -1,5 +1,5 @@
 import os
-from typing import List, Dict
+from typing import List, Dict, Iterator
 import pandas as pd
 from nerblackbox.modules.ner_training.data_preprocessing.tools.input_example import (
     InputExample,
@@ -21,6 +21,7 @@ class CsvReader:
         do_lower_case,
         default_logger=None,
         csv_file_separator="\t",
+        lazy=False,
     ):
         """
         :param path:               [str] to folder that contains dataset csv files (train, val, test)
@@ -29,6 +30,8 @@ class CsvReader:
         :param do_lower_case:      [bool]
         :param default_logger:     []
         :param csv_file_separator: [str], for datasets' csv files, e.g. '\t'
+        :param lazy:               [bool] if True, the csv files are not read at initialization.
+                                          use get_input_examples_in_chunks() to read them chunk by chunk.
         """
         # input arguments
         self.path = path
@@ -46,7 +49,8 @@ class CsvReader:
         self.annotation_classes: List[str] = list()
 
         # process
-        self._process()
+        if not lazy:
+            self._process()
 
     ####################################################################################################################
     # PUBLIC METHODS
@@ -60,6 +64,22 @@ class CsvReader:
         """
         return self._create_list_of_input_examples(self.data[phase], phase)
 
+    def get_input_examples_in_chunks(
+        self, phase, chunk_size
+    ) -> Iterator[List[InputExample]]:
+        """
+        reads the csv file for specified phase lazily and yields lists of input examples
+        --------------------------------------------------------------------------------
+        :param phase:      [str], e.g. 'train', 'val', 'test'
+        :param chunk_size: [int] maximum number of input examples per chunk, e.g. 1000
+        :return: [iterator] of [list] of [InputExample]
+        """
+        offset = 0
+        for df in self._read_csv(self._get_path(phase), chunk_size=chunk_size):
+            examples = self._create_list_of_input_examples(df, phase, offset=offset)
+            offset += len(examples)
+            yield examples
+
     ####################################################################################################################
     # PRIVATE METHODS
     ####################################################################################################################
@@ -76,14 +96,7 @@ class CsvReader:
         annotation_classes_found: List[str] = list()
         for phase in ["train", "val", "test"]:
             # data
-            self.data[phase] = self._read_csv(
-                os.path.join(
-                    self.path,
-                    f"{phase}.csv"
-                    if self.pretokenized
-                    else f"pretokenized_{phase}.csv",
-                )
-            )
+            self.data[phase] = self._read_csv(self._get_path(phase))
 
             # tag list
             annotation_classes_phase = list(
@@ -105,7 +118,17 @@ class CsvReader:
                 f"> tag list complete:      {self.annotation_classes}"
             )
 
-    def _read_csv(self, path: str) -> pd.DataFrame:
+    def _get_path(self, phase: str) -> str:
+        """
+        :param phase: [str], e.g. 'train', 'val', 'test'
+        :return: [str] path to csv file of phase
+        """
+        return os.path.join(
+            self.path,
+            f"{phase}.csv" if self.pretokenized else f"pretokenized_{phase}.csv",
+        )
+
+    def _read_csv(self, path: str, chunk_size=None):
         """
         read csv using pandas.
 
@@ -113,19 +136,27 @@ class CsvReader:
         - have two columns seperated by self.seperator
         - not have a header with column names
         ----------------------------------------------
-        :param path: [str]
+        :param path:       [str]
+        :param chunk_size: [optional, int] if specified, an iterator of dataframes with chunk_size rows is returned
         :return: [pandas dataframe]
         """
         return pd.read_csv(
-            path, names=["tags", "text"], header=None, sep=self.csv_file_separator
+            path,
+            names=["tags", "text"],
+            header=None,
+            sep=self.csv_file_separator,
+            chunksize=chunk_size,
         )
 
-    def _create_list_of_input_examples(self, df, set_type) -> List[InputExample]:
+    def _create_list_of_input_examples(
+        self, df, set_type, offset=0
+    ) -> List[InputExample]:
         """
         create list of input examples from pandas dataframe created from _read_csv() method
         -----------------------------------------------------------------------------------
         :param df:                 [pandas dataframe] with columns 'tags', 'text'
         :param set_type:           [str], e.g. 'train', 'val', 'test'
+        :param offset:             [int] index of the first row of df in the csv file (used for guid)
         :changed attr: token_count [int] total number of tokens in df
         :return: [list] of [InputExample]
         """
@@ -134,7 +165,7 @@ class CsvReader:
         examples = []
         for i, row in enumerate(df.itertuples()):
             # input_example
-            guid = f"{set_type}-{i}"
+            guid = f"{set_type}-{offset + i}"
             text = row.text.lower() if self.do_lower_case else row.text
             tags = row.tags
 
@@ -0,0 +1,81 @@
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import torch
+from torch.utils.data import Sampler
+from torch.utils.data.dataloader import default_collate
+
+
+class LengthGroupedSampler(Sampler[int]):
+    r"""
+    random sampler that groups samples of similar length into the same batch.
+
+    the samples are randomly permuted and split into buckets of bucket_size batches.
+    within each bucket, the samples are sorted by length and chunked into batches.
+    finally, the order of the batches is shuffled (the last batch is kept at the end if it is incomplete).
+    used together with collate_dynamic_padding, this minimizes the amount of padding per batch.
+    """
+
+    def __init__(
+        self,
+        lengths: List[int],
+        batch_size: int,
+        bucket_size: int = 50,
+        generator: Optional[torch.Generator] = None,
+    ):
+        """
+        :param lengths:     [list] of [int], number of (non-padding) tokens for each sample
+        :param batch_size:  [int], e.g. 16. needs to be equal to the batch_size of the DataLoader
+        :param bucket_size: [int], e.g. 50. number of batches per bucket
+        :param generator:   [torch Generator], optional
+        """
+        self.lengths = np.asarray(lengths, dtype=np.int64)
+        self.batch_size = batch_size
+        self.bucket_size = bucket_size
+        self.generator = generator
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def __iter__(self) -> Iterator[int]:
+        if self.generator is None:
+            seed = int(torch.empty((), dtype=torch.int64).random_().item())
+            generator = torch.Generator()
+            generator.manual_seed(seed)
+        else:
+            generator = self.generator
+
+        permutation = torch.randperm(len(self.lengths), generator=generator).numpy()
+        samples_per_bucket = self.batch_size * self.bucket_size
+        batches: List[List[int]] = list()
+        for i in range(0, len(permutation), samples_per_bucket):
+            bucket = permutation[i : i + samples_per_bucket]
+            bucket = bucket[np.argsort(-self.lengths[bucket], kind="stable")]
+            batches.extend(
+                bucket[j : j + self.batch_size].tolist()
+                for j in range(0, len(bucket), self.batch_size)
+            )
+
+        # only the very last batch can be incomplete, it needs to stay at the end
+        last_batch = [batches.pop()] if len(batches[-1]) < self.batch_size else []
+        batch_order = torch.randperm(len(batches), generator=generator).tolist()
+        for batch in [batches[index] for index in batch_order] + last_batch:
+            yield from batch
+
+
+def collate_dynamic_padding(
+    batch: List[Dict[str, torch.Tensor]]
+) -> Dict[str, torch.Tensor]:
+    r"""
+    collate function that truncates the (max_seq_length) padded samples to the longest sample in the batch
+
+    Args:
+        batch: [list] of samples = Dict with keys = subset of EncodingsKeys, values = 1D torch tensor of length max_seq_length
+
+    Returns:
+        batch: Dict with keys = subset of EncodingsKeys, values = 2D torch tensor of shape [batch_size, seq_length]
+               where seq_length <= max_seq_length is the number of non-padding tokens of the longest sample
+    """
+    _batch = default_collate(batch)
+    seq_length = int(_batch["attention_mask"].sum(dim=1).max())
+    return {key: value[:, :seq_length].contiguous() for key, value in _batch.items()}
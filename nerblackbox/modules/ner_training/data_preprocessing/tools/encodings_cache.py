@@ -0,0 +1,233 @@
+import hashlib
+import json
+import os
+import shutil
+from os.path import join, isdir, isfile
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import torch
+
+from nerblackbox.modules.ner_training.data_preprocessing.tools.utils import (
+    Encodings,
+)
+from nerblackbox.modules.ner_training.logging.default_logger import DefaultLogger
+
+CACHE_VERSION = 1
+DATASET_FILES = [
+    f"{phase}.{extension}"
+    for phase in ["train", "val", "test"]
+    for extension in ["csv", "jsonl"]
+]
+META_FILE_NAME = "meta.json"
+
+CachedEncodings = Tuple[Dict[str, Encodings], Dict[str, List[int]], List[str]]
+
+
+class EncodingsCache:
+    r"""
+    persistent, content-addressed cache of the encodings (and offsets) of the train, val & test data.
+
+    each entry is a directory cache_dir/<key> that contains one .npy file per phase and encodings key,
+    which is memory-mapped (zero-copy) when it is loaded.
+    the key is a hash of everything that the encodings depend on (dataset files, tokenizer, settings).
+    hence, an entry never needs to be invalidated. least recently used entries are evicted if the size
+    of the cache exceeds max_size.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_size: int = 10 * 1024**3,
+        default_logger: Optional[DefaultLogger] = None,
+    ):
+        """
+        :param cache_dir:      [str] e.g. '<DATA_DIR>/cache/encodings'
+        :param max_size:       [int] maximum size of the cache in bytes
+        :param default_logger: [DefaultLogger]
+        """
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.default_logger = default_logger
+
+    @staticmethod
+    def get_key(dataset_path: str, tokenizer, **settings: Any) -> str:
+        r"""
+        Args:
+            dataset_path: path to dataset directory
+            tokenizer: [transformers Tokenizer]
+            settings: everything else that the encodings depend on, e.g. max_seq_length = 128, uncased = False
+
+        Returns:
+            key: e.g. '3f7c0a..'
+        """
+        dataset_hashes = {
+            dataset_file: _hash_file(join(dataset_path, dataset_file))
+            for dataset_file in DATASET_FILES
+            if isfile(join(dataset_path, dataset_file))
+        }
+        if hasattr(tokenizer, "backend_tokenizer"):  # fast tokenizer
+            tokenizer_str = tokenizer.backend_tokenizer.to_str()
+        else:
+            tokenizer_str = json.dumps(tokenizer.get_vocab(), sort_keys=True)
+        content = {
+            "version": CACHE_VERSION,
+            "dataset": dataset_hashes,
+            "tokenizer_name": tokenizer.name_or_path,
+            "tokenizer": hashlib.sha256(tokenizer_str.encode("utf-8")).hexdigest(),
+            "settings": settings,
+        }
+        return hashlib.sha256(
+            json.dumps(content, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+
+    def load(self, key: str) -> Optional[CachedEncodings]:
+        r"""
+        Args:
+            key: e.g. '3f7c0a..'
+
+        Returns:
+            None if key is not in the cache (miss), else (hit)
+            encodings: [dict] w/ keys = 'train', 'val', 'test' & values = [Encodings] w/ memory-mapped tensors
+            offsets: [dict] w/ keys = 'train', 'val', 'test' & values = [List] of [int]
+            annotation_classes: [list] of tags present in the dataset, e.g. ['O', 'PER', ..]
+        """
+        entry_dir = join(self.cache_dir, key)
+        meta_path = join(entry_dir, META_FILE_NAME)
+        if not isfile(meta_path):
+            self._log(f"> encodings cache miss: {key[:12]}")
+            return None
+
+        with open(meta_path, "r") as f:
+            meta = json.load(f)
+        encodings: Dict[str, Encodings] = dict()
+        offsets: Dict[str, List[int]] = dict()
+        for phase in meta["phases"]:
+            # copy-on-write memory map, such that the tensors are writable w/o modifying the cache
+            encodings[phase] = {
+                encodings_key: torch.from_numpy(
+                    np.load(
+                        join(entry_dir, f"{phase}_{encodings_key}.npy"),
+                        mmap_mode="c",
+                    )
+                )
+                for encodings_key in meta["encodings_keys"]
+            }
+            offsets[phase] = np.load(join(entry_dir, f"{phase}_offsets.npy")).tolist()
+        os.utime(meta_path)  # last used
+        self._log(
+            f"> encodings cache hit:  {key[:12]} ({meta['size'] / 1024**2:.1f} MB)"
+        )
+        return encodings, offsets, meta["annotation_classes"]
+
+    def save(
+        self,
+        key: str,
+        encodings: Dict[str, Encodings],
+        offsets: Dict[str, List[int]],
+        annotation_classes: List[str],
+    ) -> None:
+        r"""
+        write the entry to a temporary directory first, such that concurrent runs never see partial entries.
+        evict least recently used entries afterwards if the cache exceeds max_size.
+
+        Args:
+            key: e.g. '3f7c0a..'
+            encodings: [dict] w/ keys = 'train', 'val', 'test' & values = [Encodings]
+            offsets: [dict] w/ keys = 'train', 'val', 'test' & values = [List] of [int]
+            annotation_classes: [list] of tags present in the dataset, e.g. ['O', 'PER', ..]
+        """
+        entry_dir = join(self.cache_dir, key)
+        if isdir(entry_dir):
+            return
+        entry_dir_tmp = f"{entry_dir}.{os.getpid()}.tmp"
+        os.makedirs(entry_dir_tmp, exist_ok=True)
+
+        encodings_keys: List[str] = list()
+        for phase in encodings.keys():
+            encodings_keys = list(encodings[phase].keys())
+            for encodings_key in encodings_keys:
+                np.save(
+                    join(entry_dir_tmp, f"{phase}_{encodings_key}.npy"),
+                    encodings[phase][encodings_key].numpy(),
+                )
+            np.save(
+                join(entry_dir_tmp, f"{phase}_offsets.npy"),
+                np.array(offsets[phase], dtype=np.int64),
+            )
+        meta: Dict[str, Any] = {
+            "phases": list(encodings.keys()),
+            "encodings_keys": encodings_keys,
+            "annotation_classes": annotation_classes,
+            "size": _get_size(entry_dir_tmp),
+        }
+        with open(join(entry_dir_tmp, META_FILE_NAME), "w") as f:
+            json.dump(meta, f)
+
+        try:
+            os.rename(entry_dir_tmp, entry_dir)
+        except OSError:  # entry was written by a concurrent run
+            shutil.rmtree(entry_dir_tmp, ignore_errors=True)
+            return
+        self._log(
+            f"> encodings cache save: {key[:12]} ({meta['size'] / 1024**2:.1f} MB)"
+        )
+        self._evict(keep=key)
+
+    ####################################################################################################################
+    # HELPER
+    ####################################################################################################################
+    def _evict(self, keep: str) -> None:
+        r"""
+        remove least recently used entries (except keep) until the size of the cache is at most max_size
+
+        Args:
+            keep: key of the entry that is not removed
+        """
+        entries = list()
+        for key in os.listdir(self.cache_dir):
+            meta_path = join(self.cache_dir, key, META_FILE_NAME)
+            if isfile(meta_path):
+                entries.append(
+                    (
+                        os.path.getmtime(meta_path),
+                        key,
+                        _get_size(join(self.cache_dir, key)),
+                    )
+                )
+
+        size = sum(entry[2] for entry in entries)
+        for _, key, entry_size in sorted(entries):
+            if size <= self.max_size:
+                break
+            if key != keep:
+                shutil.rmtree(join(self.cache_dir, key), ignore_errors=True)
+                size -= entry_size
+                self._log(f"> encodings cache evict: {key[:12]}")
+
+    def _log(self, message: str) -> None:
+        if self.default_logger:
+            self.default_logger.log_info(message)
+
+
+def _hash_file(path: str) -> str:
+    r"""
+    Returns:
+        sha256 hex digest of the file content
+    """
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024**2), b""):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def _get_size(directory: str) -> int:
+    r"""
+    Returns:
+        total size of the files in directory (in bytes)
+    """
+    return sum(
+        os.path.getsize(join(directory, file_name))
+        for file_name in os.listdir(directory)
+    )
@@ -1,12 +1,13 @@
 import torch
 import numpy as np
-from typing import List, Tuple, Dict, Any
+from typing import List, Tuple, Dict
 from nerblackbox.modules.ner_training.data_preprocessing.tools.input_example import (
     InputExample,
 )
 from nerblackbox.modules.ner_training.data_preprocessing.tools.utils import (
     Encodings,
     EncodingsKeys,
+    EncodingsKeysPredict,
 )
 
 
@@ -21,16 +22,27 @@ class InputExamplesToTensors:
         max_seq_length: int = 128,
         annotation_classes_tuple: tuple = ("O", "PER", "ORG"),
         default_logger=None,
+        stride: int = 0,
+        batch_size: int = 1000,
     ):
         """
         :param tokenizer:                [Tokenizer] used for tokenization and transformation to indices
         :param max_seq_length:           [int]
         :param annotation_classes_tuple: [tuple] of [str]
+        :param stride:                   [int] number of overlapping tokens between consecutive slices
+        :param batch_size:               [int] number of input examples that are tokenized in a single call
         """
+        assert 0 <= stride < max_seq_length - 2, (
+            f"ERROR! stride = {stride} needs to be >= 0 and "
+            f"smaller than max_seq_length - 2 = {max_seq_length - 2}"
+        )
         self.tokenizer = tokenizer
         self.max_seq_length = max_seq_length
         self.default_logger = default_logger
+        self.stride = stride
+        self.batch_size = batch_size
 
+        self.annotation_classes_tuple = annotation_classes_tuple
         self.tag2id = {tag: i for i, tag in enumerate(annotation_classes_tuple)}
         if self.default_logger:
             self.default_logger.log_debug("> tag2id:", self.tag2id)
@@ -51,127 +63,171 @@ class InputExamplesToTensors:
             key = attention_mask, value = [2D torch tensor], e.g. [[1,   1,   1,   1, .., 1,   1,   1, .., 1, 0, 0, 0, ..]]
             key = token_type_ids, value = [2D torch tensor], e.g. [[0,   0,   0,   0, .., 0,   1,   1, .., 1, 0, 0, 0, ..]]
             key = labels,         value = [2D torch tensor], e.g. [[1,   3,   3,   4, .., 2,   3,   3, .., 2, 0, 0, 0, ..]]
+            key = word_ids,       value = [2D torch tensor], e.g. [[-1,  0,   0,   1, .., -1, ..]] (only if predict)
 
             offsets: [List] of [int] which gives information on how the input_examples where slices,
             e.g. offsets = [0, 2, 3]
             means that the first two slices belong to the first input example (0->2),
             while the third slice belongs to the second input example (2->3).
         """
-        offsets: List[int] = [0]
+        encodings_keys = EncodingsKeysPredict if predict else EncodingsKeys
+        if len(input_examples) == 0:
+            return {key: torch.tensor([]) for key in encodings_keys}, [0]
+
+        # tokenize batches of input examples. each batch may result in more slices than input examples (overflow)
+        encodings_batches = [
+            self._transform_input_examples(
+                input_examples[i : i + self.batch_size], predict
+            )
+            for i in range(0, len(input_examples), self.batch_size)
+        ]
 
-        # encodings_single
-        encodings_single: Dict[str, List[Any]] = {key: list() for key in EncodingsKeys}
-        for input_example in input_examples:
-            _encodings = self._transform_input_example(input_example, predict)
-            offsets.append(offsets[-1] + len(_encodings["input_ids"]))
-            for key in _encodings.keys():
-                encodings_single[key].append(_encodings[key])
+        # offsets
+        nr_slices = np.concatenate([_nr_slices for _, _nr_slices in encodings_batches])
+        offsets: List[int] = [0] + np.cumsum(nr_slices).tolist()
 
-        # combine encodings_single -> encodings
-        encodings = {
-            key: torch.cat(encodings_single[key])
-            if len(encodings_single[key])
-            else torch.tensor([])
-            for key in encodings_single.keys()
+        # combine encodings_batches -> encodings (preallocated)
+        arrays = {
+            key: np.empty((offsets[-1], self.max_seq_length), dtype=np.int64)
+            for key in encodings_keys
         }
+        row = 0
+        for _encodings, _nr_slices in encodings_batches:
+            nr_slices_batch = int(_nr_slices.sum())
+            for key in encodings_keys:
+                arrays[key][row : row + nr_slices_batch] = _encodings[key]
+            row += nr_slices_batch
+        encodings = {key: torch.from_numpy(arrays[key]) for key in encodings_keys}
 
         return encodings, offsets
 
-    def _transform_input_example(
-        self, input_example: InputExample, predict: bool
-    ) -> Encodings:
+    def _transform_input_examples(
+        self, input_examples: List[InputExample], predict: bool
+    ) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
         """
-        - transform input_example to tensors of length self.max_seq_length
+        - transform input_examples to arrays of length self.max_seq_length, using a single (batched) tokenizer call
 
         Args:
-            input_example: [InputExample], with e.g. text = 'at arbetsförmedlingen'
-                                                     tags = '0 ORG'
+            input_examples: List[InputExample], with e.g. text = 'at arbetsförmedlingen'
+                                                          tags = '0 ORG'
             predict: if True,  map special tokens to    O tag_id for prediction (will not be used)
                      if False, map special tokens to -100 tag_id for train, val, test
 
         Returns:
-            encodings: [Encodings] with
-            key = input_ids,      value = [2D torch tensor], e.g. [[1, 567, 568, 569, .., 2, 611, 612, .., 2, 0, 0, 0, ..]]
-            key = attention_mask, value = [2D torch tensor], e.g. [[1,   1,   1,   1, .., 1,   1,   1, .., 1, 0, 0, 0, ..]]
-            key = token_type_ids, value = [2D torch tensor], e.g. [[0,   0,   0,   0, .., 0,   1,   1, .., 1, 0, 0, 0, ..]]
-            key = labels,         value = [2D torch tensor], e.g. [[1,   3,   3,   4, .., 2,   3,   3, .., 2, 0, 0, 0, ..]]
+            encodings: [dict] with keys as in __call__ and values = [2D np array] of shape (#slices, max_seq_length)
+            nr_slices: [1D np array] of shape (#input_examples), number of slices that each input example results in
         """
         ####################
         # A0. tokens_*, tags_*
         ####################
-        tokens_split_into_words = input_example.text.split()
-        tags_split_into_words = input_example.tags.split()
-        assert len(tokens_split_into_words) == len(
-            tags_split_into_words
-        ), f"ERROR! len(tokens) = {len(tokens_split_into_words)} is different from len(tags) = {len(tags_split_into_words)}"
+        tokens_split_into_words = [
+            input_example.text.split() for input_example in input_examples
+        ]
+        tags_split_into_words = [
+            input_example.tags.split() for input_example in input_examples
+        ]
+        for tokens, tags in zip(tokens_split_into_words, tags_split_into_words):
+            assert len(tokens) == len(
+                tags
+            ), f"ERROR! len(tokens) = {len(tokens)} is different from len(tags) = {len(tags)}"
 
-        encodings = self.tokenizer(
+        batch_encoding = self.tokenizer(
             tokens_split_into_words,
             padding="max_length",
             truncation=True,
             max_length=self.max_seq_length,
             is_split_into_words=True,
             return_offsets_mapping=True,
-            stride=0,
+            stride=self.stride,
             return_overflowing_tokens=True,
+            return_tensors="np",
         )
+        sample_mapping = batch_encoding["overflow_to_sample_mapping"]
+        nr_slices = np.bincount(sample_mapping, minlength=len(input_examples))
 
+        encodings = {
+            key: batch_encoding[key]
+            for key in ["input_ids", "attention_mask", "token_type_ids"]
+        }
+        word_ids = self._encode_word_ids(batch_encoding)
         encodings["labels"] = self._encode_tags(
-            tags_split_into_words, encodings.offset_mapping, predict
+            tags_split_into_words,
+            word_ids,
+            batch_encoding["offset_mapping"],
+            sample_mapping,
+            predict,
         )
-        keys = list(encodings.keys())
-        for key in keys:
-            if key in EncodingsKeys:
-                encodings[key] = torch.tensor(encodings[key])
-            else:
-                encodings.pop(key)
+        if predict:
+            encodings["word_ids"] = word_ids
 
-        return encodings
+        return encodings, nr_slices
 
     ####################################################################################################################
     # PRIVATE HELPER METHODS
     ####################################################################################################################
+    @staticmethod
+    def _encode_word_ids(encodings) -> np.ndarray:
+        """
+        Args:
+            encodings: [BatchEncoding] returned by a fast tokenizer, with one or more chunks (overflowing tokens)
+
+        Returns:
+            all_word_ids: [2D np array] of shape (#chunks, max_seq_length), e.g. [[-1, 0, 0, 1, 2, -1, -1, ..]]
+                          i.e. index of the word (in the input words) that each token belongs to,
+                          -1 for special tokens and padding
+        """
+        return np.array(
+            [
+                [
+                    -1 if word_id is None else word_id
+                    for word_id in encodings.word_ids(i)
+                ]
+                for i in range(len(encodings["input_ids"]))
+            ],
+            dtype=np.int64,
+        )
+
     def _encode_tags(
         self,
-        _tags_split_into_words: List[str],
-        all_offsets: List[List[Tuple[int, int]]],
+        _tags_split_into_words: List[List[str]],
+        all_word_ids: np.ndarray,
+        all_offsets: np.ndarray,
+        sample_mapping: np.ndarray,
         predict: bool,
-    ) -> List[List[int]]:
+    ) -> np.ndarray:
         """
+        - each token that is the first token of a word gets the tag id of the word,
+          all other tokens (special tokens, padding, subsequent tokens of a word) get the special tag id.
+
         Args:
-            _tags_split_into_words: ['at arbetsförmedlingen']
-            all_offsets: [chunks] with chunk = [(start_1, end_1), (start_2, end_2), ..], e.g. [[(0, 2), (2, 5), ..]
+            _tags_split_into_words: [tags] for each input example, e.g. [['O', 'ORG'], ['PER']]
+            all_word_ids: [2D np array] of shape (#chunks, max_seq_length), see _encode_word_ids()
+            all_offsets: [3D np array] of shape (#chunks, max_seq_length, 2), e.g. [[(0, 0), (0, 2), (2, 5), ..]]
+            sample_mapping: [1D np array] of shape (#chunks), index of the input example that each chunk belongs to
             predict: if True,  map special tokens to    O tag_id for prediction (will not be used)
                      if False, map special tokens to -100 tag_id for train, val, test
 
         Returns:
-            all_tag_ids: [chunk_tag_ids] with chunk_tag_ids = e.g. [-100, 3, -100, 4, 5, -100, ..]
+            all_tag_ids: [2D np array] of shape (#chunks, max_seq_length), e.g. [[-100, 3, -100, 4, 5, -100, ..]]
         """
-
-        tag_ids_split_into_words: List[int] = [
-            self.tag2id[tag] for tag in _tags_split_into_words
-        ]
-
         tag_id_special = 0 if predict else -100
 
-        index = 0
-        all_tag_ids = list()
-        for offsets in all_offsets:
-            # create an empty array of -100
-            arr_tag_ids: np.ndarray = np.ones(len(offsets), dtype=int) * tag_id_special
-            arr_offsets: np.ndarray = np.array(offsets)
-
-            # set labels whose first offset position is 0 and the second is not 0
-            nr_matches: int = len(
-                [elem for elem in arr_offsets if elem[0] == 0 and elem[1] != 0]
-            )
-            arr_tag_ids[
-                (arr_offsets[:, 0] == 0) & (arr_offsets[:, 1] != 0)
-            ] = tag_ids_split_into_words[index : index + nr_matches]
-            index += nr_matches
-
-            # convert
-            tag_ids: List[int] = list(arr_tag_ids)
-            all_tag_ids.append(tag_ids)
+        # tag ids of all words in the batch (+ tag_id_special at index -1), and the index of the first word of each input example
+        tag_ids_split_into_words: np.ndarray = np.array(
+            [self.tag2id[tag] for tags in _tags_split_into_words for tag in tags]
+            + [tag_id_special],
+            dtype=np.int64,
+        )
+        word_offsets: np.ndarray = np.cumsum(
+            [0] + [len(tags) for tags in _tags_split_into_words]
+        )
 
-        return all_tag_ids
+        # first token of a word: its offset starts at 0 (within the word) and is not empty.
+        # tokens that overlap with the previous chunk (stride) are mapped to the same word, as they have the same word id.
+        mask = (
+            (all_word_ids >= 0)
+            & (all_offsets[..., 0] == 0)
+            & (all_offsets[..., 1] != 0)
+        )
+        index = np.where(mask, word_offsets[sample_mapping][:, None] + all_word_ids, -1)
+        return tag_ids_split_into_words[index]
@@ -6,4 +6,5 @@ from nerblackbox.modules.ner_training.data_preprocessing.tools.input_example imp
 
 Encodings = Dict[str, torch.Tensor]
 EncodingsKeys = ["input_ids", "attention_mask", "token_type_ids", "labels"]
+EncodingsKeysPredict = EncodingsKeys + ["word_ids"]
 InputExamples = List[InputExample]
@@ -0,0 +1,214 @@
+from collections import defaultdict
+from itertools import product
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from seqeval.metrics.sequence_labeling import get_entities
+from seqeval.scheme import Entities, IOB2
+
+from nerblackbox.modules.ner_training.annotation_tags.tags import Tags
+
+EVALUATION_DICT = Dict[str, Dict[str, Dict[str, Optional[float]]]]
+
+
+class StreamingNerMetrics:
+    r"""
+    accumulates true positives, predicted and true entities per class chunk by chunk, and computes
+    precision, recall and f1 (micro & macro) on the entity level at the end.
+    memory consumption does not depend on the number of documents.
+
+    the results are identical to NerMetrics (strict mode, bio scheme) applied to all
+    documents at once, and to seqeval (default mode) for the "_seqeval" metrics.
+    the metrics on the token level are not computed, i.e. they are None.
+    """
+
+    failure_value = -1
+
+    def __init__(self):
+        # [class] -> [tp, pred, true]
+        self.counts_entity: Dict[str, List[int]] = defaultdict(lambda: [0, 0, 0])
+        self.counts_entity_seqeval: List[int] = [0, 0, 0]
+
+        # NerMetrics evaluates the concatenation of all documents, in which an entity may continue
+        # in the next document. hence, the trailing tokens that may belong to such an entity are carried over
+        self._carry_true: List[str] = list()
+        self._carry_pred: List[str] = list()
+
+        self.documents = 0
+
+    def update(
+        self, ground_truth: List[List[str]], predictions: List[List[str]]
+    ) -> None:
+        r"""
+        Args:
+            ground_truth: e.g. [["B-PER", "I-PER"], ["O", "B-ORG"]]
+            predictions: e.g. [["B-PER", "O"], ["O", "B-ORG"]]
+        """
+        assert len(ground_truth) == len(
+            predictions
+        ), f"ERROR! #ground_truth = {len(ground_truth)}, #predictions = {len(predictions)}"
+        self.documents += len(ground_truth)
+
+        # entity (seqeval, default mode): documents are evaluated separately
+        for i, count in enumerate(_count_entities_seqeval(ground_truth, predictions)):
+            self.counts_entity_seqeval[i] += count
+
+        true_flat = Tags(
+            [elem for sublist in ground_truth for elem in sublist]
+        ).convert_scheme(source_scheme="bio", target_scheme="bio")
+        pred_flat = Tags(
+            [elem for sublist in predictions for elem in sublist]
+        ).convert_scheme(source_scheme="bio", target_scheme="bio")
+        assert len(true_flat) == len(
+            pred_flat
+        ), f"ERROR! true_flat = {len(true_flat)}, #pred_flat = {len(pred_flat)}"
+
+        # entity (nerblackbox, strict mode): an entity can only continue with an I- tag.
+        # hence, all entities before the last position w/o I- tag (in both true and pred) are complete
+        true_flat = self._carry_true + true_flat
+        pred_flat = self._carry_pred + pred_flat
+        cut = 0
+        for position in range(len(true_flat) - 1, 0, -1):
+            if not true_flat[position].startswith("I-") and not pred_flat[
+                position
+            ].startswith("I-"):
+                cut = position
+                break
+        self._count_entities_strict(true_flat[:cut], pred_flat[:cut])
+        self._carry_true, self._carry_pred = true_flat[cut:], pred_flat[cut:]
+
+    def results(self) -> EVALUATION_DICT:
+        r"""
+        Returns:
+            evaluation_dict:
+                Dict with keys [label][level][metric]
+                where label in ['micro', 'macro'],
+                level in ['entity', 'token']
+                metric in ['precision', 'recall', 'f1', 'precision_seqeval', 'recall_seqeval', 'f1_seqeval']
+                and values = float between 0 and 1 (or None if not computed)
+        """
+        self._count_entities_strict(self._carry_true, self._carry_pred)
+        self._carry_true, self._carry_pred = list(), list()
+
+        labels = ["micro", "macro"]
+        metrics = ["precision", "recall", "f1"]
+        metrics_seqeval = [f"{metric}_seqeval" for metric in metrics]
+        levels = ["entity", "token"]
+        evaluation: EVALUATION_DICT = {
+            label: {
+                level: {metric: None for metric in metrics + metrics_seqeval}
+                for level in levels
+            }
+            for label in labels
+        }
+
+        results = self._compute(self.counts_entity)
+        for metric, label in product(metrics, labels):
+            evaluation[label]["entity"][metric] = results[f"{metric}_{label}"]
+
+        tp, pred, true = self.counts_entity_seqeval
+        precision = tp / pred if pred > 0 else 0.0
+        recall = tp / true if true > 0 else 0.0
+        evaluation["micro"]["entity"]["precision_seqeval"] = precision
+        evaluation["micro"]["entity"]["recall_seqeval"] = recall
+        evaluation["micro"]["entity"]["f1_seqeval"] = _f1(precision, recall)
+        return evaluation
+
+    ####################################################################################################################
+    # PRIVATE HELPER METHODS
+    ####################################################################################################################
+    def _count_entities_strict(
+        self, true_flat: List[str], pred_flat: List[str]
+    ) -> None:
+        if len(true_flat) == 0:
+            return
+        entities_true = Entities([true_flat], IOB2)
+        entities_pred = Entities([pred_flat], IOB2)
+        for type_name in entities_true.unique_tags | entities_pred.unique_tags:
+            entities_true_type = entities_true.filter(type_name)
+            entities_pred_type = entities_pred.filter(type_name)
+            self.counts_entity[type_name][0] += len(
+                entities_true_type & entities_pred_type
+            )
+            self.counts_entity[type_name][1] += len(entities_pred_type)
+            self.counts_entity[type_name][2] += len(entities_true_type)
+
+    def _compute(self, counts: Dict[str, List[int]]) -> Dict[str, float]:
+        r"""
+        same computation (incl. failure values) as NerMetrics.precision(), recall() & f1_score() on the entity level
+
+        Args:
+            counts: [class] -> [tp, pred, true]
+
+        Returns:
+            results: [dict] w/ keys = precision_micro, precision_macro, recall_micro, .., f1_macro
+        """
+        classes = sorted(counts.keys())
+        tp = np.array([counts[_class][0] for _class in classes], dtype=np.int64)
+        pred = np.array([counts[_class][1] for _class in classes], dtype=np.int64)
+        true = np.array([counts[_class][2] for _class in classes], dtype=np.int64)
+
+        # micro: undefined precision or recall => failure value
+        tp_sum, pred_sum, true_sum = tp.sum(), pred.sum(), true.sum()
+        precision_micro = tp_sum / pred_sum if pred_sum > 0 else self.failure_value
+        recall_micro = tp_sum / true_sum if true_sum > 0 else self.failure_value
+        if self.failure_value in [precision_micro, recall_micro]:
+            f1_micro = self.failure_value
+        else:
+            f1_micro = _f1(precision_micro, recall_micro)
+
+        # macro: undefined precision or recall of a class => 0
+        if len(classes) == 0:
+            precision_macro = recall_macro = f1_macro = self.failure_value
+        else:
+            precision, recall = _divide(tp, pred), _divide(tp, true)
+            precision_macro = np.average(precision)
+            recall_macro = np.average(recall)
+            f1_macro = np.average(_f1(precision, recall))
+
+        return {
+            "precision_micro": float(precision_micro),
+            "precision_macro": float(precision_macro),
+            "recall_micro": float(recall_micro),
+            "recall_macro": float(recall_macro),
+            "f1_micro": float(f1_micro),
+            "f1_macro": float(f1_macro),
+        }
+
+
+def _count_entities_seqeval(
+    ground_truth: List[List[str]], predictions: List[List[str]]
+) -> Tuple[int, int, int]:
+    r"""
+    Returns:
+        tp, pred, true: number of entities (seqeval, default mode) summed over all classes
+    """
+    entities_true = set(get_entities(ground_truth))
+    entities_pred = set(get_entities(predictions))
+    return (
+        len(entities_true & entities_pred),
+        len(entities_pred),
+        len(entities_true),
+    )
+
+
+def _divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    r"""
+    elementwise division w/ result 0 where the denominator is 0
+    """
+    mask = denominator == 0
+    denominator = denominator.copy()
+    denominator[mask] = 1
+    result = numerator / denominator
+    result[mask] = 0.0
+    return result
+
+
+def _f1(precision, recall):
+    r"""
+    f1 score (elementwise for arrays) w/ result 0 where precision + recall is 0
+    """
+    denominator = np.asarray(precision + recall, dtype=float)
+    denominator = np.where(denominator == 0.0, 1.0, denominator)
+    f1 = 2 * np.asarray(precision, dtype=float) * recall / denominator
+    return f1 if f1.ndim > 0 else float(f1)
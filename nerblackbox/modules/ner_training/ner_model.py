@@ -1,4 +1,5 @@
 from os.path import join
+import time
 import pytorch_lightning as pl
 from pytorch_lightning.core.optimizer import LightningOptimizer
 from abc import ABC, abstractmethod
@@ -159,6 +160,8 @@ class NerModel(pl.LightningModule, ABC):
 
         # logging
         self._write_metrics_for_tensorboard("train", {"all_loss": batch_train_loss})
+        self.train_tokens["real"] += int(attention_mask.sum())
+        self.train_tokens["padded"] += attention_mask.numel()
 
         # debug
         if batch_idx == 0:
@@ -174,6 +177,36 @@ class NerModel(pl.LightningModule, ABC):
 
         return {"loss": batch_train_loss}
 
+    def on_train_epoch_start(self) -> None:
+        self.train_tokens: Dict[str, int] = {"real": 0, "padded": 0}
+        self.train_time: Dict[str, float] = {"start": time.perf_counter()}
+        self.train_time["end"] = self.train_time["start"]
+
+    def on_train_batch_end(self, outputs, batch, batch_idx) -> None:
+        self.train_time["end"] = time.perf_counter()  # excludes validation
+
+    def on_train_epoch_end(self) -> None:
+        """
+        log padding ratio (fraction of processed tokens that are padding)
+        and throughput (non-padding tokens per second) of the training epoch
+        """
+        if self.train_tokens["padded"] == 0:
+            return
+        train_metrics = {
+            "padding_ratio": 1
+            - self.train_tokens["real"] / self.train_tokens["padded"],
+            "tokens_per_second": self.train_tokens["real"]
+            / max(self.train_time["end"] - self.train_time["start"], 1e-9),
+        }
+        self.mlflow_client.log_metrics(
+            self.current_epoch,
+            {f"train_{k}": v for k, v in train_metrics.items()},
+        )
+        self.default_logger.log_info(
+            f"> train padding ratio = {train_metrics['padding_ratio']:.3f}, "
+            f"tokens/sec = {train_metrics['tokens_per_second']:.1f}"
+        )
+
     ####################################################################################################################
     # OPTIMIZER
     ####################################################################################################################
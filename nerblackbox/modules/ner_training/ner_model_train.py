@@ -1,5 +1,6 @@
 import json
 
+from os.path import join
 from typing import Dict
 from transformers import AutoModelForTokenClassification
 from omegaconf import DictConfig
@@ -13,6 +14,14 @@ from nerblackbox.modules.ner_training.ner_model import NerModel
 from nerblackbox.modules.ner_training.annotation_tags.input_examples_utils import (
     InputExamplesUtils,
 )
+from nerblackbox.modules.ner_training.annotation_tags.annotation import Annotation
+from nerblackbox.modules.ner_training.data_preprocessing.tools.encodings_cache import (
+    EncodingsCache,
+)
+from nerblackbox.modules.ner_training.data_preprocessing.tools.utils import (
+    InputExamples,
+)
+from nerblackbox.modules.utils.env_variable import env_variable
 from nerblackbox.modules.utils.util_functions import read_encoding
 
 
@@ -100,38 +109,37 @@ class NerModelTrain(NerModel):
         :created attr: scheduler         [torch LambdaLR]
         :return: -
         """
-        # input_examples & annotation
-        (
-            input_examples,
-            self.annotation,
-        ) = self.data_preprocessor.get_input_examples_train(
-            prune_ratio={
-                "train": self.params.prune_ratio_train,
-                "val": self.params.prune_ratio_val,
-                "test": self.params.prune_ratio_test,
-            },
-            dataset_name=self.params.dataset_name,
+        # encodings & annotation (from the cache if available)
+        encodings_cache = EncodingsCache(
+            join(env_variable("DIR_CACHE"), "encodings"),
+            default_logger=self.default_logger,
+        )
+        encodings_cache_key = encodings_cache.get_key(
+            self.data_preprocessor.get_dataset_path(self.params.dataset_name),
+            self.tokenizer,
+            max_seq_length=self.hyperparameters.max_seq_length,
+            uncased=self.params.uncased,
+            annotation_scheme=self.params.annotation_scheme,
+            prune_ratio_train=self.params.prune_ratio_train,
+            prune_ratio_val=self.params.prune_ratio_val,
+            prune_ratio_test=self.params.prune_ratio_test,
             train_on_val=self.params.train_on_val,
             train_on_test=self.params.train_on_test,
         )
-        self.default_logger.log_info(
-            f"> annotation scheme found: {self.annotation.scheme}"
-        )
-        if self.params.annotation_scheme == "auto":
-            self.params.annotation_scheme = self.annotation.scheme
-        elif self.params.annotation_scheme != self.annotation.scheme:
-            # convert annotation_classes
-            input_examples = InputExamplesUtils.convert_annotation_scheme(
-                input_examples=input_examples,
-                annotation_scheme_source=self.annotation.scheme,
-                annotation_scheme_target=self.params.annotation_scheme,
+        cached_encodings = encodings_cache.load(encodings_cache_key)
+        if cached_encodings is None:
+            input_examples = self._get_input_examples()  # attr: annotation
+            encodings, offsets = self.data_preprocessor.to_encodings(
+                input_examples, self.annotation.classes
             )
-            self.annotation = self.annotation.change_scheme(
-                new_scheme=self.params.annotation_scheme
-            )
-            self.default_logger.log_info(
-                f"> annotation scheme converted to {self.params.annotation_scheme}"
+            encodings_cache.save(
+                encodings_cache_key, encodings, offsets, self.annotation.classes
             )
+        else:
+            encodings, _, annotation_classes = cached_encodings
+            self.annotation = Annotation(annotation_classes)
+            if self.params.annotation_scheme == "auto":
+                self.params.annotation_scheme = self.annotation.scheme
 
         self.default_logger.log_debug(
             "> self.annotation.classes:", self.annotation.classes
@@ -162,8 +170,16 @@ class NerModelTrain(NerModel):
         )  # due to additional_special_tokens
 
         # dataloader
-        self.dataloader, _ = self.data_preprocessor.to_dataloader(
-            input_examples, self.annotation.classes, batch_size=self._hparams.batch_size
+        self.dataloader = self.data_preprocessor.encodings_to_dataloader(
+            encodings,
+            batch_size=self._hparams.batch_size,
+            dynamic_padding=getattr(self.hyperparameters, "dynamic_padding", False),
+            num_workers=getattr(self.hyperparameters, "num_workers", 0),
+            pin_memory=getattr(self.hyperparameters, "pin_memory", False),
+            prefetch_factor=getattr(self.hyperparameters, "prefetch_factor", 2),
+            persistent_workers=getattr(
+                self.hyperparameters, "persistent_workers", False
+            ),
         )
 
         # optimizer
@@ -178,3 +194,42 @@ class NerModelTrain(NerModel):
             self.hyperparameters.max_epochs,
             self._hparams.lr_num_cycles,
         )
+
+    def _get_input_examples(self) -> Dict[str, InputExamples]:
+        """
+        :created attr: annotation        [Annotation]
+        :return: input_examples [dict] w/ keys = 'train', 'val', 'test' & values = [list] of [InputExample]
+        """
+        (
+            input_examples,
+            self.annotation,
+        ) = self.data_preprocessor.get_input_examples_train(
+            prune_ratio={
+                "train": self.params.prune_ratio_train,
+                "val": self.params.prune_ratio_val,
+                "test": self.params.prune_ratio_test,
+            },
+            dataset_name=self.params.dataset_name,
+            train_on_val=self.params.train_on_val,
+            train_on_test=self.params.train_on_test,
+        )
+        self.default_logger.log_info(
+            f"> annotation scheme found: {self.annotation.scheme}"
+        )
+        if self.params.annotation_scheme == "auto":
+            self.params.annotation_scheme = self.annotation.scheme
+        elif self.params.annotation_scheme != self.annotation.scheme:
+            # convert annotation_classes
+            input_examples = InputExamplesUtils.convert_annotation_scheme(
+                input_examples=input_examples,
+                annotation_scheme_source=self.annotation.scheme,
+                annotation_scheme_target=self.params.annotation_scheme,
+            )
+            self.annotation = self.annotation.change_scheme(
+                new_scheme=self.params.annotation_scheme
+            )
+            self.default_logger.log_info(
+                f"> annotation scheme converted to {self.params.annotation_scheme}"
+            )
+
+        return input_examples
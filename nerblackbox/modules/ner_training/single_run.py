@@ -150,6 +150,19 @@ def print_run_information(_params, _hparams, _logger, _seed: int):
     _logger.log_info(f"> lr_cooldown_restarts: {_hparams.lr_cooldown_restarts}")
     _logger.log_info(f"> lr_schedule:          {_hparams.lr_schedule}")
     _logger.log_info(f"> lr_num_cycles:        {_hparams.lr_num_cycles}")
+    _logger.log_info(
+        f"> dynamic_padding:      {getattr(_hparams, 'dynamic_padding', False)}"
+    )
+    _logger.log_info(f"> num_workers:          {getattr(_hparams, 'num_workers', 0)}")
+    _logger.log_info(
+        f"> pin_memory:           {getattr(_hparams, 'pin_memory', False)}"
+    )
+    _logger.log_info(
+        f"> prefetch_factor:      {getattr(_hparams, 'prefetch_factor', 2)}"
+    )
+    _logger.log_info(
+        f"> persistent_workers:   {getattr(_hparams, 'persistent_workers', False)}"
+    )
     _logger.log_info("")
 
 
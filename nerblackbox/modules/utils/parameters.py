@@ -44,6 +44,11 @@ HPARAMS = {
     "lr_cooldown_epochs": "int",
     "lr_cooldown_restarts": "bool",
     "lr_num_cycles": "int",
+    "dynamic_padding": "bool",
+    "num_workers": "int",
+    "pin_memory": "bool",
+    "prefetch_factor": "int",
+    "persistent_workers": "bool",
 }
 LOG_DIRS = {
     "mlflow": "str",
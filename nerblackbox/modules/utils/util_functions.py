@@ -110,6 +110,11 @@ def get_hardcoded_parameters(keys=False):
         "lr_cooldown_epochs": "int",
         "lr_cooldown_restarts": "bool",
         "lr_num_cycles": "int",
+        "dynamic_padding": "bool",
+        "num_workers": "int",
+        "pin_memory": "bool",
+        "prefetch_factor": "int",
+        "persistent_workers": "bool",
     }
     _log_dirs = {
         "mlflow": "str",
@@ -0,0 +1,72 @@
+import pytest
+import asyncio
+from typing import List, Any
+
+from nerblackbox.api.model import Model
+from nerblackbox.api.async_predictor import AsyncPredictor
+from nerblackbox.tests.utils import create_checkpoint
+
+INPUT_TEXTS = [
+    "arbetsförmedlingen finns i stockholm",
+    "anna karlsson is in göteborg, this is an example of the example of the example.",
+    "we are in stockholm.",
+    "stockholm",
+    "qq xx",
+]
+
+
+@pytest.fixture(scope="module")
+def model(tmp_path_factory) -> Model:
+    checkpoint_directory = str(tmp_path_factory.mktemp("checkpoint"))
+    create_checkpoint(checkpoint_directory)
+    return Model(checkpoint_directory, batch_size=2)
+
+
+async def predict_concurrently(
+    predictor: AsyncPredictor, input_texts: List[str], **kwargs: Any
+) -> List[Any]:
+    predictions = await asyncio.gather(
+        *[predictor.predict_async(input_text, **kwargs) for input_text in input_texts]
+    )
+    await predictor.close()
+    return list(predictions)
+
+
+class TestAsyncPredictor:
+    @pytest.mark.parametrize("level", ["word", "entity"])
+    def test_predict_async(self, model: Model, level: str):
+        predictor = AsyncPredictor(model, max_batch_size=2, max_wait_time=0.05)
+        test_predictions = asyncio.run(
+            predict_concurrently(predictor, INPUT_TEXTS, level=level)
+        )
+        predictions = model.predict(INPUT_TEXTS, level=level)
+        assert (
+            test_predictions == predictions
+        ), f"ERROR! test_predictions = {test_predictions} != {predictions} = predictions"
+
+        metrics = predictor.metrics()
+        assert metrics["requests"] == 5, f"ERROR! metrics = {metrics}"
+        assert metrics["batches"] == 3, f"ERROR! metrics = {metrics}"
+        assert metrics["queue_depth"] == 0, f"ERROR! metrics = {metrics}"
+        assert metrics["max_queue_depth"] == 5, f"ERROR! metrics = {metrics}"
+        assert metrics["batch_fill"] == pytest.approx(
+            5 / 6
+        ), f"ERROR! metrics = {metrics}"
+
+    def test_predict_async_proba(self, model: Model):
+        predictor = AsyncPredictor(model, max_batch_size=16)
+        test_predictions = asyncio.run(
+            predict_concurrently(predictor, INPUT_TEXTS, level="word", proba=True)
+        )
+        predictions = model.predict_proba(INPUT_TEXTS)
+        assert (
+            test_predictions == predictions
+        ), f"ERROR! test_predictions = {test_predictions} != {predictions} = predictions"
+        assert predictor.metrics()["batches"] == 1, f"ERROR! {predictor.metrics()}"
+
+    def test_predict_async_exception(self, model: Model):
+        predictor = AsyncPredictor(model)
+        with pytest.raises(AssertionError):
+            asyncio.run(
+                predict_concurrently(predictor, INPUT_TEXTS[:1], level="sentence")
+            )
@@ -0,0 +1,142 @@
+import pytest
+import torch
+from torch.utils.data import DataLoader
+from transformers import AutoTokenizer
+
+from nerblackbox.modules.ner_training.data_preprocessing.data_preprocessor import (
+    DataPreprocessor,
+)
+from nerblackbox.modules.ner_training.data_preprocessing.tools.dynamic_padding import (
+    LengthGroupedSampler,
+    collate_dynamic_padding,
+)
+from nerblackbox.modules.ner_training.data_preprocessing.tools.encodings_dataset import (
+    EncodingsDataset,
+)
+from nerblackbox.tests.utils import PseudoDefaultLogger, create_checkpoint
+
+MAX_SEQ_LENGTH = 12
+LENGTHS = [3, 12, 5, 7, 3, 9, 4, 11, 6, 8, 2, 10, 5, 3, 7, 4, 9]
+
+
+def get_encodings():
+    attention_mask = torch.tensor(
+        [[1] * length + [0] * (MAX_SEQ_LENGTH - length) for length in LENGTHS]
+    )
+    input_ids = attention_mask * torch.arange(1, len(LENGTHS) + 1)[:, None]
+    labels = torch.where(attention_mask == 1, 1, -100)
+    return {
+        "input_ids": input_ids,
+        "attention_mask": attention_mask,
+        "token_type_ids": torch.zeros_like(input_ids),
+        "labels": labels,
+    }
+
+
+@pytest.fixture(scope="module")
+def data_preprocessor(tmp_path_factory) -> DataPreprocessor:
+    checkpoint_directory = str(tmp_path_factory.mktemp("checkpoint"))
+    create_checkpoint(checkpoint_directory)
+    return DataPreprocessor(
+        tokenizer=AutoTokenizer.from_pretrained(checkpoint_directory),
+        do_lower_case=False,
+        default_logger=PseudoDefaultLogger(),
+        max_seq_length=MAX_SEQ_LENGTH,
+    )
+
+
+class TestDynamicPadding:
+    @pytest.mark.parametrize(
+        "batch_size, bucket_size", [(1, 1), (4, 1), (4, 2), (5, 50)]
+    )
+    def test_length_grouped_sampler(self, batch_size: int, bucket_size: int):
+        sampler = LengthGroupedSampler(
+            LENGTHS,
+            batch_size=batch_size,
+            bucket_size=bucket_size,
+            generator=torch.Generator().manual_seed(42),
+        )
+        indices = list(sampler)
+        assert len(indices) == len(sampler) == len(LENGTHS)
+        assert sorted(indices) == list(range(len(LENGTHS))), f"ERROR! {indices}"
+
+        # reproducible for the same seed, random across epochs
+        sampler.generator = torch.Generator().manual_seed(42)
+        assert list(sampler) == indices
+        if batch_size > 1:
+            assert list(sampler) != indices
+
+    def test_length_grouped_sampler_single_bucket(self):
+        r"""
+        if all samples are in one bucket, each batch contains samples of neighboring lengths
+        """
+        batch_size = 4
+        sampler = LengthGroupedSampler(LENGTHS, batch_size=batch_size, bucket_size=100)
+        indices = list(sampler)
+        lengths_sorted = sorted(LENGTHS, reverse=True)
+        batches = [
+            sorted([LENGTHS[j] for j in indices[i : i + batch_size]], reverse=True)
+            for i in range(0, len(LENGTHS), batch_size)
+        ]
+        batches_sorted = [
+            lengths_sorted[i : i + batch_size]
+            for i in range(0, len(LENGTHS), batch_size)
+        ]
+        assert sorted(batches[:-1]) == sorted(batches_sorted[:-1])
+        assert batches[-1] == batches_sorted[-1], "ERROR! incomplete batch not at end"
+
+    def test_collate_dynamic_padding(self):
+        encodings = get_encodings()
+        dataloader = DataLoader(
+            EncodingsDataset(encodings),
+            batch_size=4,
+            sampler=LengthGroupedSampler(LENGTHS, batch_size=4),
+            collate_fn=collate_dynamic_padding,
+        )
+        nr_samples = 0
+        for batch in dataloader:
+            seq_length = int(batch["attention_mask"].sum(dim=1).max())
+            assert set(batch.keys()) == set(encodings.keys())
+            for value in batch.values():
+                assert value.shape == (len(value), seq_length)
+            for input_ids, labels in zip(batch["input_ids"], batch["labels"]):
+                index = int(input_ids[0]) - 1
+                length = LENGTHS[index]
+                assert torch.equal(
+                    input_ids[:length], encodings["input_ids"][index, :length]
+                )
+                assert torch.equal(
+                    labels[length:], torch.full((seq_length - length,), -100)
+                )
+            nr_samples += len(batch["input_ids"])
+        assert nr_samples == len(LENGTHS)
+
+    @pytest.mark.parametrize("dynamic_padding", [False, True])
+    @pytest.mark.parametrize("num_workers", [0, 1])
+    def test_encodings_to_dataloader(
+        self,
+        data_preprocessor: DataPreprocessor,
+        dynamic_padding: bool,
+        num_workers: int,
+    ):
+        dataloader = data_preprocessor.encodings_to_dataloader(
+            {phase: get_encodings() for phase in ["train", "val", "test"]},
+            batch_size=4,
+            dynamic_padding=dynamic_padding,
+            num_workers=num_workers,
+            prefetch_factor=3,
+            persistent_workers=True,
+        )
+        for phase in ["train", "val", "test"]:
+            assert dataloader[phase].num_workers == num_workers
+            assert dataloader[phase].pin_memory is False
+            if num_workers > 0:
+                assert dataloader[phase].prefetch_factor == 3
+                assert dataloader[phase].persistent_workers is True
+
+            seq_lengths = [batch["input_ids"].shape[1] for batch in dataloader[phase]]
+            if phase == "train" and dynamic_padding:
+                assert isinstance(dataloader[phase].sampler, LengthGroupedSampler)
+                assert sum(seq_lengths) < len(seq_lengths) * MAX_SEQ_LENGTH
+            else:
+                assert seq_lengths == [MAX_SEQ_LENGTH] * len(seq_lengths)
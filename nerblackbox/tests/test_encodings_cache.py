@@ -0,0 +1,118 @@
+import os
+import shutil
+from os.path import join, isdir
+
+import pytest
+import torch
+from transformers import AutoTokenizer
+
+from nerblackbox.modules.ner_training.data_preprocessing.data_preprocessor import (
+    DataPreprocessor,
+)
+from nerblackbox.modules.ner_training.data_preprocessing.tools.encodings_cache import (
+    EncodingsCache,
+)
+from nerblackbox.modules.ner_training.data_preprocessing.tools.encodings_dataset import (
+    EncodingsDataset,
+)
+from nerblackbox.tests.utils import PseudoDefaultLogger, create_checkpoint
+
+PRUNE_RATIO = {"train": 1.0, "val": 1.0, "test": 1.0}
+
+
+@pytest.fixture(scope="module")
+def data_preprocessor(tmp_path_factory) -> DataPreprocessor:
+    checkpoint_directory = str(tmp_path_factory.mktemp("checkpoint"))
+    create_checkpoint(checkpoint_directory)
+    return DataPreprocessor(
+        tokenizer=AutoTokenizer.from_pretrained(checkpoint_directory),
+        do_lower_case=False,
+        default_logger=PseudoDefaultLogger(),
+        max_seq_length=16,
+    )
+
+
+@pytest.fixture(scope="module")
+def encodings_and_offsets(data_preprocessor: DataPreprocessor):
+    input_examples, annotation = data_preprocessor.get_input_examples_train(
+        prune_ratio=PRUNE_RATIO
+    )
+    encodings, offsets = data_preprocessor.to_encodings(
+        input_examples, annotation.classes
+    )
+    return encodings, offsets, annotation.classes
+
+
+class TestEncodingsCache:
+    def test_get_key(self, data_preprocessor: DataPreprocessor, tmp_path):
+        dataset_path = str(tmp_path / "dataset")
+        shutil.copytree(data_preprocessor.get_dataset_path(), dataset_path)
+        tokenizer = data_preprocessor.tokenizer
+
+        key = EncodingsCache.get_key(dataset_path, tokenizer, max_seq_length=16)
+        assert key == EncodingsCache.get_key(
+            dataset_path, tokenizer, max_seq_length=16
+        ), f"ERROR! key is not deterministic"
+        assert key != EncodingsCache.get_key(
+            dataset_path, tokenizer, max_seq_length=32
+        ), f"ERROR! key does not depend on settings"
+
+        # dataset
+        with open(join(dataset_path, "train.csv"), "a") as f:
+            f.write("O\tanna\n")
+        assert key != EncodingsCache.get_key(
+            dataset_path, tokenizer, max_seq_length=16
+        ), f"ERROR! key does not depend on dataset files"
+
+    def test_save_and_load(self, encodings_and_offsets, tmp_path):
+        encodings, offsets, annotation_classes = encodings_and_offsets
+        encodings_cache = EncodingsCache(str(tmp_path))
+
+        assert encodings_cache.load("key") is None
+        encodings_cache.save("key", encodings, offsets, annotation_classes)
+        cached_encodings = encodings_cache.load("key")
+        assert cached_encodings is not None
+        _encodings, _offsets, _annotation_classes = cached_encodings
+
+        assert _offsets == offsets
+        assert _annotation_classes == annotation_classes
+        for phase in encodings.keys():
+            for key in encodings[phase].keys():
+                assert torch.equal(
+                    _encodings[phase][key], encodings[phase][key]
+                ), f"ERROR! {phase} {key} differs"
+
+            # copy-on-write: modifications are not written to the cache
+            _encodings[phase]["input_ids"][0, 0] = -1
+            data = EncodingsDataset(encodings=_encodings[phase])
+            assert len(data) == len(encodings[phase]["input_ids"])
+            assert data[0]["input_ids"][0] == -1
+
+        cached_encodings = encodings_cache.load("key")
+        assert cached_encodings is not None
+        for phase in encodings.keys():
+            assert torch.equal(
+                cached_encodings[0][phase]["input_ids"], encodings[phase]["input_ids"]
+            ), f"ERROR! {phase} input_ids in cache were modified"
+
+    def test_evict(self, encodings_and_offsets, tmp_path):
+        encodings, offsets, annotation_classes = encodings_and_offsets
+        encodings_cache = EncodingsCache(str(tmp_path))
+        for key in ["key1", "key2"]:
+            encodings_cache.save(key, encodings, offsets, annotation_classes)
+        assert isdir(join(str(tmp_path), "key1")) and isdir(join(str(tmp_path), "key2"))
+
+        # key1 is used more recently than key2
+        os.utime(join(str(tmp_path), "key2", "meta.json"), (0, 0))
+        assert encodings_cache.load("key1") is not None
+
+        # max_size allows for 2 entries
+        encodings_cache.max_size = 2 * sum(
+            os.path.getsize(join(str(tmp_path), "key1", file_name))
+            for file_name in os.listdir(join(str(tmp_path), "key1"))
+        )
+        encodings_cache.save("key3", encodings, offsets, annotation_classes)
+        assert sorted(os.listdir(str(tmp_path))) == [
+            "key1",
+            "key3",
+        ], f"ERROR! least recently used entry key2 was not evicted"
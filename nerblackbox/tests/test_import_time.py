@@ -0,0 +1,59 @@
+import pytest
+import sys
+import subprocess
+from typing import Dict
+
+import nerblackbox
+
+HEAVY_DEPENDENCIES = ["mlflow", "pytorch_lightning", "pandas", "seqeval", "sklearn"]
+
+
+def import_times(statement: str) -> Dict[str, int]:
+    r"""
+    Args:
+        statement: e.g. "from nerblackbox import Model"
+
+    Returns:
+        import_times: [dict] w/ keys = imported modules & values = cumulative import time in microseconds,
+                      as reported by python -X importtime
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    _import_times = dict()
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, module = line.split("|")
+            if cumulative.strip().isdigit():
+                _import_times[module.strip()] = int(cumulative.strip())
+    return _import_times
+
+
+class TestImportTime:
+    @pytest.mark.parametrize(
+        "statement",
+        [
+            "import nerblackbox",
+            "from nerblackbox import Model",
+            "from nerblackbox import AsyncPredictor",
+        ],
+    )
+    def test_no_heavy_dependencies(self, statement: str):
+        _import_times = import_times(statement)
+        assert "nerblackbox" in _import_times
+        for dependency in HEAVY_DEPENDENCIES:
+            assert (
+                dependency not in _import_times
+            ), f"ERROR! '{statement}' imports {dependency}"
+
+    def test_lazy_attributes(self):
+        assert set(nerblackbox.__all__) <= set(dir(nerblackbox))
+        from nerblackbox import Model, Store
+
+        assert Model.__module__ == "nerblackbox.api.model"
+        assert Store.__module__ == "nerblackbox.api.store"
+        with pytest.raises(AttributeError):
+            getattr(nerblackbox, "Unknown")
@@ -0,0 +1,116 @@
+import pytest
+import json
+from typing import Dict, Any, Iterator, Tuple, Optional
+from urllib.request import Request, urlopen
+from urllib.error import HTTPError
+
+from nerblackbox.api.model import Model
+from nerblackbox.modules.inference.server import InferenceServer, LatencyHistogram
+from nerblackbox.tests.utils import create_checkpoint
+
+INPUT_TEXTS = [
+    "arbetsförmedlingen finns i stockholm",
+    "we are in stockholm.",
+    "qq xx",
+]
+
+
+@pytest.fixture(scope="module")
+def model(tmp_path_factory) -> Model:
+    checkpoint_directory = str(tmp_path_factory.mktemp("checkpoint"))
+    create_checkpoint(checkpoint_directory)
+    return Model(checkpoint_directory, batch_size=2)
+
+
+@pytest.fixture(scope="module")
+def server(model: Model) -> Iterator[InferenceServer]:
+    _server = InferenceServer(model, port=0, max_batch_size=4, max_wait_time=0.01)
+    _server.start()
+    yield _server
+    _server.shutdown()
+
+
+def request(
+    server: InferenceServer, endpoint: str, body: Optional[Dict[str, Any]] = None
+) -> Tuple[int, Dict[str, Any]]:
+    url = f"http://{server.host}:{server.port}{endpoint}"
+    data = None if body is None else json.dumps(body).encode("utf-8")
+    try:
+        with urlopen(Request(url, data=data), timeout=30) as response:
+            return response.status, json.loads(response.read())
+    except HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+class TestInferenceServer:
+    def test_health(self, server: InferenceServer):
+        status, content = request(server, "/health")
+        assert status == 200, f"ERROR! status = {status}"
+        assert content["status"] == "ok", f"ERROR! content = {content}"
+
+    @pytest.mark.parametrize("level", ["word", "entity"])
+    def test_predict(self, server: InferenceServer, model: Model, level: str):
+        status, content = request(
+            server, "/predict", {"texts": INPUT_TEXTS, "level": level}
+        )
+        assert status == 200, f"ERROR! status = {status}, content = {content}"
+        predictions = model.predict(INPUT_TEXTS, level=level)
+        assert isinstance(predictions, list)
+        assert (
+            content["predictions"] == predictions
+        ), f"ERROR! {content['predictions']} != {predictions}"
+
+        status, content = request(
+            server, "/predict", {"text": INPUT_TEXTS[0], "level": level}
+        )
+        assert status == 200, f"ERROR! status = {status}, content = {content}"
+        assert (
+            content["predictions"] == predictions[:1]
+        ), f"ERROR! {content['predictions']} != {predictions[:1]}"
+
+    def test_predict_proba(self, server: InferenceServer, model: Model):
+        status, content = request(server, "/predict_proba", {"texts": INPUT_TEXTS})
+        assert status == 200, f"ERROR! status = {status}, content = {content}"
+        predictions = model.predict_proba(INPUT_TEXTS)
+        assert (
+            content["predictions"] == predictions
+        ), f"ERROR! {content['predictions']} != {predictions}"
+
+    @pytest.mark.parametrize(
+        "endpoint, body, status",
+        [
+            ("/predict", {"texts": "not a list"}, 400),
+            ("/predict", {"txt": "missing key"}, 400),
+            ("/predict", {"text": "abc", "level": "sentence"}, 400),
+            ("/unknown", {"text": "abc"}, 404),
+        ],
+    )
+    def test_invalid_requests(
+        self, server: InferenceServer, endpoint: str, body: Dict[str, Any], status: int
+    ):
+        test_status, content = request(server, endpoint, body)
+        assert test_status == status, f"ERROR! status = {test_status} != {status}"
+        assert "error" in content, f"ERROR! content = {content}"
+
+    def test_metrics(self, server: InferenceServer):
+        request(server, "/predict", {"text": INPUT_TEXTS[0]})
+        status, content = request(server, "/metrics")
+        assert status == 200, f"ERROR! status = {status}"
+        histogram = content["latency"]["/predict"]
+        assert histogram["count"] >= 1, f"ERROR! histogram = {histogram}"
+        assert (
+            sum(histogram["buckets"].values()) == histogram["count"]
+        ), f"ERROR! histogram = {histogram}"
+        assert content["batching"]["requests"] >= 1, f"ERROR! content = {content}"
+
+
+class TestLatencyHistogram:
+    def test_record(self):
+        histogram = LatencyHistogram(buckets=[1, 10])
+        for latency in [0.5, 1.0, 3.0, 20.0]:
+            histogram.record(latency)
+        assert histogram.as_dict() == {
+            "count": 4,
+            "mean": 6.125,
+            "buckets": {"1": 2, "10": 1, "+Inf": 1},
+        }, f"ERROR! histogram = {histogram.as_dict()}"
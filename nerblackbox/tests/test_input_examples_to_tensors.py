@@ -0,0 +1,173 @@
+from typing import List
+
+import numpy as np
+import pytest
+import torch
+from transformers import AutoTokenizer
+
+from nerblackbox.modules.ner_training.data_preprocessing.tools.input_example import (
+    InputExample,
+)
+from nerblackbox.modules.ner_training.data_preprocessing.tools.input_examples_to_tensors import (
+    InputExamplesToTensors,
+)
+from nerblackbox.modules.ner_training.data_preprocessing.tools.utils import (
+    EncodingsKeys,
+    EncodingsKeysPredict,
+)
+from nerblackbox.tests.utils import create_checkpoint
+
+ANNOTATION_CLASSES = ("O", "B-PER", "I-PER", "B-LOC", "I-LOC")
+INPUT_EXAMPLES = [
+    InputExample(
+        guid="",
+        text="anna karlsson finns i stockholm",
+        tags="B-PER I-PER O O B-LOC",
+    ),
+    InputExample(guid="", text="", tags=""),
+    InputExample(
+        guid="",
+        text="we are in göteborg , this is an example of stockholm",
+        tags="O O O B-LOC O O O O O O B-LOC",
+    ),
+    InputExample(guid="", text="anna", tags="B-PER"),
+]
+
+
+@pytest.fixture(scope="module")
+def tokenizer(tmp_path_factory):
+    checkpoint_directory = str(tmp_path_factory.mktemp("checkpoint"))
+    create_checkpoint(checkpoint_directory)
+    return AutoTokenizer.from_pretrained(checkpoint_directory)
+
+
+class TestInputExamplesToTensors:
+    @pytest.mark.parametrize(
+        "max_seq_length, stride, true_input_ids, true_labels, true_offsets",
+        [
+            (
+                8,
+                0,
+                [[2, 10, 11, 6, 7, 8, 3, 0]],
+                [[-100, 1, 2, 0, 0, 3, -100, -100]],
+                [0, 1],
+            ),
+            (
+                5,
+                1,
+                [[2, 10, 11, 6, 3], [2, 6, 7, 8, 3]],
+                [[-100, 1, 2, 0, -100], [-100, 0, 0, 3, -100]],
+                [0, 2],
+            ),
+        ],
+    )
+    def test_call(
+        self,
+        tokenizer,
+        max_seq_length: int,
+        stride: int,
+        true_input_ids: List[List[int]],
+        true_labels: List[List[int]],
+        true_offsets: List[int],
+    ):
+        input_examples_to_tensors = InputExamplesToTensors(
+            tokenizer,
+            max_seq_length=max_seq_length,
+            annotation_classes_tuple=ANNOTATION_CLASSES,
+            stride=stride,
+        )
+        encodings, offsets = input_examples_to_tensors(
+            INPUT_EXAMPLES[:1], predict=False
+        )
+        assert torch.equal(
+            encodings["input_ids"], torch.tensor(true_input_ids)
+        ), f"input_ids = {encodings['input_ids']} != {true_input_ids}"
+        assert torch.equal(
+            encodings["labels"], torch.tensor(true_labels)
+        ), f"labels = {encodings['labels']} != {true_labels}"
+        assert offsets == true_offsets, f"offsets = {offsets} != {true_offsets}"
+
+    @pytest.mark.parametrize("predict", [False, True])
+    @pytest.mark.parametrize("max_seq_length, stride", [(6, 0), (6, 2), (16, 0)])
+    def test_call_batched(
+        self, tokenizer, predict: bool, max_seq_length: int, stride: int
+    ):
+        r"""
+        batched tokenization (across tokenizer calls) leads to the same encodings & offsets as one call per input example
+        """
+        encodings_and_offsets = [
+            InputExamplesToTensors(
+                tokenizer,
+                max_seq_length=max_seq_length,
+                annotation_classes_tuple=ANNOTATION_CLASSES,
+                stride=stride,
+                batch_size=batch_size,
+            )(INPUT_EXAMPLES, predict=predict)
+            for batch_size in [1, 3, 1000]
+        ]
+        (encodings_single, offsets_single) = encodings_and_offsets[0]
+        assert len(offsets_single) == len(INPUT_EXAMPLES) + 1
+        assert offsets_single[-1] == len(encodings_single["input_ids"])
+        for encodings, offsets in encodings_and_offsets[1:]:
+            assert offsets == offsets_single, f"{offsets} != {offsets_single}"
+            assert set(encodings.keys()) == set(
+                EncodingsKeysPredict if predict else EncodingsKeys
+            )
+            for key in encodings.keys():
+                assert encodings[key].shape == (offsets[-1], max_seq_length)
+                assert torch.equal(
+                    encodings[key], encodings_single[key]
+                ), f"ERROR! {key} differs"
+
+    @pytest.mark.parametrize(
+        "predict, true_tag_ids",
+        [
+            (
+                False,
+                [
+                    [-100, 1, -100, 2, -100],
+                    [-100, 2, 0, -100, -100],
+                    [-100, 3, -100, -100, -100],
+                ],
+            ),
+            (
+                True,
+                [
+                    [0, 1, 0, 2, 0],
+                    [0, 2, 0, 0, 0],
+                    [0, 3, 0, 0, 0],
+                ],
+            ),
+        ],
+    )
+    def test_encode_tags(self, tokenizer, predict: bool, true_tag_ids: List[List[int]]):
+        r"""
+        2 input examples, the first one is split into 2 chunks w/ stride = 1
+        (the overlapping token of the second chunk belongs to the second word)
+        """
+        input_examples_to_tensors = InputExamplesToTensors(
+            tokenizer, annotation_classes_tuple=ANNOTATION_CLASSES
+        )
+        tag_ids = input_examples_to_tensors._encode_tags(
+            [["B-PER", "I-PER", "O"], ["B-LOC"]],
+            all_word_ids=np.array(
+                [[-1, 0, 0, 1, -1], [-1, 1, 2, -1, -1], [-1, 0, 0, -1, -1]]
+            ),
+            all_offsets=np.array(
+                [
+                    [(0, 0), (0, 2), (2, 4), (0, 3), (0, 0)],
+                    [(0, 0), (0, 3), (0, 1), (0, 0), (0, 0)],
+                    [(0, 0), (0, 5), (5, 6), (0, 0), (0, 0)],
+                ]
+            ),
+            sample_mapping=np.array([0, 0, 1]),
+            predict=predict,
+        )
+        assert tag_ids.tolist() == true_tag_ids, f"{tag_ids} != {true_tag_ids}"
+
+    def test_call_empty(self, tokenizer):
+        encodings, offsets = InputExamplesToTensors(
+            tokenizer, annotation_classes_tuple=ANNOTATION_CLASSES
+        )([], predict=True)
+        assert offsets == [0]
+        assert all(len(value) == 0 for value in encodings.values())
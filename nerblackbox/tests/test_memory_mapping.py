@@ -0,0 +1,116 @@
+import os
+import shutil
+import threading
+from os.path import join, isfile
+from typing import List
+
+import pytest
+import torch
+from transformers import AutoModelForTokenClassification
+
+from nerblackbox.modules.inference.fingerprint import get_checkpoint_fingerprint
+from nerblackbox.modules.inference.memory_mapping import (
+    SAFETENSORS_FILE_NAME,
+    _ParametersOnMetaDevice,
+    get_memory_usage,
+    load_memory_mapped_model,
+)
+from nerblackbox.tests.utils import create_checkpoint
+
+
+@pytest.fixture(scope="module")
+def checkpoint_directory(tmp_path_factory) -> str:
+    _checkpoint_directory = str(tmp_path_factory.mktemp("checkpoint"))
+    create_checkpoint(_checkpoint_directory)
+    return _checkpoint_directory
+
+
+class TestMemoryMapping:
+    def test_load_memory_mapped_model(self, checkpoint_directory: str):
+        assert not isfile(join(checkpoint_directory, SAFETENSORS_FILE_NAME))
+        model_mmap = load_memory_mapped_model(checkpoint_directory, return_dict=False)
+        assert isfile(join(checkpoint_directory, SAFETENSORS_FILE_NAME))
+        assert not model_mmap.training
+
+        model = AutoModelForTokenClassification.from_pretrained(
+            checkpoint_directory, return_dict=False
+        )
+        model.eval()
+        parameters = dict(model.named_parameters())
+        for name, parameter in model_mmap.named_parameters():
+            assert not parameter.is_meta, f"ERROR! parameter {name} was not loaded"
+            assert torch.equal(
+                parameter, parameters[name]
+            ), f"ERROR! parameter {name} differs"
+        for name, buffer in model.named_buffers():
+            assert torch.equal(
+                dict(model_mmap.named_buffers())[name], buffer
+            ), f"ERROR! buffer {name} differs"
+
+        input_ids = torch.tensor([[2, 5, 6, 7, 8, 3]])
+        with torch.no_grad():
+            assert torch.equal(
+                model_mmap(input_ids=input_ids)[0], model(input_ids=input_ids)[0]
+            )
+
+        # the second model reuses the safetensors file
+        load_memory_mapped_model(checkpoint_directory, return_dict=False)
+
+    def test_load_memory_mapped_model_checkpoint_overwritten(
+        self, checkpoint_directory: str, tmp_path
+    ):
+        r"""
+        the safetensors file does not shadow the checkpoint's weights, does not change the checkpoint fingerprint,
+        and is converted again if the checkpoint is overwritten
+        """
+        checkpoint_directory_copy = str(tmp_path / "checkpoint")
+        shutil.copytree(checkpoint_directory, checkpoint_directory_copy)
+        fingerprint = get_checkpoint_fingerprint(checkpoint_directory_copy)
+        load_memory_mapped_model(checkpoint_directory_copy)
+        assert isfile(join(checkpoint_directory_copy, SAFETENSORS_FILE_NAME))
+        assert get_checkpoint_fingerprint(checkpoint_directory_copy) == fingerprint
+
+        # overwrite checkpoint
+        model = AutoModelForTokenClassification.from_pretrained(
+            checkpoint_directory_copy
+        )
+        with torch.no_grad():
+            model.classifier.bias += 1.0
+        model.save_pretrained(checkpoint_directory_copy, safe_serialization=False)
+        weights_path = join(checkpoint_directory_copy, "pytorch_model.bin")
+        os.utime(weights_path, ns=(0, os.stat(weights_path).st_mtime_ns + 10**9))
+
+        for model_loaded in [
+            load_memory_mapped_model(checkpoint_directory_copy),
+            AutoModelForTokenClassification.from_pretrained(checkpoint_directory_copy),
+        ]:
+            assert torch.equal(
+                model_loaded.classifier.bias, model.classifier.bias
+            ), "ERROR! old weights loaded"
+
+    def test_parameters_on_meta_device(self):
+        def create_linear(_linear):
+            _linear.append(torch.nn.Linear(2, 2))
+
+        linear_other_thread: List[torch.nn.Module] = list()
+        with _ParametersOnMetaDevice():
+            linear = torch.nn.Linear(2, 2)
+            buffer = torch.arange(3)
+            thread = threading.Thread(target=create_linear, args=(linear_other_thread,))
+            thread.start()
+            thread.join()
+        assert linear.weight.is_meta and linear.bias.is_meta
+        assert torch.equal(buffer, torch.tensor([0, 1, 2]))
+
+        # other threads are not affected
+        assert not linear_other_thread[0].weight.is_meta
+        assert not linear_other_thread[0].bias.is_meta
+
+        # the context is restored on exit
+        assert not torch.nn.Linear(2, 2).weight.is_meta
+
+    def test_get_memory_usage(self):
+        memory_usage = get_memory_usage()
+        assert set(memory_usage.keys()) == {"pid", "rss", "pss", "shared"}
+        assert memory_usage["pid"] == os.getpid()
+        assert memory_usage["rss"] > 0, f"ERROR! memory_usage = {memory_usage}"
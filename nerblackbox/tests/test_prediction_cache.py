@@ -0,0 +1,152 @@
+import os
+import pickle
+from os.path import join
+from typing import Any, List, Tuple
+
+import numpy as np
+import pytest
+from nerblackbox.modules.inference.prediction_cache import PredictionCache
+
+PREDICTION = [{"char_start": "0", "char_end": "5", "token": "anna", "tag": "PER"}]
+
+
+class TestPredictionCache:
+    def test_key(self):
+        cache = PredictionCache(2)
+        key = cache.key("a", level="word", proba=False)
+        assert key == cache.key("a", proba=False, level="word")
+        assert key != cache.key("b", level="word", proba=False)
+        assert key != cache.key("a", level="entity", proba=False)
+        assert key != PredictionCache(2, namespace="other").key(
+            "a", level="word", proba=False
+        )
+
+    def test_get_put(self):
+        cache = PredictionCache(2)
+        assert cache.get("a") is None
+        cache.put("a", PREDICTION)
+        prediction = cache.get("a")
+        assert prediction == PREDICTION
+
+        # returned predictions are copies
+        prediction[0]["tag"] = "ORG"
+        assert cache.get("a") == PREDICTION
+
+        metrics = cache.metrics()
+        assert metrics["hits"] == 2
+        assert metrics["misses"] == 1
+        assert metrics["entries"] == 1
+        assert metrics["bytes"] > 0
+        assert metrics["hit_rate"] == pytest.approx(2 / 3)
+
+    def test_eviction_max_entries(self):
+        cache = PredictionCache(2)
+        cache.put("a", PREDICTION)
+        cache.put("b", PREDICTION)
+        assert cache.get("a") is not None  # => b is least recently used
+        cache.put("c", PREDICTION)
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+        assert cache.metrics()["evictions"] == 1
+        assert cache.metrics()["entries"] == 2
+
+    def test_eviction_max_bytes(self):
+        cache = PredictionCache(100)
+        cache.put("a", PREDICTION)
+        size = cache.metrics()["bytes"]
+
+        cache = PredictionCache(100, max_bytes=2 * size)
+        for key in ["a", "b", "c"]:
+            cache.put(key, PREDICTION)
+        metrics = cache.metrics()
+        assert metrics["entries"] == 2
+        assert metrics["bytes"] == 2 * size
+        assert metrics["evictions"] == 1
+        assert cache.get("a") is None
+
+        # values larger than max_bytes are not kept in memory
+        cache.put("d", [dict(PREDICTION[0], token=f"anna{i}") for i in range(10)])
+        assert cache.get("d") is None
+        assert cache.metrics()["entries"] == 2
+
+    def test_disk_tier(self, tmp_path):
+        directory = str(tmp_path / "cache")
+        cache = PredictionCache(1, directory=directory)
+        cache.put("a", PREDICTION)
+        cache.put("b", PREDICTION)  # evicts a from memory
+
+        assert cache.get("a") == PREDICTION
+        assert cache.metrics()["disk_hits"] == 1
+
+        # new cache instance, e.g. after restart
+        cache_restarted = PredictionCache(1, directory=directory)
+        assert cache_restarted.get("b") == PREDICTION
+        assert cache_restarted.get("c") is None
+        metrics = cache_restarted.metrics()
+        assert metrics["disk_hits"] == 1
+        assert metrics["misses"] == 1
+
+    def test_disk_tier_eviction(self, tmp_path):
+        directory = str(tmp_path / "cache")
+        cache = PredictionCache(1, directory=directory)
+        cache.put("a", PREDICTION)
+        size = os.path.getsize(join(directory, "a.cache"))
+
+        # max_disk_bytes allows for 3 entries
+        cache = PredictionCache(1, directory=directory, max_disk_bytes=3 * size)
+        cache.put("b", PREDICTION)
+        cache.put("c", PREDICTION)
+        assert cache.metrics()["disk_evictions"] == 0
+        os.utime(join(directory, "a.cache"), (0, 0))
+        os.utime(join(directory, "b.cache"), (1, 1))
+        os.utime(join(directory, "c.cache"), (2, 2))
+        assert (
+            cache.get("a") == PREDICTION
+        )  # read from disk => b is least recently used
+
+        # 4 entries exceed max_disk_bytes => evict down to 90%, i.e. 2 entries
+        cache.put("d", PREDICTION)
+        assert sorted(os.listdir(directory)) == ["a.cache", "d.cache"]
+        assert cache.metrics()["disk_evictions"] == 2
+
+    def test_serialization(self, tmp_path):
+        directory = str(tmp_path / "cache")
+        cache = PredictionCache(1, directory=directory)
+        prediction_proba = [
+            {"char_start": 0, "char_end": 4, "token": "anna", "proba": {"O": 0.1}}
+        ]
+        prediction_arrays = {
+            "char_start": np.array([0, 5], dtype=np.int64),
+            "proba": np.array([[0.1, 0.9], [0.8, 0.2]], dtype=np.float32),
+        }
+        cache.put("a", prediction_proba)
+        cache.put("b", prediction_arrays)  # evicts a from memory
+        predictions: List[Tuple[str, Any]] = [
+            ("a", prediction_proba),
+            ("b", prediction_arrays),
+        ]
+        for key, prediction in predictions:
+            cache.clear()
+            for _ in range(2):  # from disk, from memory
+                test_prediction = cache.get(key)
+                assert isinstance(test_prediction, type(prediction))
+                if isinstance(prediction, dict):
+                    assert list(test_prediction.keys()) == list(prediction.keys())
+                    for name, array in prediction.items():
+                        assert test_prediction[name].dtype == array.dtype
+                        assert np.array_equal(test_prediction[name], array)
+                else:
+                    assert test_prediction == prediction
+
+    def test_pickle_files_are_not_loaded(self, tmp_path):
+        directory = str(tmp_path / "cache")
+        cache = PredictionCache(1, directory=directory)
+        cache.put("a", PREDICTION)
+        cache.clear()
+
+        # a pickled file in place of the entry is not unpickled, but treated as a miss
+        with open(join(directory, "a.cache"), "wb") as f:
+            f.write(pickle.dumps(PREDICTION))
+        assert cache.get("a") is None
+        assert cache.metrics()["misses"] == 1
@@ -0,0 +1,51 @@
+import json
+import logging
+
+from nerblackbox.modules.inference.profiling import Profiler, STAGES, COUNTS
+
+
+class TestProfiler:
+    def test_disabled(self):
+        profiler = Profiler()
+        with profiler.call():
+            with profiler.stage("forward"):
+                pass
+            profiler.count(slices=3)
+        stats = profiler.stats.as_dict()
+        assert all(value == 0 for value in stats["seconds"].values())
+        assert all(value == 0 for value in stats["counts"].values())
+
+    def test_enabled(self, caplog):
+        profiler = Profiler(enabled=True)
+        with caplog.at_level(logging.DEBUG, logger="nerblackbox.profiling"):
+            for _ in range(2):
+                with profiler.call():
+                    with profiler.stage("forward"):
+                        pass
+                    profiler.count(slices=3, tokens=6, padding_tokens=2)
+
+        stats = profiler.stats.as_dict()
+        assert set(stats["seconds"].keys()) == set(STAGES + ["total"])
+        assert set(stats["counts"].keys()) == set(COUNTS)
+        assert stats["seconds"]["total"] >= stats["seconds"]["forward"] > 0
+        assert stats["counts"]["calls"] == 2
+        assert stats["counts"]["slices"] == 6
+        assert stats["padding_ratio"] == 0.25
+
+        # one structured log record per call, w/ the stats of that call only
+        records = [
+            json.loads(record.getMessage())
+            for record in caplog.records
+            if record.name == "nerblackbox.profiling"
+        ]
+        assert len(records) == 2
+        for record in records:
+            assert record["event"] == "predict"
+            assert record["counts"]["calls"] == 1
+            assert record["counts"]["slices"] == 3
+
+    def test_pop(self):
+        profiler = Profiler(enabled=True)
+        profiler.count(documents=2)
+        assert profiler.pop()["counts"]["documents"] == 2
+        assert profiler.stats.as_dict()["counts"]["documents"] == 0
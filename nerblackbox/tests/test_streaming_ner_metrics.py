@@ -0,0 +1,85 @@
+import random
+import warnings
+from typing import List
+
+import pytest
+from seqeval.metrics import precision_score, recall_score, f1_score
+
+from nerblackbox.modules.ner_training.metrics.ner_metrics import NerMetrics
+from nerblackbox.modules.ner_training.metrics.streaming_ner_metrics import (
+    StreamingNerMetrics,
+)
+
+TAGS = ["O", "O", "B-PER", "I-PER", "I-PER", "B-LOC", "I-LOC", "B-ORG", "I-ORG"]
+
+
+def random_documents(seed: int) -> List[List[List[str]]]:
+    r"""
+    Returns:
+        ground_truth, predictions: e.g. [["B-PER", "I-PER"], ["I-PER", "O"]] & [["B-PER", "O"], ["I-PER", "O"]]
+    """
+    random.seed(seed)
+    ground_truth = [
+        [random.choice(TAGS) for _ in range(random.randint(1, 6))]
+        for _ in range(random.randint(2, 12))
+    ]
+    predictions = [
+        [random.choice(TAGS) if random.random() < 0.4 else tag for tag in document]
+        for document in ground_truth
+    ]
+    return [ground_truth, predictions]
+
+
+class TestStreamingNerMetrics:
+    @pytest.mark.parametrize("seed", list(range(30)))
+    @pytest.mark.parametrize("chunk_size", [1, 3, 100])
+    def test_entity_equals_ner_metrics(self, seed: int, chunk_size: int):
+        ground_truth, predictions = random_documents(seed)
+
+        streaming_ner_metrics = StreamingNerMetrics()
+        for i in range(0, len(ground_truth), chunk_size):
+            streaming_ner_metrics.update(
+                ground_truth[i : i + chunk_size], predictions[i : i + chunk_size]
+            )
+        evaluation = streaming_ner_metrics.results()
+        assert streaming_ner_metrics.documents == len(ground_truth)
+
+        # all documents at once
+        true_flat = [tag for document in ground_truth for tag in document]
+        pred_flat = [tag for document in predictions for tag in document]
+        ner_metrics = NerMetrics(true_flat, pred_flat, level="entity", scheme="bio")
+        ner_metrics.compute(["precision", "recall", "f1"])
+        results = ner_metrics.results_as_dict()
+        for metric in ["precision", "recall", "f1"]:
+            for label in ["micro", "macro"]:
+                assert (
+                    evaluation[label]["entity"][metric] == results[f"{metric}_{label}"]
+                ), f"ERROR! {label} {metric} differs from NerMetrics"
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            for metric, score in zip(
+                ["precision", "recall", "f1"], [precision_score, recall_score, f1_score]
+            ):
+                assert evaluation["micro"]["entity"][f"{metric}_seqeval"] == score(
+                    ground_truth, predictions
+                ), f"ERROR! {metric}_seqeval differs from seqeval"
+
+    def test_entity_across_documents(self):
+        # the entity continues in the next document (as in NerMetrics on the concatenation of all documents)
+        streaming_ner_metrics = StreamingNerMetrics()
+        streaming_ner_metrics.update([["O", "B-PER"]], [["O", "B-PER"]])
+        streaming_ner_metrics.update([["I-PER", "O"]], [["O", "O"]])
+        evaluation = streaming_ner_metrics.results()
+        assert evaluation["micro"]["entity"]["precision"] == 0.0
+        assert evaluation["micro"]["entity"]["recall"] == 0.0
+
+    def test_token(self):
+        # the token level metrics are not computed
+        streaming_ner_metrics = StreamingNerMetrics()
+        streaming_ner_metrics.update(
+            [["B-PER", "I-PER", "O"], ["B-LOC"]], [["B-PER", "B-PER", "B-LOC"], ["O"]]
+        )
+        evaluation = streaming_ner_metrics.results()
+        for label in ["micro", "macro"]:
+            assert set(evaluation[label]["token"].values()) == {None}
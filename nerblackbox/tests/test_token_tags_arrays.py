@@ -0,0 +1,152 @@
+import pytest
+import random
+from copy import deepcopy
+from typing import List, Dict, Tuple
+import numpy as np
+
+from nerblackbox.modules.ner_training.annotation_tags.token_tags import TokenTags
+from nerblackbox.modules.ner_training.annotation_tags.token_tags_arrays import (
+    TokenTagsArrays,
+)
+
+CLASSES = {
+    "plain": ["O", "PER", "ORG"],
+    "bio": ["O", "B-PER", "I-PER", "B-ORG", "I-ORG"],
+    "bilou": ["O", "B-PER", "I-PER", "L-PER", "U-PER", "B-ORG", "I-ORG", "L-ORG"],
+}
+
+
+def create_random_documents(
+    scheme: str, number_of_documents: int, seed: int
+) -> Tuple[List[str], List[List[Dict[str, str]]]]:
+    r"""
+    Returns:
+        texts: e.g. ["abc de fgh", ..]
+        token_tag_lists: e.g. [[{"char_start": "0", "char_end": "3", "token": "abc", "tag": "O"}, ..], ..]
+    """
+    _random = random.Random(seed)
+    texts, token_tag_lists = list(), list()
+    for _ in range(number_of_documents):
+        text = ""
+        token_tag_list = list()
+        for j in range(_random.randint(0, 12)):
+            if j > 0 and _random.random() > 0.2:
+                text += " "  # else: token directly follows previous token
+            token = "".join(_random.choices("abcdef", k=_random.randint(1, 4)))
+            token_tag_list.append(
+                {
+                    "char_start": str(len(text)),
+                    "char_end": str(len(text) + len(token)),
+                    "token": token,
+                    "tag": _random.choice(CLASSES[scheme]),
+                }
+            )
+            text += token
+        texts.append(text)
+        token_tag_lists.append(token_tag_list)
+    return texts, token_tag_lists
+
+
+def create_token_tags_arrays(
+    scheme: str, texts: List[str], token_tag_lists: List[List[Dict[str, str]]]
+) -> TokenTagsArrays:
+    tokens = [elem for token_tag_list in token_tag_lists for elem in token_tag_list]
+    classes = CLASSES[scheme]
+    return TokenTagsArrays(
+        char_start=np.array([int(elem["char_start"]) for elem in tokens]),
+        char_end=np.array([int(elem["char_end"]) for elem in tokens]),
+        tag_id=np.array([classes.index(elem["tag"]) for elem in tokens]),
+        doc_offsets=np.cumsum([0] + [len(elem) for elem in token_tag_lists]),
+        classes=classes,
+        scheme=scheme,
+        texts=texts,
+    )
+
+
+class TestTokenTagsArrays:
+    @pytest.mark.parametrize("scheme", ["plain", "bio", "bilou"])
+    @pytest.mark.parametrize("level", ["word", "entity"])
+    @pytest.mark.parametrize("unpretokenize", [False, True])
+    def test_identical_to_token_tags(
+        self, scheme: str, level: str, unpretokenize: bool
+    ):
+        texts, token_tag_lists = create_random_documents(scheme, 200, seed=42)
+        original_texts = [f"x{text}" for text in texts]
+
+        # TokenTags (one document at a time)
+        token_tag_lists_expected = list()
+        pretokenization_offsets = list()
+        for text, original_text, token_tag_list in zip(
+            texts, original_texts, token_tag_lists
+        ):
+            token_tags = TokenTags(deepcopy(token_tag_list), scheme=scheme)
+            token_tags.merge_tokens_to_words()
+            if unpretokenize:
+                # shift all words by one character
+                offsets = [
+                    (int(elem["char_start"]) + 1, int(elem["char_end"]) + 1)
+                    for elem in token_tags.as_list()
+                ]
+                pretokenization_offsets.extend(offsets)
+                token_tags.unpretokenize(offsets)
+            if level == "entity":
+                token_tags.merge_tokens_to_entities(original_text, verbose=False)
+            token_tag_lists_expected.append(token_tags.as_list())
+
+        # TokenTagsArrays (all documents at once)
+        token_tags_arrays = create_token_tags_arrays(scheme, texts, token_tag_lists)
+        token_tags_arrays.merge_tokens_to_words()
+        if unpretokenize:
+            token_tags_arrays.unpretokenize(
+                np.array(pretokenization_offsets).reshape(-1, 2)
+            )
+        if level == "entity":
+            token_tags_arrays.merge_tokens_to_entities(original_texts)
+        assert token_tags_arrays.level == level
+
+        test_token_tag_lists = token_tags_arrays.as_lists()
+        assert len(test_token_tag_lists) == len(token_tag_lists_expected)
+        for test_token_tag_list, token_tag_list_expected in zip(
+            test_token_tag_lists, token_tag_lists_expected
+        ):
+            assert (
+                test_token_tag_list == token_tag_list_expected
+            ), f"ERROR! test_token_tag_list = {test_token_tag_list} != {token_tag_list_expected}"
+
+    @pytest.mark.parametrize(
+        "tags, entities",
+        [
+            (["B-PER", "I-PER", "I-ORG", "B-ORG"], [(0, 3, "PER"), (6, 7, "ORG")]),
+            (["I-PER", "I-PER", "B-PER", "O"], [(4, 5, "PER")]),
+            (["B-PER", "B-PER", "I-PER", "I-PER"], [(0, 1, "PER"), (2, 7, "PER")]),
+            (["O", "O", "O", "O"], []),
+        ],
+    )
+    def test_as_arrays(self, tags: List[str], entities: List[Tuple[int, int, str]]):
+        classes = CLASSES["bio"]
+        texts = ["a b c d", "a"]
+        token_tags_arrays = TokenTagsArrays(
+            char_start=np.array([0, 2, 4, 6, 0]),
+            char_end=np.array([1, 3, 5, 7, 1]),
+            tag_id=np.array([classes.index(tag) for tag in tags] + [0]),
+            doc_offsets=np.array([0, 4, 5]),
+            classes=classes,
+            scheme="bio",
+            texts=texts,
+        )
+        token_tags_arrays.merge_tokens_to_entities(texts)
+        entity_classes = ["O", "ORG", "PER"]
+        prediction_arrays = token_tags_arrays.as_arrays(entity_classes)
+        assert len(prediction_arrays) == 2
+        assert len(prediction_arrays[1]["tag_id"]) == 0
+        test_entities = [
+            (char_start, char_end, entity_classes[tag_id])
+            for char_start, char_end, tag_id in zip(
+                prediction_arrays[0]["char_start"].tolist(),
+                prediction_arrays[0]["char_end"].tolist(),
+                prediction_arrays[0]["tag_id"].tolist(),
+            )
+        ]
+        assert (
+            test_entities == entities
+        ), f"ERROR! test_entities = {test_entities} != {entities} = entities"
@@ -9,3 +9,70 @@ class PseudoDefaultLogger:
     @staticmethod
     def log_debug(*args, **kwargs):
         pass
+
+
+def create_checkpoint(checkpoint_directory: str, max_seq_length: int = 16) -> None:
+    """
+    create a tiny, randomly initialized BERT checkpoint (model & tokenizer) that can be loaded by Model
+
+    Args:
+        checkpoint_directory: e.g. "/tmp/checkpoint"
+        max_seq_length: e.g. 16
+    """
+    import json
+    import torch
+    from os.path import join
+    from transformers import BertConfig, BertForTokenClassification, BertTokenizerFast
+
+    words = [
+        "arbetsförmedlingen",
+        "finns",
+        "i",
+        "stockholm",
+        "göteborg",
+        "anna",
+        "karlsson",
+        "we",
+        "are",
+        "in",
+        "the",
+        "a",
+        "is",
+        "of",
+        "this",
+        "example",
+        ".",
+        ",",
+        "-",
+        "stock",
+        "##holm",
+    ]
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + words
+    path_vocab = join(checkpoint_directory, "vocab.txt")
+    with open(path_vocab, "w") as f:
+        f.write("\n".join(vocab) + "\n")
+
+    tokenizer = BertTokenizerFast(path_vocab, do_lower_case=True, strip_accents=False)
+    tokenizer.save_pretrained(checkpoint_directory)
+
+    id2label = {0: "O", 1: "B-PER", 2: "I-PER", 3: "B-LOC", 4: "I-LOC"}
+    config = BertConfig(
+        vocab_size=len(vocab),
+        hidden_size=8,
+        num_hidden_layers=1,
+        num_attention_heads=2,
+        intermediate_size=16,
+        max_position_embeddings=64,
+        id2label=id2label,
+        label2id={label: _id for _id, label in id2label.items()},
+    )
+    torch.manual_seed(42)
+    model = BertForTokenClassification(config)
+    model.save_pretrained(checkpoint_directory)
+
+    path_config = join(checkpoint_directory, "config.json")
+    with open(path_config, "r") as f:
+        config_dict = json.load(f)
+    config_dict["max_seq_length"] = max_seq_length
+    with open(path_config, "w") as f:
+        json.dump(config_dict, f, indent=2)
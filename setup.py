@@ -54,6 +54,7 @@ setup(
     install_requires=requirements("requirements"),
     extras_require={
         "dev": requirements("requirements_dev"),
+        "onnx": ["onnx", "onnxruntime"],
     },
     python_requires=">=3.8",
     entry_points="""